@@ -0,0 +1,150 @@
+"""
+Process-wide API clients: each platform's client is built once and shared by
+every pipeline and worker thread in the process.
+
+    sp = get_client_registry().get("spotify", build_spotify)
+
+Each client gets its own keep-alive requests.Session whose connection pool is
+sized for the worker pools (LEDGER_HTTP_POOL_SIZE, default 16), so concurrent
+workers reuse warm TLS connections instead of opening and dropping their own.
+connection_stats() reports how many requests each pool served and how many
+connections it had to open for them.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+T = TypeVar("T")
+
+DEFAULT_POOL_SIZE = 16
+
+
+def pool_size_from_env() -> int:
+    size = int(os.getenv("LEDGER_HTTP_POOL_SIZE", DEFAULT_POOL_SIZE))
+    if size <= 0:
+        raise ValueError("LEDGER_HTTP_POOL_SIZE must be > 0")
+    return size
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies `timeout` to requests sent without one."""
+
+    def __init__(self, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> None:
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request: requests.PreparedRequest, *args: Any, **kwargs: Any) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, *args, **kwargs)
+
+
+def pooled_session(
+    *,
+    pool_size: int,
+    max_retries: Union[Retry, int] = 0,
+    timeout: Optional[float] = None,
+) -> requests.Session:
+    """
+    A Session keeping up to `pool_size` idle connections per host. Requests made
+    without a timeout get `timeout` (None waits forever, as requests does).
+    """
+    session = requests.Session()
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=max_retries, timeout=timeout
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@dataclass(frozen=True)
+class ConnectionStats:
+    requests: int = 0
+    connections: int = 0
+
+    @property
+    def reused(self) -> int:
+        """Requests served on a connection that was already open."""
+        return max(0, self.requests - self.connections)
+
+
+def session_stats(session: requests.Session) -> ConnectionStats:
+    """Requests made and connections opened by the session's urllib3 pools."""
+    total_requests = 0
+    total_connections = 0
+    adapters = {id(a): a for a in session.adapters.values() if isinstance(a, HTTPAdapter)}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            total_requests += pool.num_requests
+            total_connections += pool.num_connections
+    return ConnectionStats(requests=total_requests, connections=total_connections)
+
+
+class ClientRegistry:
+    """Builds each named client once, on first use, and hands out the same instance after that."""
+
+    def __init__(self, *, pool_size: Optional[int] = None) -> None:
+        self.pool_size = pool_size if pool_size is not None else pool_size_from_env()
+        self._lock = threading.Lock()
+        self._clients: dict[str, tuple[Any, requests.Session]] = {}
+
+    def get(
+        self,
+        name: str,
+        build: Callable[[requests.Session], T],
+        *,
+        max_retries: Union[Retry, int] = 0,
+        timeout: Optional[float] = None,
+    ) -> T:
+        """
+        The client registered as `name`, calling `build` with a fresh pooled
+        session (see pooled_session) to create it the first time.
+        """
+        with self._lock:
+            entry = self._clients.get(name)
+            if entry is None:
+                session = pooled_session(pool_size=self.pool_size, max_retries=max_retries, timeout=timeout)
+                entry = self._clients[name] = (build(session), session)
+            return entry[0]
+
+    def stats(self) -> dict[str, ConnectionStats]:
+        with self._lock:
+            sessions = {name: session for name, (_, session) in self._clients.items()}
+        return {name: session_stats(session) for name, session in sorted(sessions.items())}
+
+    def clear(self) -> None:
+        """Drop every client and close its connections; the next get() builds a new one."""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for _, session in clients.values():
+            session.close()
+
+
+_SHARED_REGISTRY: Optional[ClientRegistry] = None
+_SHARED_REGISTRY_LOCK = threading.Lock()
+
+
+def get_client_registry() -> ClientRegistry:
+    """The process-wide registry."""
+    global _SHARED_REGISTRY
+    with _SHARED_REGISTRY_LOCK:
+        if _SHARED_REGISTRY is None:
+            _SHARED_REGISTRY = ClientRegistry()
+        return _SHARED_REGISTRY
+
+
+def connection_stats() -> dict[str, ConnectionStats]:
+    """Connection reuse of every client built so far in this process, by name."""
+    return get_client_registry().stats()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def ordered_map(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    *,
+    max_workers: int,
+    window: Optional[int] = None,
+    thread_name_prefix: str = "ledger",
+) -> Iterator[Future[R]]:
+    """
+    Run `fn` over `items` on a bounded thread pool and yield the futures in input order.
+
+    At most `window` calls (default: 2 * max_workers) are in flight, so a slow consumer
+    (e.g. the single SQLite writer) applies backpressure and stopping early leaves
+    little wasted work. Closing the iterator cancels everything not yet started.
+    Callers decide how to handle failures by calling `.result()` on each future.
+    """
+    if max_workers <= 0:
+        raise ValueError("max_workers must be > 0")
+    window = window or 2 * max_workers
+    if window < max_workers:
+        raise ValueError("window must be >= max_workers")
+
+    pending: deque[Future[R]] = deque()
+    source = iter(items)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix) as pool:
+        try:
+            for item in source:
+                pending.append(pool.submit(fn, item))
+                if len(pending) >= window:
+                    yield pending.popleft()
+            while pending:
+                yield pending.popleft()
+        finally:
+            for fut in pending:
+                fut.cancel()
@@ -13,6 +13,12 @@ def create_artist_uid() -> str:
     return str(uuid.uuid4())
 
 
+def normalize_artist_name(name: Optional[str]) -> str:
+    if not name or not name.strip():
+        return "UNKNOWN ARTIST"
+    return name.strip()
+
+
 def get_artist_by_uid(
     conn: sqlite3.Connection,
     artist_uid: str,
@@ -39,10 +45,7 @@ def get_or_create_artist(
     *,
     artist_uid: Optional[str] = None,
 ) -> str:
-    if not artist.name or not artist.name.strip():
-        name = "UNKNOWN ARTIST"
-    else:
-        name = artist.name.strip()
+    name = normalize_artist_name(artist.name)
 
     existing = get_artist_by_name(conn, name)
     if existing:
@@ -123,6 +126,7 @@ def get_artists_for_track(
         (track_uid,),
     ).fetchall()
 
+
 def clear_artists_for_track(conn: sqlite3.Connection, track_uid: str) -> None:
     conn.execute(
         "DELETE FROM track_artists WHERE track_uid = ?;",
@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Sequence
+
+from music_library_ledger.db.artists import create_artist_uid, normalize_artist_name
+from music_library_ledger.db.collections import normalize_added_at
+from music_library_ledger.db.identity_cache import IdentityCache
+from music_library_ledger.db.paging import MAX_IN_PARAMS
+from music_library_ledger.db.platform import (
+    _PLATFORM_ARTIST_UPSERT_SQL,
+    _PLATFORM_TRACK_UPSERT_SQL,
+    _PLATFORM_TRACK_VERIFY_SQL,
+    _platform_artist_params,
+    _platform_track_params,
+)
+from music_library_ledger.db.tracks import TrackInput, _bool_to_int, _track_content_hash, create_track_uid
+from music_library_ledger.metrics import RunMetrics
+
+
+@dataclass(frozen=True)
+class BulkArtist:
+    name: str
+    platform_artist_id: Optional[str] = None
+    raw_json: Optional[dict[str, Any]] = None
+
+
+@dataclass(frozen=True)
+class BulkTrack:
+    """One platform item of a page: the canonical track plus its platform mapping."""
+
+    track: TrackInput
+    platform_track_id: str
+    artists: Sequence[BulkArtist] = ()
+    song_url: Optional[str] = None
+    raw_json: Optional[dict[str, Any]] = None
+    added_at: Optional[str] = None
+
+
+@dataclass
+class BulkWriteStats:
+    """Rows written vs. skipped because their stored content_hash already matched."""
+
+    tracks_written: int = 0
+    tracks_skipped: int = 0
+    mappings_written: int = 0
+    mappings_skipped: int = 0
+
+    def record(self, metrics: RunMetrics) -> None:
+        metrics.incr("rows_written", self.tracks_written, table="tracks")
+        metrics.incr("rows_skipped", self.tracks_skipped, table="tracks")
+        metrics.incr("rows_written", self.mappings_written, table="platform_tracks")
+        metrics.incr("rows_skipped", self.mappings_skipped, table="platform_tracks")
+
+
+def _chunked(values: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
+    for idx in range(0, len(values), size):
+        yield values[idx : idx + size]
+
+
+def _lookup_pairs(
+    conn: sqlite3.Connection,
+    sql_template: str,
+    fixed_params: tuple[Any, ...],
+    keys: Iterable[str],
+) -> dict[str, str]:
+    """Run a two-column `... IN ({})` lookup in chunks and return it as a dict."""
+    keys = list(dict.fromkeys(keys))
+    found: dict[str, str] = {}
+    for chunk in _chunked(keys, MAX_IN_PARAMS):
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(sql_template.format(placeholders), fixed_params + tuple(chunk))
+        for key, value in rows:
+            found[key] = value
+    return found
+
+
+def _resolve_track_uids(
+    conn: sqlite3.Connection,
+    rows: Sequence[BulkTrack],
+    *,
+    platform: str,
+    cache: Optional[IdentityCache],
+) -> list[str]:
+    # Same precedence as upsert_track (ISRC first), then the existing platform
+    # mapping so tracks without an ISRC keep their uid across re-ingests.
+    by_isrc: dict[str, str] = {}
+    by_platform_id: dict[str, str] = {}
+    if cache is not None:
+        for r in rows:
+            if r.track.isrc:
+                uid = cache.get_track_by_isrc(r.track.isrc)
+                if uid is not None:
+                    by_isrc[r.track.isrc] = uid
+            uid = cache.get_track_by_platform_id(platform, r.platform_track_id)
+            if uid is not None:
+                by_platform_id[r.platform_track_id] = uid
+
+    by_isrc.update(
+        _lookup_pairs(
+            conn,
+            "SELECT isrc, track_uid FROM tracks WHERE isrc IN ({});",
+            (),
+            (r.track.isrc for r in rows if r.track.isrc and r.track.isrc not in by_isrc),
+        )
+    )
+    by_platform_id.update(
+        _lookup_pairs(
+            conn,
+            """
+            SELECT platform_track_id, track_uid
+            FROM platform_tracks
+            WHERE platform = ? AND platform_track_id IN ({});
+            """,
+            (platform,),
+            (
+                r.platform_track_id
+                for r in rows
+                if not (r.track.isrc and r.track.isrc in by_isrc)
+                and r.platform_track_id not in by_platform_id
+            ),
+        )
+    )
+
+    uids: list[str] = []
+    for r in rows:
+        isrc = r.track.isrc
+        uid = (by_isrc.get(isrc) if isrc else None) or by_platform_id.get(r.platform_track_id)
+        if uid is None:
+            uid = create_track_uid()
+        # Later rows of the same page resolve to the same track.
+        if isrc:
+            by_isrc.setdefault(isrc, uid)
+        by_platform_id[r.platform_track_id] = uid
+        uids.append(uid)
+
+    if cache is not None:
+        for isrc, uid in by_isrc.items():
+            cache.put_track_isrc(isrc, uid)
+        for platform_track_id, uid in by_platform_id.items():
+            cache.put_track_platform_id(platform, platform_track_id, uid)
+    return uids
+
+
+def _resolve_artist_uids(
+    conn: sqlite3.Connection,
+    names: Iterable[str],
+    *,
+    cache: Optional[IdentityCache],
+) -> dict[str, str]:
+    names = list(dict.fromkeys(names))
+    by_name: dict[str, str] = {}
+    if cache is not None:
+        for name in names:
+            uid = cache.get_artist(name)
+            if uid is not None:
+                by_name[name] = uid
+
+    by_name.update(
+        _lookup_pairs(
+            conn,
+            "SELECT name, artist_uid FROM artists WHERE name IN ({});",
+            (),
+            (name for name in names if name not in by_name),
+        )
+    )
+
+    missing = [(create_artist_uid(), name) for name in names if name not in by_name]
+    if missing:
+        conn.executemany(
+            """
+            INSERT INTO artists (
+                artist_uid,
+                name,
+                created_at
+            )
+            VALUES (?, ?, datetime('now'))
+            ON CONFLICT(name) DO NOTHING;
+            """,
+            missing,
+        )
+        by_name.update(
+            _lookup_pairs(
+                conn,
+                "SELECT name, artist_uid FROM artists WHERE name IN ({});",
+                (),
+                (name for _, name in missing),
+            )
+        )
+
+    if cache is not None:
+        for name, uid in by_name.items():
+            cache.put_artist(name, uid)
+    return by_name
+
+
+def _load_credits(
+    conn: sqlite3.Connection,
+    track_uids: Iterable[str],
+) -> dict[str, list[tuple[str, str, int, str]]]:
+    """Current track_artists rows per track, in credit order."""
+    credits: dict[str, list[tuple[str, str, int, str]]] = {}
+    for chunk in _chunked(list(track_uids), MAX_IN_PARAMS):
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"""
+            SELECT track_uid, artist_uid, artist_order, role
+            FROM track_artists
+            WHERE track_uid IN ({placeholders})
+            ORDER BY track_uid, artist_order;
+            """,
+            tuple(chunk),
+        )
+        for track_uid, artist_uid, artist_order, role in rows:
+            credits.setdefault(track_uid, []).append((track_uid, artist_uid, artist_order, role))
+    return credits
+
+
+def bulk_upsert_tracks(
+    conn: sqlite3.Connection,
+    rows: Sequence[BulkTrack],
+    *,
+    platform: str,
+    match_confidence: Optional[float] = None,
+    match_method: Optional[str] = None,
+    collection_uid: Optional[str] = None,
+    start_position: int = 0,
+    cache: Optional[IdentityCache] = None,
+    stats: Optional[BulkWriteStats] = None,
+) -> list[str]:
+    """
+    Write a whole page of platform items with set-based statements:
+      - tracks (resolved by ISRC, then by existing platform mapping)
+      - artists + ordered track_artists (replacing the previous credits)
+      - platform_tracks / platform_artists mappings
+      - collection_items at start_position.. when collection_uid is given
+
+    Rows are applied in order, so duplicates within a page behave like the
+    per-row helpers: the last occurrence wins.
+
+    Identities are resolved through `cache` first when given; run the call
+    inside `cache.transaction(conn)` so a rollback also rolls back the cache.
+
+    Tracks and platform mappings whose content_hash is unchanged, and credits
+    that already match, are not rewritten; `stats` accumulates the counts.
+
+    Does not commit; callers wrap the page in `with conn:`.
+    Returns the track_uid of every row, in row order.
+    """
+    if start_position < 0:
+        raise ValueError("start_position must be >= 0")
+
+    rows = list(rows)
+    if not rows:
+        return []
+
+    track_uids = _resolve_track_uids(conn, rows, platform=platform, cache=cache)
+
+    # Last row per track wins, as with sequential upsert_track calls.
+    latest_by_uid: dict[str, BulkTrack] = {}
+    for uid, r in zip(track_uids, rows):
+        latest_by_uid.pop(uid, None)
+        latest_by_uid[uid] = r
+
+    cur = conn.executemany(
+        """
+        INSERT INTO tracks (
+            track_uid,
+            title,
+            album,
+            duration_ms,
+            isrc,
+            explicit,
+            media_type,
+            source_url,
+            canonical_platform,
+            content_hash,
+            created_at,
+            updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))
+        ON CONFLICT(track_uid) DO UPDATE SET
+            title = excluded.title,
+            album = excluded.album,
+            duration_ms = excluded.duration_ms,
+            isrc = COALESCE(tracks.isrc, excluded.isrc),
+            explicit = excluded.explicit,
+            media_type = excluded.media_type,
+            source_url = excluded.source_url,
+            canonical_platform = excluded.canonical_platform,
+            content_hash = excluded.content_hash,
+            updated_at = datetime('now')
+        WHERE tracks.content_hash IS NOT excluded.content_hash;
+        """,
+        [
+            (
+                uid,
+                r.track.title.strip(),
+                r.track.album,
+                r.track.duration_ms,
+                r.track.isrc,
+                _bool_to_int(r.track.explicit),
+                r.track.media_type,
+                r.track.source_url,
+                r.track.canonical_platform,
+                _track_content_hash(r.track),
+            )
+            for uid, r in latest_by_uid.items()
+        ],
+    )
+    tracks_written = max(cur.rowcount, 0)
+
+    artist_uids = _resolve_artist_uids(
+        conn,
+        (normalize_artist_name(a.name) for r in latest_by_uid.values() for a in r.artists),
+        cache=cache,
+    )
+
+    credits_by_uid: dict[str, list[tuple[str, str, int, str]]] = {}
+    platform_artist_rows: dict[str, tuple[Any, ...]] = {}
+    for uid, r in latest_by_uid.items():
+        # An artist credited twice keeps its last slot (attach_artist_to_track semantics).
+        slots: dict[str, int] = {}
+        for idx, a in enumerate(r.artists):
+            artist_uid = artist_uids[normalize_artist_name(a.name)]
+            slots.pop(artist_uid, None)
+            slots[artist_uid] = idx
+            if a.platform_artist_id:
+                platform_artist_rows[a.platform_artist_id] = _platform_artist_params(
+                    platform,
+                    a.platform_artist_id,
+                    artist_uid,
+                    a.raw_json,
+                )
+        credits_by_uid[uid] = sorted(
+            ((uid, artist_uid, idx, "primary" if idx == 0 else "artist") for artist_uid, idx in slots.items()),
+            key=lambda c: c[2],
+        )
+
+    # Replace the credits only of tracks whose artists changed.
+    existing_credits = _load_credits(conn, credits_by_uid)
+    changed = [uid for uid, credits in credits_by_uid.items() if existing_credits.get(uid, []) != credits]
+    credit_rows = [c for uid in changed for c in credits_by_uid[uid]]
+
+    conn.executemany(
+        "DELETE FROM track_artists WHERE track_uid = ?;",
+        [(uid,) for uid in changed],
+    )
+    conn.executemany(
+        """
+        INSERT INTO track_artists (
+            track_uid,
+            artist_uid,
+            artist_order,
+            role
+        )
+        VALUES (?, ?, ?, ?);
+        """,
+        credit_rows,
+    )
+    conn.executemany(_PLATFORM_ARTIST_UPSERT_SQL, list(platform_artist_rows.values()))
+
+    mapping_rows = [
+        _platform_track_params(
+            platform,
+            r.platform_track_id,
+            uid,
+            match_confidence,
+            match_method,
+            r.raw_json,
+            r.song_url,
+        )
+        for uid, r in zip(track_uids, rows)
+    ]
+    # Stamp the mappings the upsert will skip; it stamps the ones it rewrites.
+    conn.executemany(_PLATFORM_TRACK_VERIFY_SQL, [(p[0], p[1], p[-1]) for p in mapping_rows])
+    cur = conn.executemany(_PLATFORM_TRACK_UPSERT_SQL, mapping_rows)
+    mappings_written = max(cur.rowcount, 0)
+
+    if stats is not None:
+        stats.tracks_written += tracks_written
+        stats.tracks_skipped += len(latest_by_uid) - tracks_written
+        stats.mappings_written += mappings_written
+        stats.mappings_skipped += len(rows) - mappings_written
+
+    if collection_uid is not None:
+        conn.executemany(
+            """
+            INSERT INTO collection_items (
+                collection_uid,
+                track_uid,
+                position,
+                added_at
+            )
+            VALUES (:collection_uid, :track_uid, :position, COALESCE(:added_at, strftime('%Y-%m-%dT%H:%M:%SZ', 'now')))
+            ON CONFLICT(collection_uid, track_uid) DO UPDATE SET
+                position = excluded.position,
+                added_at = COALESCE(:added_at, collection_items.added_at)
+            WHERE collection_items.position IS NOT excluded.position
+                OR collection_items.added_at IS NOT COALESCE(:added_at, collection_items.added_at);
+            """,
+            [
+                {
+                    "collection_uid": collection_uid,
+                    "track_uid": uid,
+                    "position": start_position + idx,
+                    "added_at": normalize_added_at(r.added_at),
+                }
+                for idx, (uid, r) in enumerate(zip(track_uids, rows))
+            ],
+        )
+
+    return track_uids
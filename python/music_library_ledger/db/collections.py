@@ -1,7 +1,14 @@
 import sqlite3
 import uuid
 from dataclasses import dataclass
-from typing import Optional, Sequence
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Sequence
+
+from music_library_ledger.db.paging import DEFAULT_PAGE_SIZE, MAX_IN_PARAMS, iter_keyset
+
+# collection_items.added_at is stored in one format, UTC 'YYYY-MM-DDTHH:MM:SSZ'
+# (Spotify's), so it orders and compares correctly as text.
+ADDED_AT_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 
 
 @dataclass(frozen=True)
@@ -11,6 +18,27 @@ class CollectionInput:
     description: Optional[str] = None
 
 
+@dataclass(frozen=True)
+class CollectionReconcileResult:
+    inserted: int = 0
+    deleted: int = 0
+    moved: int = 0
+    unchanged: int = 0
+
+
+def normalize_added_at(value: Optional[str]) -> Optional[str]:
+    """`value` in ADDED_AT_FORMAT; naive times are taken as UTC and unparseable ones kept as given."""
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime(ADDED_AT_FORMAT)
+
+
 def create_collection_uid() -> str:
     return str(uuid.uuid4())
 
@@ -56,15 +84,16 @@ def get_or_create_collection(
 
     existing = get_collection_by_name_and_type(conn, name, ctype)
     if existing:
+        # Only a changed description bumps updated_at, which orders list_collections.
         if collection.description is not None:
             conn.execute(
                 """
                 UPDATE collections
                 SET description = ?,
                     updated_at = datetime('now')
-                WHERE collection_uid = ?;
+                WHERE collection_uid = ? AND description IS NOT ?;
                 """,
-                (collection.description, existing["collection_uid"]),
+                (collection.description, existing["collection_uid"], collection.description),
             )
         return existing["collection_uid"]
 
@@ -98,6 +127,7 @@ def add_track_to_collection(
 ) -> None:
     if position < 0:
         raise ValueError("position must be >= 0")
+    added_at = normalize_added_at(added_at)
 
     existing = conn.execute(
         """
@@ -129,7 +159,7 @@ def add_track_to_collection(
                 position,
                 added_at
             )
-            VALUES (?, ?, ?, datetime('now'));
+            VALUES (?, ?, ?, strftime('%Y-%m-%dT%H:%M:%SZ', 'now'));
             """,
             (collection_uid, track_uid, position),
         )
@@ -149,6 +179,145 @@ def add_track_to_collection(
 
 
 
+def prepend_tracks_to_collection(
+    conn: sqlite3.Connection,
+    *,
+    collection_uid: str,
+    items: Sequence[tuple[str, Optional[str]]],
+) -> int:
+    """
+    Put (track_uid, added_at) items, in order, ahead of the collection's current first item.
+
+    Only the given rows are written: positions continue below the current minimum
+    (and may go negative), which keeps ORDER BY position correct without renumbering
+    the rest of the collection. Tracks already present are moved to the head.
+    Returns the number of items written.
+    """
+    unique: list[tuple[str, Optional[str]]] = []
+    seen: set[str] = set()
+    for uid, added_at in items:
+        if uid not in seen:
+            seen.add(uid)
+            unique.append((uid, normalize_added_at(added_at)))
+    if not unique:
+        return 0
+
+    row = conn.execute(
+        "SELECT MIN(position) FROM collection_items WHERE collection_uid = ?;",
+        (collection_uid,),
+    ).fetchone()
+    first = row[0] if row and row[0] is not None else len(unique)
+    start = first - len(unique)
+
+    conn.executemany(
+        """
+        INSERT INTO collection_items (
+            collection_uid,
+            track_uid,
+            position,
+            added_at
+        )
+        VALUES (:collection_uid, :track_uid, :position, COALESCE(:added_at, strftime('%Y-%m-%dT%H:%M:%SZ', 'now')))
+        ON CONFLICT(collection_uid, track_uid) DO UPDATE SET
+            position = excluded.position,
+            added_at = COALESCE(:added_at, collection_items.added_at);
+        """,
+        [
+            {
+                "collection_uid": collection_uid,
+                "track_uid": uid,
+                "position": start + idx,
+                "added_at": added_at,
+            }
+            for idx, (uid, added_at) in enumerate(unique)
+        ],
+    )
+    return len(unique)
+
+
+def reconcile_collection_items(
+    conn: sqlite3.Connection,
+    *,
+    collection_uid: str,
+    items: Sequence[tuple[str, Optional[str]]],
+) -> CollectionReconcileResult:
+    """
+    Make collection_items match the incoming (track_uid, added_at) list, in order.
+
+    Only the delta is written: new tracks are inserted, missing ones deleted, and
+    rows whose position (or known added_at) changed are updated. Positions are the
+    list index; a track listed twice keeps its last position, like repeated
+    add_track_to_collection calls.
+
+    Does not commit; run inside `with conn:` so readers never see a partial state.
+    """
+    desired: dict[str, tuple[int, Optional[str]]] = {}
+    for position, (track_uid, added_at) in enumerate(items):
+        desired.pop(track_uid, None)
+        desired[track_uid] = (position, normalize_added_at(added_at))
+
+    stored = {
+        row[0]: (row[1], row[2])
+        for row in conn.execute(
+            """
+            SELECT track_uid, position, added_at
+            FROM collection_items
+            WHERE collection_uid = ?;
+            """,
+            (collection_uid,),
+        )
+    }
+
+    deletes = [(collection_uid, uid) for uid in stored if uid not in desired]
+    inserts = []
+    moves = []
+    unchanged = 0
+    for uid, (position, added_at) in desired.items():
+        current = stored.get(uid)
+        if current is None:
+            inserts.append((collection_uid, uid, position, added_at))
+        elif current[0] != position or (added_at is not None and current[1] != added_at):
+            moves.append((position, added_at, collection_uid, uid))
+        else:
+            unchanged += 1
+
+    conn.executemany(
+        """
+        DELETE FROM collection_items
+        WHERE collection_uid = ? AND track_uid = ?;
+        """,
+        deletes,
+    )
+    conn.executemany(
+        """
+        UPDATE collection_items
+        SET position = ?,
+            added_at = COALESCE(?, added_at)
+        WHERE collection_uid = ? AND track_uid = ?;
+        """,
+        moves,
+    )
+    conn.executemany(
+        """
+        INSERT INTO collection_items (
+            collection_uid,
+            track_uid,
+            position,
+            added_at
+        )
+        VALUES (?1, ?2, ?3, COALESCE(?4, strftime('%Y-%m-%dT%H:%M:%SZ', 'now')));
+        """,
+        inserts,
+    )
+
+    return CollectionReconcileResult(
+        inserted=len(inserts),
+        deleted=len(deletes),
+        moved=len(moves),
+        unchanged=unchanged,
+    )
+
+
 def remove_track_from_collection(
     conn: sqlite3.Connection,
     *,
@@ -180,6 +349,85 @@ def get_collection_tracks(
     ).fetchall()
 
 
+def iter_collection_tracks(
+    conn: sqlite3.Connection,
+    collection_uid: str,
+    *,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    platform: Optional[str] = None,
+) -> Iterator[sqlite3.Row]:
+    """
+    Streaming get_collection_tracks, paged by (position, track_uid).
+
+    With `platform`, each row also carries that platform's platform_track_id
+    (NULL when unmapped). Items without a position come first, as in ORDER BY.
+    """
+    params: list[object] = []
+    mapping_sql = ""
+    mapping_join_sql = ""
+    if platform is not None:
+        mapping_sql = ", pt.platform_track_id"
+        mapping_join_sql = "LEFT JOIN platform_tracks pt ON pt.track_uid = t.track_uid AND pt.platform = ?"
+        params.append(platform)
+    params.append(collection_uid)
+
+    sql = f"""
+        SELECT t.*, ci.position, ci.added_at{mapping_sql}
+        FROM collection_items ci
+        JOIN tracks t ON t.track_uid = ci.track_uid
+        {mapping_join_sql}
+        WHERE ci.collection_uid = ?
+            AND ci.position {{position_filter}}
+            {{keyset}}
+    """
+    # Row-value comparisons never match NULL, so unpositioned items get their own pass.
+    yield from iter_keyset(
+        conn,
+        sql.replace("{position_filter}", "IS NULL"),
+        params,
+        key=("ci.track_uid",),
+        page_size=page_size,
+    )
+    yield from iter_keyset(
+        conn,
+        sql.replace("{position_filter}", "IS NOT NULL"),
+        params,
+        key=("ci.position", "ci.track_uid"),
+        page_size=page_size,
+    )
+
+
+def get_collections_platform_tracks(
+    conn: sqlite3.Connection,
+    collection_uids: Sequence[str],
+    *,
+    platform: str,
+) -> dict[str, list[tuple[str, Optional[str]]]]:
+    """
+    (track_uid, platform_track_id) for every item of many collections, in one
+    query per 900 collections instead of one per collection. Items are in
+    iter_collection_tracks order; platform_track_id is None when unmapped.
+    """
+    uids = list(dict.fromkeys(collection_uids))
+    tracks: dict[str, list[tuple[str, Optional[str]]]] = {uid: [] for uid in uids}
+    for idx in range(0, len(uids), MAX_IN_PARAMS):
+        chunk = uids[idx : idx + MAX_IN_PARAMS]
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"""
+            SELECT ci.collection_uid, ci.track_uid, pt.platform_track_id
+            FROM collection_items ci
+            LEFT JOIN platform_tracks pt ON pt.track_uid = ci.track_uid AND pt.platform = ?
+            WHERE ci.collection_uid IN ({placeholders})
+            ORDER BY ci.collection_uid, ci.position IS NOT NULL, ci.position, ci.track_uid;
+            """,
+            (platform, *chunk),
+        )
+        for collection_uid, track_uid, platform_track_id in rows:
+            tracks[collection_uid].append((track_uid, platform_track_id))
+    return tracks
+
+
 def list_collections(
     conn: sqlite3.Connection,
     *,
@@ -207,3 +455,44 @@ def list_collections(
         """,
         tuple(params),
     ).fetchall()
+
+
+def iter_collections(
+    conn: sqlite3.Connection,
+    *,
+    collection_type: Optional[str] = None,
+    limit: Optional[int] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    after: Optional[tuple[str, str]] = None,
+    updated_since: Optional[str] = None,
+) -> Iterator[sqlite3.Row]:
+    """
+    Streaming list_collections: most recently updated first, paged by (updated_at, collection_uid).
+    `after` is the (updated_at, collection_uid) of a collection to continue past;
+    `updated_since` keeps only collections updated at or after that time.
+    """
+    params = []
+    where_sql = ""
+    if collection_type is not None:
+        where_sql = "AND collection_type = ?"
+        params.append(collection_type.strip())
+    if updated_since is not None:
+        where_sql += " AND updated_at >= ?"
+        params.append(updated_since)
+
+    return iter_keyset(
+        conn,
+        f"""
+        SELECT *
+        FROM collections
+        WHERE 1 = 1
+            {where_sql}
+            {{keyset}}
+        """,
+        params,
+        key=("updated_at", "collection_uid"),
+        descending=True,
+        page_size=page_size,
+        limit=limit,
+        after=after,
+    )
@@ -1,23 +1,127 @@
 import os
 import sqlite3
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Union
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_connection() -> sqlite3.Connection:
+
+@dataclass(frozen=True)
+class ConnectionProfile:
+    name: str
+    synchronous: str = "FULL"                # FULL, NORMAL or OFF
+    cache_size_kib: int = 16 * 1024
+    mmap_size: int = 0                       # bytes; 0 disables memory-mapped I/O
+    temp_store: str = "DEFAULT"              # DEFAULT, FILE or MEMORY
+    busy_timeout_ms: int = 5000
+    wal_autocheckpoint: int = 1000           # pages; SQLite's default
+    read_only: bool = False
+    checkpoint_on_close: bool = False
+
+
+CONNECTION_PROFILES: dict[str, ConnectionProfile] = {
+    # Safer writes for Drive / synced filesystems: every commit is fsynced and
+    # nothing is memory-mapped over a file another process may be syncing.
+    "durable": ConnectionProfile(name="durable"),
+    # Large one-off ingests. In WAL mode synchronous=NORMAL can lose the last
+    # commits on power loss but never corrupts the database; the WAL is
+    # checkpointed and truncated when the connection is closed.
+    "bulk": ConnectionProfile(
+        name="bulk",
+        synchronous="NORMAL",
+        cache_size_kib=256 * 1024,
+        mmap_size=256 * 1024 * 1024,
+        temp_store="MEMORY",
+        wal_autocheckpoint=10_000,
+        checkpoint_on_close=True,
+    ),
+    # Reporting and search: opened read-only, so it can't take the write lock.
+    "query": ConnectionProfile(
+        name="query",
+        cache_size_kib=64 * 1024,
+        mmap_size=256 * 1024 * 1024,
+        temp_store="MEMORY",
+        read_only=True,
+    ),
+}
+
+DEFAULT_PROFILE = "durable"
+
+
+class LedgerConnection(sqlite3.Connection):
+    """
+    sqlite3.Connection that remembers its profile and checkpoints on close if asked to.
+    Like sqlite3.Connection.close, closing never commits: an open transaction is rolled back.
+    """
+
+    profile: ConnectionProfile
+
+    def close(self) -> None:
+        if getattr(self, "profile", None) is not None and self.profile.checkpoint_on_close:
+            if self.in_transaction:
+                self.rollback()
+            self.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        super().close()
+
+
+def get_connection_profile(profile: Union[str, ConnectionProfile]) -> ConnectionProfile:
+    if isinstance(profile, ConnectionProfile):
+        return profile
+    try:
+        return CONNECTION_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown connection profile: {profile}") from None
+
+
+def get_connection(
+    profile: Union[str, ConnectionProfile] = DEFAULT_PROFILE,
+    *,
+    check_same_thread: bool = True,
+) -> sqlite3.Connection:
+    """
+    Open SQLITE_DB_PATH with `profile`'s pragmas. check_same_thread=False lets
+    the connection be handed to another thread (one at a time), as
+    ingest_playlists_async does with its writer thread.
+    """
+    settings = get_connection_profile(profile)
+
     db_path = os.environ["SQLITE_DB_PATH"]
     db_path = Path(db_path).expanduser().resolve()
 
-    conn = sqlite3.connect(db_path)
+    factory = LedgerConnection
+    if os.getenv("LEDGER_SQL_TRACE"):
+        from music_library_ledger.db.tracing import TracedConnection, tracing_enabled
+
+        if tracing_enabled():
+            factory = TracedConnection
+
+    if settings.read_only:
+        conn = sqlite3.connect(
+            f"{db_path.as_uri()}?mode=ro", uri=True, factory=factory, check_same_thread=check_same_thread
+        )
+    else:
+        conn = sqlite3.connect(db_path, factory=factory, check_same_thread=check_same_thread)
+    conn.profile = settings
 
     # Always enforce foreign keys (SQLite gotcha)
     conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute(f"PRAGMA busy_timeout = {int(settings.busy_timeout_ms)};")
+
+    if settings.read_only:
+        conn.execute("PRAGMA query_only = ON;")
+    else:
+        # journal_mode is stored in the file; a read-only connection can't change it.
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute(f"PRAGMA wal_autocheckpoint = {int(settings.wal_autocheckpoint)};")
+    conn.execute(f"PRAGMA synchronous = {settings.synchronous};")
 
-    # Safer writes for Drive / synced filesystems
-    conn.execute("PRAGMA journal_mode = WAL;")
-    conn.execute("PRAGMA synchronous = FULL;")
+    # Negative cache_size is in KiB rather than pages.
+    conn.execute(f"PRAGMA cache_size = {-int(settings.cache_size_kib)};")
+    conn.execute(f"PRAGMA mmap_size = {int(settings.mmap_size)};")
+    conn.execute(f"PRAGMA temp_store = {settings.temp_store};")
 
     # Rows as dict-like objects
     conn.row_factory = sqlite3.Row
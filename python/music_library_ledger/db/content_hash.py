@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+
+def content_hash(*parts: Any) -> str:
+    """
+    Digest of the values a row is written from, stored alongside it so a
+    re-ingest can tell an unchanged row apart and skip the write.
+    Parts must be JSON-serialisable; their order matters.
+    """
+    text = json.dumps(parts, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import sqlite3
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Hashable, Iterator, Optional
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Small bounded mapping; the least recently used key is evicted first."""
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be > 0")
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value  # type: ignore[return-value]
+
+    def put(self, key: Hashable, value: str) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class IdentityCache:
+    """
+    Process-wide identity map for ingest/export runs:
+      - artists:   normalized name -> artist_uid
+      - isrcs:     ISRC -> track_uid
+      - platform:  (platform, platform_track_id) -> track_uid
+
+    Entries learned inside `transaction()` are staged and only become visible to
+    other transactions once the block commits; a rollback drops them, so the
+    cache never hands out uids for rows that were never written.
+
+    Not thread-safe: use it from the single DB writer.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_artists: int = 50_000,
+        max_isrcs: int = 100_000,
+        max_platform_ids: int = 200_000,
+    ) -> None:
+        self.artists = LRUCache(max_artists)
+        self.isrcs = LRUCache(max_isrcs)
+        self.platform_ids = LRUCache(max_platform_ids)
+        self._pending: Optional[dict[tuple[str, Hashable], str]] = None
+        self.warmed = False
+
+    def _maps(self) -> dict[str, LRUCache]:
+        return {"artists": self.artists, "isrcs": self.isrcs, "platform_ids": self.platform_ids}
+
+    def _get(self, map_name: str, key: Hashable) -> Optional[str]:
+        if self._pending is not None:
+            staged = self._pending.get((map_name, key))
+            if staged is not None:
+                return staged
+        return self._maps()[map_name].get(key)
+
+    def _put(self, map_name: str, key: Hashable, value: str) -> None:
+        if self._pending is not None:
+            self._pending[(map_name, key)] = value
+        else:
+            self._maps()[map_name].put(key, value)
+
+    def get_artist(self, name: str) -> Optional[str]:
+        return self._get("artists", name)
+
+    def put_artist(self, name: str, artist_uid: str) -> None:
+        self._put("artists", name, artist_uid)
+
+    def get_track_by_isrc(self, isrc: str) -> Optional[str]:
+        return self._get("isrcs", isrc)
+
+    def put_track_isrc(self, isrc: str, track_uid: str) -> None:
+        self._put("isrcs", isrc, track_uid)
+
+    def get_track_by_platform_id(self, platform: str, platform_track_id: str) -> Optional[str]:
+        return self._get("platform_ids", (platform, platform_track_id))
+
+    def put_track_platform_id(self, platform: str, platform_track_id: str, track_uid: str) -> None:
+        self._put("platform_ids", (platform, platform_track_id), track_uid)
+
+    @contextmanager
+    def transaction(self, conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        """`with conn:` that keeps the cache consistent with commit/rollback."""
+        if self._pending is not None:
+            raise RuntimeError("IdentityCache transactions cannot be nested")
+
+        self._pending = {}
+        try:
+            with conn:
+                yield conn
+        except BaseException:
+            self._pending = None
+            raise
+
+        pending, self._pending = self._pending, None
+        maps = self._maps()
+        for (map_name, key), value in pending.items():
+            maps[map_name].put(key, value)
+
+    def warm(self, conn: sqlite3.Connection, *, platforms: Optional[tuple[str, ...]] = None) -> None:
+        """Bulk-load the most recent identities, up to each map's capacity."""
+        for row in conn.execute(
+            "SELECT name, artist_uid FROM artists ORDER BY created_at DESC LIMIT ?;",
+            (self.artists.maxsize,),
+        ):
+            self.artists.put(row[0], row[1])
+
+        for row in conn.execute(
+            """
+            SELECT isrc, track_uid
+            FROM tracks
+            WHERE isrc IS NOT NULL
+            ORDER BY updated_at DESC
+            LIMIT ?;
+            """,
+            (self.isrcs.maxsize,),
+        ):
+            self.isrcs.put(row[0], row[1])
+
+        params: list[object] = []
+        platform_sql = ""
+        if platforms:
+            platform_sql = f"WHERE platform IN ({', '.join('?' for _ in platforms)})"
+            params.extend(platforms)
+        params.append(self.platform_ids.maxsize)
+
+        for row in conn.execute(
+            f"""
+            SELECT platform, platform_track_id, track_uid
+            FROM platform_tracks
+            {platform_sql}
+            ORDER BY updated_at DESC
+            LIMIT ?;
+            """,
+            tuple(params),
+        ):
+            self.platform_ids.put((row[0], row[1]), row[2])
+
+        self.warmed = True
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            name: {
+                "size": len(cache),
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "evictions": cache.evictions,
+            }
+            for name, cache in self._maps().items()
+        }
+
+
+_SHARED_CACHES: dict[str, IdentityCache] = {}
+
+
+def _database_path(conn: sqlite3.Connection) -> str:
+    # '' for in-memory and temporary databases.
+    for row in conn.execute("PRAGMA database_list;"):
+        if row[1] == "main":
+            return row[2] or ""
+    return ""
+
+
+def get_identity_cache(conn: sqlite3.Connection) -> IdentityCache:
+    """
+    The process-wide cache for `conn`'s database file, warmed from `conn` on first
+    use. Each database gets its own cache, since uids from one are meaningless in
+    another; an in-memory database gets a fresh, unshared one.
+    """
+    path = _database_path(conn)
+    cache = _SHARED_CACHES.get(path) if path else None
+    if cache is None:
+        cache = IdentityCache()
+        cache.warm(conn)
+        if path:
+            _SHARED_CACHES[path] = cache
+    return cache
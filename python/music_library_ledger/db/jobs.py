@@ -0,0 +1,137 @@
+"""
+Checkpoints for long-running sync jobs (sync_jobs / sync_job_items).
+
+A job keeps one row holding a JSON cursor of its own design (playlist offset,
+last exported track, ...). Jobs save their cursor in the same transaction as
+the writes it covers, so after a crash the stored cursor never runs ahead of
+the data; `--resume` continues from it instead of from the beginning.
+
+    with conn:
+        cursor = start_job(conn, "export_tracks", resume=args.resume)
+    ...
+    with conn:
+        upsert_platform_track(conn, ...)
+        save_job_cursor(conn, "export_tracks", {"track_uid": uid})
+    ...
+    with conn:
+        complete_job(conn, "export_tracks")
+
+None of these commit; callers wrap them in `with conn:` like the other writers.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any, Iterable, Optional
+
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+
+
+def load_job_cursor(conn: sqlite3.Connection, job_name: str) -> Optional[dict[str, Any]]:
+    """The cursor of an unfinished run of `job_name`, or None if there isn't one."""
+    row = conn.execute(
+        "SELECT status, cursor_json FROM sync_jobs WHERE job_name = ?;",
+        (job_name,),
+    ).fetchone()
+    if row is None or row[0] != JOB_RUNNING:
+        return None
+    try:
+        cursor = json.loads(row[1])
+    except ValueError:
+        return None
+    return cursor if isinstance(cursor, dict) else None
+
+
+def start_job(conn: sqlite3.Connection, job_name: str, *, resume: bool = False) -> dict[str, Any]:
+    """
+    Begin a run of `job_name` and return the cursor to start from.
+
+    With resume=True and an unfinished previous run, that run's cursor (and its
+    staged items) are kept and returned. Otherwise the job starts over: the
+    cursor is empty and any staged items are dropped.
+    """
+    if resume:
+        cursor = load_job_cursor(conn, job_name)
+        if cursor is not None:
+            return cursor
+
+    conn.execute(
+        """
+        INSERT INTO sync_jobs (job_name, status, cursor_json, started_at, updated_at, finished_at)
+        VALUES (?, ?, '{}', datetime('now'), datetime('now'), NULL)
+        ON CONFLICT(job_name) DO UPDATE SET
+            status = excluded.status,
+            cursor_json = excluded.cursor_json,
+            started_at = excluded.started_at,
+            updated_at = excluded.updated_at,
+            finished_at = NULL;
+        """,
+        (job_name, JOB_RUNNING),
+    )
+    clear_job_items(conn, job_name)
+    return {}
+
+
+def save_job_cursor(conn: sqlite3.Connection, job_name: str, cursor: dict[str, Any]) -> None:
+    """Record how far the job has got; call it inside the transaction that did the work."""
+    conn.execute(
+        """
+        UPDATE sync_jobs
+        SET cursor_json = ?,
+            updated_at = datetime('now')
+        WHERE job_name = ?;
+        """,
+        (json.dumps(cursor, separators=(",", ":"), sort_keys=True), job_name),
+    )
+
+
+def complete_job(conn: sqlite3.Connection, job_name: str) -> None:
+    """Mark the run finished; a later --resume starts from scratch."""
+    conn.execute(
+        """
+        UPDATE sync_jobs
+        SET status = ?,
+            cursor_json = '{}',
+            updated_at = datetime('now'),
+            finished_at = datetime('now')
+        WHERE job_name = ?;
+        """,
+        (JOB_COMPLETED, job_name),
+    )
+    clear_job_items(conn, job_name)
+
+
+def stage_job_items(
+    conn: sqlite3.Connection,
+    job_name: str,
+    items: Iterable[tuple[str, Optional[str]]],
+    *,
+    start_seq: int,
+) -> int:
+    """
+    Append (track_uid, added_at) items at start_seq.. for the list the job is in
+    the middle of. Returns the next seq.
+    """
+    rows = [(job_name, start_seq + idx, uid, added_at) for idx, (uid, added_at) in enumerate(items)]
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO sync_job_items (job_name, seq, track_uid, added_at)
+        VALUES (?, ?, ?, ?);
+        """,
+        rows,
+    )
+    return start_seq + len(rows)
+
+
+def load_job_items(conn: sqlite3.Connection, job_name: str) -> list[tuple[str, Optional[str]]]:
+    """The staged items, in order."""
+    rows = conn.execute(
+        "SELECT track_uid, added_at FROM sync_job_items WHERE job_name = ? ORDER BY seq;",
+        (job_name,),
+    ).fetchall()
+    return [(r[0], r[1]) for r in rows]
+
+
+def clear_job_items(conn: sqlite3.Connection, job_name: str) -> None:
+    conn.execute("DELETE FROM sync_job_items WHERE job_name = ?;", (job_name,))
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Iterator, Optional, Sequence
+
+DEFAULT_PAGE_SIZE = 1000
+
+# Most values bound into one IN (...) list. Stays well below
+# SQLITE_MAX_VARIABLE_NUMBER on older builds (999).
+MAX_IN_PARAMS = 900
+
+
+def iter_keyset(
+    conn: sqlite3.Connection,
+    sql: str,
+    params: Sequence[object] = (),
+    *,
+    key: Sequence[str],
+    page_size: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[Sequence[object]] = None,
+) -> Iterator[sqlite3.Row]:
+    """
+    Stream a query page by page, resuming each page after the last key seen.
+
+    `sql` is a SELECT whose WHERE clause contains a `{keyset}` placeholder and that
+    selects the `key` columns (unique together) under their bare names; the ORDER BY
+    and LIMIT are added here. Each page is fetched in full before any row is
+    yielded, so no statement is left open while the caller writes or commits on
+    the same connection, and rows changed or removed behind the cursor cannot
+    shift later pages the way OFFSET paging would.
+
+    `after` (values of the key columns) starts the stream past that key, e.g. to
+    resume from a saved position.
+    """
+    if page_size <= 0:
+        raise ValueError("page_size must be > 0")
+    if limit is not None and limit <= 0:
+        raise ValueError("limit must be > 0")
+
+    direction = "DESC" if descending else "ASC"
+    order_sql = ", ".join(f"{col} {direction}" for col in key)
+    names = [col.rsplit(".", 1)[-1] for col in key]
+    if after is not None:
+        if len(after) != len(key):
+            raise ValueError("after must have one value per key column")
+        after = tuple(after)
+    remaining = limit
+
+    while True:
+        size = page_size if remaining is None else min(page_size, remaining)
+        keyset_sql = ""
+        page_params = list(params)
+        if after is not None:
+            keyset_sql = f"AND ({', '.join(key)}) {'<' if descending else '>'} ({', '.join('?' for _ in key)})"
+            page_params.extend(after)
+
+        rows = conn.execute(
+            f"{sql.format(keyset=keyset_sql)} ORDER BY {order_sql} LIMIT ?;",
+            (*page_params, size),
+        ).fetchall()
+        yield from rows
+
+        if remaining is not None:
+            remaining -= len(rows)
+            if remaining <= 0:
+                return
+        if len(rows) < size:
+            return
+        last = rows[-1]
+        after = tuple(last[name] for name in names)
@@ -0,0 +1,284 @@
+"""
+Storage for the raw platform objects kept in platform_tracks, platform_artists
+and platform_collections.
+
+Payloads are pruned of fields we never read back (market lists, image sets),
+serialised as compact JSON and compressed into the raw_payload BLOB. The first
+byte of the blob names the codec, so rows written with different codecs can
+live side by side:
+
+    0x00  JSON as UTF-8 (used when compression doesn't make it smaller)
+    0x01  zlib
+    0x02  zstd (needs the optional `zstandard` package)
+
+The codec for new writes comes from LEDGER_PAYLOAD_CODEC (zlib by default).
+Rows written before raw_payload existed keep their text in raw_json until
+`python -m music_library_ledger.db.payloads` rewrites them; Payload reads both.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import zlib
+from typing import Any, Optional
+
+_CODEC_IDENTITY = 0
+_CODEC_ZLIB = 1
+_CODEC_ZSTD = 2
+
+CODECS = {"none": _CODEC_IDENTITY, "zlib": _CODEC_ZLIB, "zstd": _CODEC_ZSTD}
+DEFAULT_CODEC = "zlib"
+
+_ZLIB_LEVEL = 6
+_ZSTD_LEVEL = 9
+
+# Dotted paths dropped before storing, per (platform, kind). A path that walks
+# into a list applies to every element. Collection payloads also carry sync
+# state (snapshot_id, kind, last_full_sync_at), which must never be listed here.
+PRUNE_RULES: dict[tuple[str, str], tuple[str, ...]] = {
+    ("spotify", "track"): (
+        "available_markets",
+        "album.available_markets",
+        "album.images",
+        "album.artists.external_urls",
+        "artists.external_urls",
+    ),
+    ("spotify", "artist"): ("images",),
+    ("spotify", "collection"): ("images", "owner.images"),
+    ("ytm", "track"): ("thumbnails", "album.thumbnails"),
+    ("ytm", "artist"): ("thumbnails",),
+    ("ytm", "collection"): ("thumbnails",),
+}
+
+PAYLOAD_TABLES = ("platform_tracks", "platform_artists", "platform_collections")
+_TABLE_KINDS = {
+    "platform_tracks": "track",
+    "platform_artists": "artist",
+    "platform_collections": "collection",
+}
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError("zstd payloads require the 'zstandard' package.") from exc
+    return zstandard
+
+
+def _codec_from_env() -> str:
+    name = os.getenv("LEDGER_PAYLOAD_CODEC", DEFAULT_CODEC).strip().lower()
+    if name not in CODECS:
+        raise ValueError(f"Unknown payload codec: {name}")
+    return name
+
+
+def _prune_path(obj: Any, parts: list[str]) -> Any:
+    if isinstance(obj, list):
+        return [_prune_path(item, parts) for item in obj]
+    if not isinstance(obj, dict) or parts[0] not in obj:
+        return obj
+    head, rest = parts[0], parts[1:]
+    pruned = dict(obj)
+    if rest:
+        pruned[head] = _prune_path(obj[head], rest)
+    else:
+        del pruned[head]
+    return pruned
+
+
+def prune_payload(platform: str, kind: str, obj: Any) -> Any:
+    """A copy of `obj` without the fields PRUNE_RULES drops for this platform and kind."""
+    for path in PRUNE_RULES.get((platform, kind), ()):
+        obj = _prune_path(obj, path.split("."))
+    return obj
+
+
+def compress_json(text: str, *, codec: Optional[str] = None) -> bytes:
+    """Compress serialised JSON, falling back to identity when that is smaller."""
+    raw = text.encode("utf-8")
+    name = codec or _codec_from_env()
+    if name == "zlib":
+        packed = bytes([_CODEC_ZLIB]) + zlib.compress(raw, _ZLIB_LEVEL)
+    elif name == "zstd":
+        packed = bytes([_CODEC_ZSTD]) + _zstd().ZstdCompressor(level=_ZSTD_LEVEL).compress(raw)
+    elif name == "none":
+        packed = b""
+    else:
+        raise ValueError(f"Unknown payload codec: {name}")
+
+    if not packed or len(packed) >= len(raw) + 1:
+        return bytes([_CODEC_IDENTITY]) + raw
+    return packed
+
+
+def serialize_payload(platform: str, kind: str, obj: Optional[Any]) -> Optional[str]:
+    """The pruned, compact JSON that encode_payload compresses (None stays None)."""
+    if obj is None:
+        return None
+    return json.dumps(prune_payload(platform, kind, obj), ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_payload(
+    platform: str,
+    kind: str,
+    obj: Optional[Any],
+    *,
+    codec: Optional[str] = None,
+) -> Optional[bytes]:
+    """Prune, serialise and compress a platform object for raw_payload (None stays None)."""
+    text = serialize_payload(platform, kind, obj)
+    if text is None:
+        return None
+    return compress_json(text, codec=codec)
+
+
+def decode_payload(blob: Optional[bytes]) -> Any:
+    """Inverse of encode_payload; raises ValueError on a corrupt or unknown blob."""
+    if blob is None:
+        return None
+    blob = bytes(blob)
+    if not blob:
+        raise ValueError("Empty payload")
+    codec, body = blob[0], blob[1:]
+    if codec == _CODEC_IDENTITY:
+        raw = body
+    elif codec == _CODEC_ZLIB:
+        try:
+            raw = zlib.decompress(body)
+        except zlib.error as exc:
+            raise ValueError(f"Corrupt zlib payload: {exc}") from exc
+    elif codec == _CODEC_ZSTD:
+        raw = _zstd().ZstdDecompressor().decompress(body)
+    else:
+        raise ValueError(f"Unknown payload codec byte: {codec}")
+    return json.loads(raw.decode("utf-8"))
+
+
+class Payload:
+    """
+    A stored platform object, decoded on first access.
+
+    Built from raw_payload, or from legacy raw_json text for rows the migration
+    hasn't rewritten yet. `value` raises ValueError if the stored bytes are corrupt.
+    """
+
+    __slots__ = ("_blob", "_text", "_value", "_decoded")
+
+    def __init__(self, blob: Optional[bytes] = None, text: Optional[str] = None) -> None:
+        self._blob = blob
+        self._text = text
+        self._value: Any = None
+        self._decoded = False
+
+    def __bool__(self) -> bool:
+        return bool(self._blob) or bool(self._text)
+
+    @property
+    def value(self) -> Any:
+        if not self._decoded:
+            if self._blob is not None:
+                self._value = decode_payload(self._blob)
+            elif self._text:
+                self._value = json.loads(self._text)
+            self._decoded = True
+        return self._value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.value
+        return value.get(key, default) if isinstance(value, dict) else default
+
+
+def payload_from_row(row: sqlite3.Row) -> Payload:
+    """The payload of a platform_* row, preferring raw_payload over legacy raw_json."""
+    keys = row.keys()
+    blob = row["raw_payload"] if "raw_payload" in keys else None
+    text = row["raw_json"] if "raw_json" in keys else None
+    return Payload(blob, None if blob is not None else text)
+
+
+def migrate_payloads(
+    conn: sqlite3.Connection,
+    *,
+    table: str,
+    batch_size: int = 500,
+    codec: Optional[str] = None,
+) -> tuple[int, int, int]:
+    """
+    Move legacy raw_json text into raw_payload for one platform_* table, a batch
+    per transaction, so the migration can be interrupted and resumed.
+    Rows whose raw_json isn't valid JSON are left as they are.
+    Returns (rows_rewritten, bytes_before, bytes_after).
+    """
+    if table not in _TABLE_KINDS:
+        raise ValueError(f"Not a payload table: {table}")
+    if batch_size <= 0:
+        raise ValueError("batch_size must be > 0")
+
+    kind = _TABLE_KINDS[table]
+    rewritten = bytes_before = bytes_after = 0
+    after_rowid = 0
+
+    while True:
+        rows = conn.execute(
+            f"""
+            SELECT rowid, platform, raw_json
+            FROM {table}
+            WHERE raw_json IS NOT NULL AND rowid > ?
+            ORDER BY rowid
+            LIMIT ?;
+            """,
+            (after_rowid, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        after_rowid = rows[-1]["rowid"]
+
+        updates: list[tuple[bytes, int]] = []
+        for row in rows:
+            try:
+                obj = json.loads(row["raw_json"])
+            except json.JSONDecodeError:
+                continue
+            blob = encode_payload(row["platform"], kind, obj, codec=codec)
+            updates.append((blob, row["rowid"]))
+            bytes_before += len(row["raw_json"].encode("utf-8"))
+            bytes_after += len(blob)
+
+        with conn:
+            conn.executemany(
+                f"UPDATE {table} SET raw_payload = ?, raw_json = NULL WHERE rowid = ?;",
+                updates,
+            )
+        rewritten += len(updates)
+
+    return rewritten, bytes_before, bytes_after
+
+
+def main() -> None:
+    from music_library_ledger.db.connection import get_connection
+    from music_library_ledger.db.schema import apply_schema
+
+    parser = argparse.ArgumentParser(description="Compress legacy raw_json payloads into raw_payload.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows rewritten per transaction.")
+    parser.add_argument("--codec", choices=sorted(CODECS), help="Override LEDGER_PAYLOAD_CODEC.")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to return the freed pages.")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    try:
+        apply_schema(conn)
+        for table in PAYLOAD_TABLES:
+            rows, before, after = migrate_payloads(conn, table=table, batch_size=args.batch_size, codec=args.codec)
+            print(f"{table}: rewrote {rows} rows, {before} -> {after} bytes")
+        if args.vacuum:
+            conn.execute("VACUUM;")
+    finally:
+        conn.close()
+    print("Done: payloads migrated.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,123 @@
-import json
 import sqlite3
 from typing import Any, Optional
 
+from music_library_ledger.db.content_hash import content_hash
+from music_library_ledger.db.payloads import compress_json, serialize_payload
 
-def _to_json(raw: Optional[dict[str, Any]]) -> Optional[str]:
-    if raw is None:
-        return None
-    return json.dumps(raw, ensure_ascii=False, separators=(",", ":"))
+# Shared with the set-based writers in db/bulk.py (executemany). Every upsert
+# carries a content_hash of what it writes and leaves the payload columns alone
+# when the stored hash matches, so a re-ingest of unchanged data rewrites nothing.
+# last_verified_at still moves for those rows, at most once a day:
+# _PLATFORM_TRACK_VERIFY_SQL stamps the rows the upsert is about to skip.
+_PLATFORM_TRACK_UPSERT_SQL = """
+INSERT INTO platform_tracks (
+    platform,
+    platform_track_id,
+    track_uid,
+    match_confidence,
+    match_method,
+    raw_payload,
+    created_at,
+    last_verified_at,
+    song_url,
+    content_hash,
+    updated_at
+)
+VALUES (?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'), ?, ?, datetime('now'))
+ON CONFLICT(platform, platform_track_id) DO UPDATE SET
+    track_uid = excluded.track_uid,
+    match_confidence = COALESCE(excluded.match_confidence, platform_tracks.match_confidence),
+    match_method = COALESCE(excluded.match_method, platform_tracks.match_method),
+    raw_payload = COALESCE(excluded.raw_payload, platform_tracks.raw_payload),
+    raw_json = CASE WHEN excluded.raw_payload IS NULL THEN platform_tracks.raw_json END,
+    song_url = COALESCE(excluded.song_url, platform_tracks.song_url),
+    content_hash = excluded.content_hash,
+    last_verified_at = datetime('now'),
+    updated_at = datetime('now')
+WHERE platform_tracks.content_hash IS NOT excluded.content_hash;
+"""
+
+# Params: (platform, platform_track_id, content_hash). Stamps a mapping whose
+# stored hash matches, i.e. one the upsert skips (or skipped), unless it was
+# verified within the last day: re-ingesting unchanged pages more often than
+# that writes no platform_tracks rows at all.
+_PLATFORM_TRACK_VERIFY_SQL = """
+UPDATE platform_tracks
+SET last_verified_at = datetime('now')
+WHERE platform = ? AND platform_track_id = ? AND content_hash IS ?
+    AND (last_verified_at IS NULL OR last_verified_at < datetime('now', '-1 day'));
+"""
+
+# Params: (platform, platform_collection_id).
+_PLATFORM_COLLECTION_VERIFIED_SQL = """
+UPDATE platform_collections
+SET last_verified_at = datetime('now')
+WHERE platform = ? AND platform_collection_id = ?;
+"""
+
+_PLATFORM_COLLECTION_UNVERIFIED_SQL = """
+UPDATE platform_collections
+SET last_verified_at = NULL
+WHERE platform = ? AND platform_collection_id = ?;
+"""
+
+_PLATFORM_ARTIST_UPSERT_SQL = """
+INSERT INTO platform_artists (
+    platform,
+    platform_artist_id,
+    artist_uid,
+    raw_payload,
+    content_hash,
+    created_at
+)
+VALUES (?, ?, ?, ?, ?, datetime('now'))
+ON CONFLICT(platform, platform_artist_id) DO UPDATE SET
+    artist_uid = excluded.artist_uid,
+    raw_payload = COALESCE(excluded.raw_payload, platform_artists.raw_payload),
+    raw_json = CASE WHEN excluded.raw_payload IS NULL THEN platform_artists.raw_json END,
+    content_hash = excluded.content_hash
+WHERE platform_artists.content_hash IS NOT excluded.content_hash;
+"""
+
+
+def _platform_track_params(
+    platform: str,
+    platform_track_id: str,
+    track_uid: str,
+    match_confidence: Optional[float],
+    match_method: Optional[str],
+    raw_json: Optional[dict[str, Any]],
+    song_url: Optional[str],
+) -> tuple[Any, ...]:
+    """Parameters for _PLATFORM_TRACK_UPSERT_SQL."""
+    text = serialize_payload(platform, "track", raw_json)
+    return (
+        platform,
+        platform_track_id,
+        track_uid,
+        match_confidence,
+        match_method,
+        compress_json(text) if text is not None else None,
+        song_url,
+        content_hash(track_uid, match_confidence, match_method, song_url, text),
+    )
+
+
+def _platform_artist_params(
+    platform: str,
+    platform_artist_id: str,
+    artist_uid: str,
+    raw_json: Optional[dict[str, Any]],
+) -> tuple[Any, ...]:
+    """Parameters for _PLATFORM_ARTIST_UPSERT_SQL."""
+    text = serialize_payload(platform, "artist", raw_json)
+    return (
+        platform,
+        platform_artist_id,
+        artist_uid,
+        compress_json(text) if text is not None else None,
+        content_hash(artist_uid, text),
+    )
 
 
 def upsert_platform_track(
@@ -19,41 +130,25 @@ def upsert_platform_track(
     raw_json: Optional[dict[str, Any]] = None,
     match_confidence: Optional[float] = None,
     match_method: Optional[str] = None,
-) -> None:
-    conn.execute(
-        """
-        INSERT INTO platform_tracks (
-            platform,
-            platform_track_id,
-            track_uid,
-            match_confidence,
-            match_method,
-            raw_json,
-            created_at,
-            last_verified_at,
-            song_url,
-            updated_at
-        )
-        VALUES (?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'), ?, datetime('now'))
-        ON CONFLICT(platform, platform_track_id) DO UPDATE SET
-            track_uid = excluded.track_uid,
-            match_confidence = COALESCE(excluded.match_confidence, platform_tracks.match_confidence),
-            match_method = COALESCE(excluded.match_method, platform_tracks.match_method),
-            raw_json = COALESCE(excluded.raw_json, platform_tracks.raw_json),
-            song_url = COALESCE(excluded.song_url, platform_tracks.song_url),
-            last_verified_at = datetime('now'),
-            updated_at = datetime('now');
-        """,
-        (
-            platform,
-            platform_track_id,
-            track_uid,
-            match_confidence,
-            match_method,
-            _to_json(raw_json),
-            song_url,
-        ),
+) -> bool:
+    """
+    Returns False when the stored mapping already matched and at most
+    last_verified_at was stamped.
+    """
+    params = _platform_track_params(
+        platform,
+        platform_track_id,
+        track_uid,
+        match_confidence,
+        match_method,
+        raw_json,
+        song_url,
     )
+    cur = conn.execute(_PLATFORM_TRACK_UPSERT_SQL, params)
+    if cur.rowcount > 0:
+        return True
+    conn.execute(_PLATFORM_TRACK_VERIFY_SQL, (platform, platform_track_id, params[-1]))
+    return False
 
 
 def attach_artist_to_track(
@@ -106,24 +201,13 @@ def upsert_platform_artist(
     platform_artist_id: str,
     artist_uid: str,
     raw_json: Optional[dict[str, Any]] = None,
-) -> None:
+) -> bool:
     # Matches your platform_artists DDL: no url, no updated_at
-    conn.execute(
-        """
-        INSERT INTO platform_artists (
-            platform,
-            platform_artist_id,
-            artist_uid,
-            raw_json,
-            created_at
-        )
-        VALUES (?, ?, ?, ?, datetime('now'))
-        ON CONFLICT(platform, platform_artist_id) DO UPDATE SET
-            artist_uid = excluded.artist_uid,
-            raw_json = COALESCE(excluded.raw_json, platform_artists.raw_json);
-        """,
-        (platform, platform_artist_id, artist_uid, _to_json(raw_json)),
+    cur = conn.execute(
+        _PLATFORM_ARTIST_UPSERT_SQL,
+        _platform_artist_params(platform, platform_artist_id, artist_uid, raw_json),
     )
+    return cur.rowcount > 0
 
 
 def upsert_platform_collection(
@@ -134,32 +218,168 @@ def upsert_platform_collection(
     collection_uid: str,
     playlist_url: Optional[str] = None,
     raw_json: Optional[dict[str, Any]] = None,
-) -> None:
-    conn.execute(
+) -> bool:
+    """
+    Returns False when the stored mapping already matched and only
+    last_verified_at was stamped.
+    """
+    text = serialize_payload(platform, "collection", raw_json)
+    row_hash = content_hash(collection_uid, playlist_url, text)
+    cur = conn.execute(
         """
         INSERT INTO platform_collections (
             platform,
             platform_collection_id,
             collection_uid,
-            raw_json,
+            raw_payload,
             created_at,
             last_verified_at,
             playlist_url,
+            content_hash,
             updated_at
         )
-        VALUES (?, ?, ?, ?, datetime('now'), datetime('now'), ?, datetime('now'))
+        VALUES (?, ?, ?, ?, datetime('now'), datetime('now'), ?, ?, datetime('now'))
         ON CONFLICT(platform, platform_collection_id) DO UPDATE SET
             collection_uid = excluded.collection_uid,
-            raw_json = COALESCE(excluded.raw_json, platform_collections.raw_json),
+            raw_payload = COALESCE(excluded.raw_payload, platform_collections.raw_payload),
+            raw_json = CASE WHEN excluded.raw_payload IS NULL THEN platform_collections.raw_json END,
             playlist_url = COALESCE(excluded.playlist_url, platform_collections.playlist_url),
+            content_hash = excluded.content_hash,
             last_verified_at = datetime('now'),
-            updated_at = datetime('now');
+            updated_at = datetime('now')
+        WHERE platform_collections.content_hash IS NOT excluded.content_hash;
         """,
         (
             platform,
             platform_collection_id,
             collection_uid,
-            _to_json(raw_json),
+            compress_json(text) if text is not None else None,
             playlist_url,
+            row_hash,
         ),
     )
+    if cur.rowcount > 0:
+        return True
+    conn.execute(
+        """
+        UPDATE platform_collections
+        SET last_verified_at = datetime('now')
+        WHERE platform = ? AND platform_collection_id = ? AND content_hash IS ?;
+        """,
+        (platform, platform_collection_id, row_hash),
+    )
+    return False
+
+
+def set_platform_collection_verified(
+    conn: sqlite3.Connection,
+    *,
+    platform: str,
+    platform_collection_id: str,
+    verified: bool = True,
+) -> None:
+    """
+    Stamp last_verified_at (the stored payload matches the platform as of now),
+    or clear it so the next reader re-checks the platform.
+    """
+    conn.execute(
+        _PLATFORM_COLLECTION_VERIFIED_SQL if verified else _PLATFORM_COLLECTION_UNVERIFIED_SQL,
+        (platform, platform_collection_id),
+    )
+
+
+def get_platform_collection(
+    conn: sqlite3.Connection,
+    *,
+    platform: str,
+    platform_collection_id: str,
+) -> Optional[sqlite3.Row]:
+    return conn.execute(
+        """
+        SELECT *
+        FROM platform_collections
+        WHERE platform = ? AND platform_collection_id = ?;
+        """,
+        (platform, platform_collection_id),
+    ).fetchone()
+
+
+def record_match_failure(
+    conn: sqlite3.Connection,
+    *,
+    platform: str,
+    track_uid: str,
+    best_score: Optional[float] = None,
+    base_delay_hours: float = 24.0,
+    max_delay_hours: float = 24.0 * 30,
+) -> int:
+    """
+    Record a failed match attempt and push next_retry_at out exponentially:
+    base_delay_hours * 2^(attempts - 1), capped at max_delay_hours.
+    Returns the attempt count.
+    """
+    row = conn.execute(
+        """
+        SELECT attempts
+        FROM platform_match_attempts
+        WHERE track_uid = ? AND platform = ?;
+        """,
+        (track_uid, platform),
+    ).fetchone()
+    attempts = (row[0] if row else 0) + 1
+    delay_hours = min(base_delay_hours * (2 ** (attempts - 1)), max_delay_hours)
+
+    conn.execute(
+        """
+        INSERT INTO platform_match_attempts (
+            track_uid,
+            platform,
+            attempts,
+            best_score,
+            last_tried_at,
+            next_retry_at
+        )
+        VALUES (?, ?, ?, ?, datetime('now'), datetime('now', ?))
+        ON CONFLICT(track_uid, platform) DO UPDATE SET
+            attempts = excluded.attempts,
+            best_score = MAX(COALESCE(excluded.best_score, platform_match_attempts.best_score),
+                             COALESCE(platform_match_attempts.best_score, excluded.best_score)),
+            last_tried_at = excluded.last_tried_at,
+            next_retry_at = excluded.next_retry_at;
+        """,
+        (track_uid, platform, attempts, best_score, f"+{int(delay_hours * 3600)} seconds"),
+    )
+    return attempts
+
+
+def has_match_failure(
+    conn: sqlite3.Connection,
+    *,
+    platform: str,
+    track_uid: str,
+) -> bool:
+    """Whether a failed match attempt is recorded for the track on `platform`."""
+    row = conn.execute(
+        """
+        SELECT 1
+        FROM platform_match_attempts
+        WHERE track_uid = ? AND platform = ?;
+        """,
+        (track_uid, platform),
+    ).fetchone()
+    return row is not None
+
+
+def clear_match_failures(
+    conn: sqlite3.Connection,
+    *,
+    platform: str,
+    track_uid: str,
+) -> None:
+    conn.execute(
+        """
+        DELETE FROM platform_match_attempts
+        WHERE track_uid = ? AND platform = ?;
+        """,
+        (track_uid, platform),
+    )
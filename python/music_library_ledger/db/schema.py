@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from importlib.resources import files
+from typing import TYPE_CHECKING, Optional
+
+from music_library_ledger.db.search import rebuild_search_index
+
+if TYPE_CHECKING:
+    from importlib.resources.abc import Traversable
+
+# The numbered DDL files ship inside the package (music_library_ledger/sql/);
+# sql/schema.sql at the repository root reads the same files for the sqlite3 CLI.
+SQL_DIR: Traversable = files("music_library_ledger") / "sql"
+
+_SQL_FILE_RE = re.compile(r"^\d{2}_.+\.sql$")
+
+# Columns added to a table after it first shipped. CREATE TABLE IF NOT EXISTS
+# leaves existing tables alone, so apply_schema adds these where they're missing.
+ADDED_COLUMNS: tuple[tuple[str, str, str], ...] = (
+    ("platform_tracks", "raw_payload", "BLOB"),
+    ("platform_artists", "raw_payload", "BLOB"),
+    ("platform_collections", "raw_payload", "BLOB"),
+    ("tracks", "content_hash", "TEXT"),
+    ("platform_tracks", "content_hash", "TEXT"),
+    ("platform_artists", "content_hash", "TEXT"),
+    ("platform_collections", "content_hash", "TEXT"),
+)
+
+
+# Triggers whose body has changed, each with a fragment only the current body
+# holds. CREATE TRIGGER IF NOT EXISTS keeps an older body, so apply_schema drops
+# those first and re-indexes what they wrote.
+REPLACED_TRIGGERS: tuple[tuple[str, str], ...] = (
+    ("trg_tracks_search_insert", "WITH RECURSIVE credits"),
+    ("trg_track_artists_search_insert", "WITH RECURSIVE credits"),
+    ("trg_track_artists_search_update", "WITH RECURSIVE credits"),
+    ("trg_track_artists_search_delete", "WITH RECURSIVE credits"),
+    ("trg_artists_search_update", "WITH RECURSIVE credits"),
+)
+
+
+def schema_files(sql_dir: Optional[Traversable] = None) -> list[Traversable]:
+    """The numbered DDL files, in the order sql/schema.sql reads them."""
+    directory = sql_dir or SQL_DIR
+    return sorted((p for p in directory.iterdir() if _SQL_FILE_RE.match(p.name)), key=lambda p: p.name)
+
+
+def apply_schema(conn: sqlite3.Connection, *, sql_dir: Optional[Traversable] = None) -> None:
+    """
+    Bring an existing database up to the current schema.
+    Every DDL file is idempotent (IF NOT EXISTS), so this is safe to run on each start.
+    """
+    replaced = _drop_replaced_triggers(conn)
+    for path in schema_files(sql_dir):
+        conn.executescript(path.read_text(encoding="utf-8"))
+    _add_missing_columns(conn)
+    _normalize_added_at(conn)
+    _populate_search_index(conn, rebuild=replaced)
+
+
+def _drop_replaced_triggers(conn: sqlite3.Connection) -> bool:
+    dropped = False
+    with conn:
+        for name, fragment in REPLACED_TRIGGERS:
+            row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?;", (name,)).fetchone()
+            if row is not None and fragment not in row[0]:
+                conn.execute(f"DROP TRIGGER {name};")
+                dropped = True
+    return dropped
+
+
+def _add_missing_columns(conn: sqlite3.Connection) -> None:
+    for table, column, decl in ADDED_COLUMNS:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table});")}
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl};")
+    if conn.in_transaction:
+        conn.commit()
+
+
+def _normalize_added_at(conn: sqlite3.Connection) -> None:
+    # Items used to default to datetime('now') ('YYYY-MM-DD HH:MM:SS') next to
+    # Spotify's 'YYYY-MM-DDTHH:MM:SSZ'; rewrite those so added_at compares as text.
+    with conn:
+        conn.execute(
+            """
+            UPDATE collection_items
+            SET added_at = strftime('%Y-%m-%dT%H:%M:%SZ', added_at)
+            WHERE added_at NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]T[0-9][0-9]:[0-9][0-9]:[0-9][0-9]Z'
+                AND strftime('%Y-%m-%dT%H:%M:%SZ', added_at) IS NOT NULL;
+            """
+        )
+
+
+def _populate_search_index(conn: sqlite3.Connection, *, rebuild: bool = False) -> None:
+    # The search tables are created empty on a database that predates them, and
+    # the triggers only index rows written afterwards; fill them once here.
+    # `rebuild` re-indexes rows that replaced triggers wrote.
+    indexed = conn.execute("SELECT 1 FROM track_search_docs LIMIT 1;").fetchone()
+    if (rebuild or indexed is None) and conn.execute("SELECT 1 FROM tracks LIMIT 1;").fetchone() is not None:
+        with conn:
+            rebuild_search_index(conn)
+
+
+def main() -> None:
+    from music_library_ledger.db.connection import get_connection
+
+    conn = get_connection()
+    apply_schema(conn)
+    print("Done: schema applied.")
+
+
+if __name__ == "__main__":
+    main()
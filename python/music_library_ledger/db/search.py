@@ -0,0 +1,267 @@
+"""
+Ranked full-text search over the ledger, backed by the FTS5 tables in
+music_library_ledger/sql/60_search.sql (kept in sync with tracks, artists and
+track_artists by triggers).
+
+    python -m music_library_ledger.db.search "frank ocean nights"
+    python -m music_library_ledger.db.search --kind albums blonde
+    python -m music_library_ledger.db.search --rebuild
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import Optional
+
+from music_library_ledger.db.tracks import _ARTIST_NAME_SEP, _ARTIST_NAMES_SQL, _artist_names
+
+# bm25 column weights for track_search(title, artists, album).
+_TRACK_WEIGHTS = (10.0, 5.0, 2.0)
+
+TRACK_FIELDS = ("title", "artists", "album")
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class TrackHit:
+    track_uid: str
+    title: str
+    artists: tuple[str, ...]
+    album: Optional[str]
+    score: float                             # higher is better
+
+
+@dataclass(frozen=True)
+class ArtistHit:
+    artist_uid: str
+    name: str
+    score: float
+
+
+@dataclass(frozen=True)
+class AlbumHit:
+    album: str
+    artists: tuple[str, ...]                 # credited on the album's best-matching track
+    track_count: int
+    score: float
+
+
+def match_expression(query: str, *, field: Optional[str] = None) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression: every word must match, and the
+    last one also matches as a prefix so partially typed queries find results.
+    FTS5 operators in the input are treated as plain words.
+    Returns None when the query has no searchable words.
+    """
+    terms = _TERM_RE.findall(query)
+    if not terms:
+        return None
+    phrases = [f'"{t}"' for t in terms]
+    phrases[-1] += "*"
+    expr = " ".join(phrases)
+    if field is not None:
+        if field not in TRACK_FIELDS:
+            raise ValueError(f"Unknown search field: {field}")
+        expr = f"{field} : ({expr})"
+    return expr
+
+
+def _split_artists(names: Optional[str]) -> tuple[str, ...]:
+    return tuple(names.split(_ARTIST_NAME_SEP)) if names else ()
+
+
+def search_tracks(
+    conn: sqlite3.Connection,
+    query: str,
+    *,
+    field: Optional[str] = None,
+    limit: int = 20,
+) -> list[TrackHit]:
+    """Best-matching tracks for `query`, optionally restricted to one of TRACK_FIELDS."""
+    if limit <= 0:
+        raise ValueError("limit must be > 0")
+    expr = match_expression(query, field=field)
+    if expr is None:
+        return []
+
+    rows = conn.execute(
+        f"""
+        SELECT d.track_uid, s.title, s.artists, s.album,
+               bm25(track_search, {", ".join(str(w) for w in _TRACK_WEIGHTS)}) AS weighted_rank
+        FROM track_search s
+        JOIN track_search_docs d ON d.docid = s.rowid
+        WHERE track_search MATCH ?
+        ORDER BY weighted_rank
+        LIMIT ?;
+        """,
+        (expr, limit),
+    ).fetchall()
+    return [
+        TrackHit(
+            track_uid=r["track_uid"],
+            title=r["title"],
+            artists=_split_artists(r["artists"]),
+            album=r["album"],
+            score=-r["weighted_rank"],
+        )
+        for r in rows
+    ]
+
+
+def search_artists(conn: sqlite3.Connection, query: str, *, limit: int = 20) -> list[ArtistHit]:
+    """Best-matching artists by name."""
+    if limit <= 0:
+        raise ValueError("limit must be > 0")
+    expr = match_expression(query)
+    if expr is None:
+        return []
+
+    rows = conn.execute(
+        """
+        SELECT d.artist_uid, s.name, s.rank
+        FROM artist_search s
+        JOIN artist_search_docs d ON d.docid = s.rowid
+        WHERE artist_search MATCH ?
+        ORDER BY s.rank
+        LIMIT ?;
+        """,
+        (expr, limit),
+    ).fetchall()
+    return [ArtistHit(artist_uid=r["artist_uid"], name=r["name"], score=-r["rank"]) for r in rows]
+
+
+def search_albums(conn: sqlite3.Connection, query: str, *, limit: int = 20) -> list[AlbumHit]:
+    """
+    Albums whose name matches `query`, ranked by their best-matching track.
+    Tracks are grouped by album name and primary (first credited) artist, so
+    albums of the same name by different artists are separate hits.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be > 0")
+    expr = match_expression(query, field="album")
+    if expr is None:
+        return []
+
+    # bm25() can't be used inside an aggregate, so the tracks are scored in a
+    # materialized CTE first. SQLite returns the bare `artists` of the row that
+    # produced MIN(weighted_rank).
+    rows = conn.execute(
+        f"""
+        WITH hits AS MATERIALIZED (
+            SELECT s.album, s.artists,
+                   substr(s.artists, 1, instr(s.artists || char(31), char(31)) - 1) AS primary_artist,
+                   bm25(track_search, {", ".join(str(w) for w in _TRACK_WEIGHTS)}) AS weighted_rank
+            FROM track_search s
+            WHERE track_search MATCH ?
+        )
+        SELECT album, artists, COUNT(*) AS track_count, MIN(weighted_rank) AS weighted_rank
+        FROM hits
+        GROUP BY album, primary_artist
+        ORDER BY weighted_rank
+        LIMIT ?;
+        """,
+        (expr, limit),
+    ).fetchall()
+    return [
+        AlbumHit(
+            album=r["album"],
+            artists=_split_artists(r["artists"]),
+            track_count=r["track_count"],
+            score=-r["weighted_rank"],
+        )
+        for r in rows
+    ]
+
+
+def rebuild_search_index(conn: sqlite3.Connection) -> tuple[int, int]:
+    """
+    Repopulate track_search and artist_search from scratch, e.g. for a database
+    created before the search tables existed. Does not commit.
+    Returns (tracks_indexed, artists_indexed).
+    """
+    conn.execute("DELETE FROM track_search;")
+    conn.execute("DELETE FROM track_search_docs;")
+    conn.execute("INSERT INTO track_search_docs (track_uid) SELECT track_uid FROM tracks;")
+    # _artist_names puts the credits in artist_order, as the triggers in
+    # sql/60_search.sql do (SQLite before 3.44 can't order group_concat), so the
+    # rows pass through Python on their way in.
+    docs = conn.execute(
+        f"""
+        SELECT d.docid, t.title, ({_ARTIST_NAMES_SQL}) AS artist_names, t.album
+        FROM track_search_docs d
+        JOIN tracks t ON t.track_uid = d.track_uid;
+        """
+    )
+    tracks = conn.executemany(
+        "INSERT INTO track_search (rowid, title, artists, album) VALUES (?, ?, ?, ?);",
+        (
+            (docid, title, _ARTIST_NAME_SEP.join(_artist_names(names)) or None, album)
+            for docid, title, names, album in docs
+        ),
+    ).rowcount
+
+    conn.execute("DELETE FROM artist_search;")
+    conn.execute("DELETE FROM artist_search_docs;")
+    conn.execute("INSERT INTO artist_search_docs (artist_uid) SELECT artist_uid FROM artists;")
+    artists = conn.execute(
+        """
+        INSERT INTO artist_search (rowid, name)
+        SELECT d.docid, a.name
+        FROM artist_search_docs d
+        JOIN artists a ON a.artist_uid = d.artist_uid;
+        """
+    ).rowcount
+
+    # Merge the b-trees written above into one segment per index.
+    conn.execute("INSERT INTO track_search (track_search) VALUES ('optimize');")
+    conn.execute("INSERT INTO artist_search (artist_search) VALUES ('optimize');")
+    return tracks, artists
+
+
+def main() -> None:
+    from music_library_ledger.db.connection import get_connection
+    from music_library_ledger.db.schema import apply_schema
+
+    parser = argparse.ArgumentParser(description="Search the ledger, or rebuild its search index.")
+    parser.add_argument("query", nargs="*", help="Words to search for.")
+    parser.add_argument("--kind", choices=("tracks", "artists", "albums"), default="tracks")
+    parser.add_argument("--field", choices=TRACK_FIELDS, help="Only match this track field.")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the search index from the ledger tables.")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        conn = get_connection()
+        try:
+            apply_schema(conn)
+            with conn:
+                tracks, artists = rebuild_search_index(conn)
+        finally:
+            conn.close()
+        print(f"Done: indexed {tracks} tracks and {artists} artists.")
+        return
+
+    query = " ".join(args.query)
+    if not query:
+        parser.error("a query is required unless --rebuild is given")
+
+    conn = get_connection("query")
+    try:
+        if args.kind == "artists":
+            for a in search_artists(conn, query, limit=args.limit):
+                print(f"{a.score:6.2f}  {a.name}")
+        elif args.kind == "albums":
+            for al in search_albums(conn, query, limit=args.limit):
+                print(f"{al.score:6.2f}  {al.album} — {', '.join(al.artists)} ({al.track_count} tracks)")
+        else:
+            for t in search_tracks(conn, query, field=args.field, limit=args.limit):
+                print(f"{t.score:6.2f}  {t.title} — {', '.join(t.artists)} [{t.album or ''}]  {t.track_uid}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Optional SQL instrumentation for ledger connections.
+
+Set LEDGER_SQL_TRACE=1 and get_connection returns a TracedConnection, whose
+cursors report every statement to the process-wide SqlTracer:
+
+  - statement counts per calling function (module.qualname of the caller)
+  - a latency histogram per statement shape (the SQL with literals and IN /
+    VALUES lists collapsed), covering execute and the fetches that follow it
+  - a warning with EXPLAIN QUERY PLAN for statements slower than
+    LEDGER_SQL_SLOW_MS (default 100), once per shape; for a statement whose
+    cursor is only finished by garbage collection, the plan is logged when
+    its connection is closed
+  - a summary on stderr at exit, and as JSON to LEDGER_SQL_TRACE_OUT if set
+
+With tracing off, get_connection returns a plain LedgerConnection: nothing
+here is on the query path.
+"""
+from __future__ import annotations
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional, TextIO
+
+from music_library_ledger.db.connection import LedgerConnection
+
+LOGGER = logging.getLogger(__name__)
+
+# Upper bounds in ms; the last bucket is everything slower.
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+
+DEFAULT_SLOW_MS = 100.0
+
+_SUMMARY_TOP = 15
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![?:$@\w])\d+(?:\.\d+)?\b")
+_PARAM_LIST_RE = re.compile(r"\?\d*(?:\s*,\s*\?\d*)+")
+_VALUES_LIST_RE = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+_SPACE_RE = re.compile(r"\s+")
+
+_MAX_LOGGED_SQL = 500
+
+# Passed as the params of statements that can't be explained (scripts).
+_NO_PLAN = object()
+
+_THIS_FILE = __file__
+# Generic query helpers; statements are attributed to whoever called them.
+_SKIP_MODULES = frozenset({"sqlite3", "sqlite3.dbapi2", "music_library_ledger.db.paging"})
+
+
+def tracing_enabled() -> bool:
+    return os.getenv("LEDGER_SQL_TRACE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def statement_shape(sql: str) -> str:
+    """`sql` with literals replaced by ? and repeated ?/VALUES lists collapsed."""
+    shape = _STRING_RE.sub("?", sql)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _SPACE_RE.sub(" ", shape).strip().rstrip(";").strip()
+    shape = _PARAM_LIST_RE.sub("?, ...", shape)
+    return _VALUES_LIST_RE.sub(r"\1, ...", shape)
+
+
+def _caller() -> str:
+    """module.qualname of the first frame outside this module and the query helpers."""
+    frame = sys._getframe(2)
+    while frame is not None and (
+        frame.f_code.co_filename == _THIS_FILE or frame.f_globals.get("__name__") in _SKIP_MODULES
+    ):
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    code = frame.f_code
+    # co_qualname (Python 3.11+) names the class too; older versions only have co_name.
+    return f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+@dataclass
+class ShapeStats:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(HISTOGRAM_BOUNDS_MS) + 1))
+    explained: bool = False
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+
+class SqlTracer:
+    """Statement counts and latencies, shared by every traced connection in the process."""
+
+    def __init__(self, *, slow_ms: float = DEFAULT_SLOW_MS) -> None:
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self.shapes: dict[str, ShapeStats] = {}
+        self.callers: Counter[str] = Counter()
+
+    def record(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        params: Any,
+        caller: str,
+        elapsed_s: float,
+        *,
+        defer_plan: bool = False,
+    ) -> None:
+        """
+        Count one statement. With defer_plan, a query plan that is due is left
+        on the TracedConnection for close() instead of being queried now.
+        """
+        ms = elapsed_s * 1000
+        shape = statement_shape(sql)
+        with self._lock:
+            stats = self.shapes.setdefault(shape, ShapeStats())
+            stats.add(ms)
+            self.callers[caller] += 1
+            explain = ms >= self.slow_ms and not stats.explained and params is not _NO_PLAN
+            if explain:
+                stats.explained = True
+        if ms >= self.slow_ms:
+            LOGGER.warning("Slow SQL (%.1f ms) from %s: %s", ms, caller, shape[:_MAX_LOGGED_SQL])
+            if explain and defer_plan and isinstance(conn, TracedConnection):
+                conn._pending_plans.append((sql, params))
+            elif explain:
+                LOGGER.warning("Query plan:\n%s", self._query_plan(conn, sql, params))
+
+    @staticmethod
+    def _query_plan(conn: sqlite3.Connection, sql: str, params: Any) -> str:
+        try:
+            rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+        except sqlite3.Error as exc:
+            return f"  (unavailable: {exc})"
+        return "\n".join(f"  {r[0]:>3} {r[1]:>3}  {r[3]}" for r in rows) or "  (no plan)"
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            shapes = sorted(self.shapes.items(), key=lambda kv: kv[1].total_ms, reverse=True)
+            return {
+                "histogram_bounds_ms": list(HISTOGRAM_BOUNDS_MS),
+                "statements": sum(s.count for _, s in shapes),
+                "callers": dict(self.callers.most_common()),
+                "shapes": [
+                    {
+                        "sql": shape,
+                        "count": s.count,
+                        "total_ms": round(s.total_ms, 3),
+                        "max_ms": round(s.max_ms, 3),
+                        "buckets": list(s.buckets),
+                    }
+                    for shape, s in shapes
+                ],
+            }
+
+    def write_summary(self, out: TextIO) -> None:
+        summary = self.summary()
+        if not summary["statements"]:
+            return
+        print(f"\nSQL trace: {summary['statements']} statements", file=out)
+        print("  by caller:", file=out)
+        for caller, count in list(summary["callers"].items())[:_SUMMARY_TOP]:
+            print(f"    {count:>9}  {caller}", file=out)
+        print("  by shape (total ms, count, mean ms, max ms):", file=out)
+        for s in summary["shapes"][:_SUMMARY_TOP]:
+            sql = s["sql"] if len(s["sql"]) <= 100 else s["sql"][:97] + "..."
+            print(
+                f"    {s['total_ms']:>10.1f} {s['count']:>9} {s['total_ms'] / s['count']:>8.3f} {s['max_ms']:>9.1f}  {sql}",
+                file=out,
+            )
+
+
+_TRACER: Optional[SqlTracer] = None
+_TRACER_LOCK = threading.Lock()
+
+
+def get_tracer() -> SqlTracer:
+    """The process-wide tracer; created (and its exit summary registered) on first use."""
+    global _TRACER
+    with _TRACER_LOCK:
+        if _TRACER is None:
+            _TRACER = SqlTracer(slow_ms=float(os.getenv("LEDGER_SQL_SLOW_MS", DEFAULT_SLOW_MS)))
+            atexit.register(_dump_summary, _TRACER)
+        return _TRACER
+
+
+def _dump_summary(tracer: SqlTracer) -> None:
+    tracer.write_summary(sys.stderr)
+    path = os.getenv("LEDGER_SQL_TRACE_OUT")
+    if path:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(tracer.summary(), handle, indent=2)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """
+    Times each statement from execute until its results are exhausted, the
+    cursor runs another statement, or the cursor is closed or collected.
+    """
+
+    _pending: Optional[tuple[str, Any, str, float]] = None  # sql, params, caller, elapsed_s
+
+    def _finish(self, *, defer_plan: bool = False) -> None:
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, params, caller, elapsed = pending
+            get_tracer().record(self.connection, sql, params, caller, elapsed, defer_plan=defer_plan)
+
+    def _charge(self, start: float, *, done: bool) -> None:
+        if self._pending is not None:
+            sql, params, caller, elapsed = self._pending
+            self._pending = (sql, params, caller, elapsed + time.perf_counter() - start)
+            if done:
+                self._finish()
+
+    def _timed(self, fn: Callable[..., Any], sql: str, params: Any, *args: Any) -> Any:
+        self._finish()
+        caller = _caller()
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._pending = (sql, params, caller, 0.0)
+            # Statements without result rows are done once executed.
+            self._charge(start, done=self.description is None)
+
+    def execute(self, sql: str, parameters: Any = ()) -> "TracedCursor":
+        return self._timed(super().execute, sql, parameters, sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> "TracedCursor":
+        # Keep the first parameter set (the sequence may be a generator) to explain with.
+        params = iter(seq_of_parameters)
+        first = next(params, None)
+        if first is not None:
+            params = itertools.chain((first,), params)
+        return self._timed(super().executemany, sql, first, sql, params)
+
+    def executescript(self, sql_script: str) -> "TracedCursor":
+        return self._timed(super().executescript, sql_script, _NO_PLAN, sql_script)
+
+    def fetchone(self) -> Any:
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._charge(start, done=row is None)
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> list[Any]:
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._charge(start, done=len(rows) < size)
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._charge(start, done=True)
+        return rows
+
+    def __next__(self) -> Any:
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._charge(start, done=True)
+            raise
+        self._charge(start, done=False)
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self) -> None:
+        # No queries from the garbage collector: the timing is recorded now and
+        # any query plan waits for the connection's close().
+        try:
+            self._finish(defer_plan=True)
+        except Exception:
+            pass
+
+
+class TracedConnection(LedgerConnection):
+    """LedgerConnection whose statements all run on TracedCursors."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # (sql, params) of slow statements whose plan is logged on close().
+        self._pending_plans: list[tuple[str, Any]] = []
+
+    def close(self) -> None:
+        pending, self._pending_plans = self._pending_plans, []
+        for sql, params in pending:
+            LOGGER.warning(
+                "Query plan for %s:\n%s",
+                statement_shape(sql)[:_MAX_LOGGED_SQL],
+                SqlTracer._query_plan(self, sql, params),
+            )
+        super().close()
+
+    def cursor(self, factory: type = TracedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str) -> sqlite3.Cursor:
+        return self.cursor().executescript(sql_script)
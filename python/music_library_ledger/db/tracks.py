@@ -3,7 +3,10 @@ from __future__ import annotations
 import sqlite3
 import uuid
 from dataclasses import dataclass
-from typing import Optional, Sequence
+from typing import Iterator, Optional, Sequence
+
+from music_library_ledger.db.content_hash import content_hash
+from music_library_ledger.db.paging import DEFAULT_PAGE_SIZE, iter_keyset
 
 
 @dataclass(frozen=True)
@@ -24,6 +27,19 @@ def _bool_to_int(v: Optional[bool]) -> Optional[int]:
     return 1 if v else 0
 
 
+def _track_content_hash(track: TrackInput) -> str:
+    return content_hash(
+        track.title.strip(),
+        track.album,
+        track.duration_ms,
+        track.isrc,
+        _bool_to_int(track.explicit),
+        track.media_type,
+        track.source_url,
+        track.canonical_platform,
+    )
+
+
 def create_track_uid() -> str:
     return str(uuid.uuid4())
 
@@ -61,8 +77,10 @@ def upsert_track(
             existing_uid = row["track_uid"]
 
     uid = existing_uid or track_uid or create_track_uid()
+    row_hash = _track_content_hash(track)
 
     if existing_uid:
+        # Unchanged tracks are left alone so updated_at only moves on real edits.
         conn.execute(
             """
             UPDATE tracks
@@ -73,8 +91,9 @@ def upsert_track(
                 media_type = ?,
                 source_url = ?,
                 canonical_platform = ?,
+                content_hash = ?,
                 updated_at = datetime('now')
-            WHERE track_uid = ?;
+            WHERE track_uid = ? AND content_hash IS NOT ?;
             """,
             (
                 track.title.strip(),
@@ -84,7 +103,9 @@ def upsert_track(
                 track.media_type,
                 track.source_url,
                 track.canonical_platform,
+                row_hash,
                 uid,
+                row_hash,
             ),
         )
     else:
@@ -100,10 +121,11 @@ def upsert_track(
                 media_type,
                 source_url,
                 canonical_platform,
+                content_hash,
                 created_at,
                 updated_at
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'));
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'));
             """,
             (
                 uid,
@@ -115,34 +137,55 @@ def upsert_track(
                 track.media_type,
                 track.source_url,
                 track.canonical_platform,
+                row_hash,
             ),
         )
 
     return uid
 
 
-def list_tracks_missing_platform_mapping(
-    conn: sqlite3.Connection,
+# Which tracks with a failed match attempt (platform_match_attempts) to include.
+_BACKOFF_FILTERS = {
+    "eligible": "AND (ma.track_uid IS NULL OR ma.next_retry_at <= datetime('now'))",
+    "untried": "AND ma.track_uid IS NULL",
+    "due": "AND ma.next_retry_at <= datetime('now')",
+}
+
+
+def _sql_literal(value: Optional[str]) -> str:
+    # Only for the fixed pass names above.
+    return "NULL" if value is None else f"'{value}'"
+
+
+def _missing_platform_mapping_query(
     platform: str,
     *,
-    media_type: Optional[str] = None,
-    limit: int = 500,
-) -> Sequence[sqlite3.Row]:
-    if limit <= 0:
-        raise ValueError("limit must be > 0")
+    columns_sql: str,
+    media_type: Optional[str],
+    backoff: Optional[str],
+) -> tuple[str, list[object]]:
+    """SELECT without ORDER BY/LIMIT; the WHERE clause ends in a {keyset} placeholder."""
+    params: list[object] = []
+    backoff_join_sql = ""
+    backoff_filter_sql = ""
+    if backoff is not None:
+        backoff_join_sql = """
+        LEFT JOIN platform_match_attempts ma
+            ON ma.track_uid = t.track_uid AND ma.platform = ?
+        """
+        backoff_filter_sql = _BACKOFF_FILTERS[backoff]
+        params.append(platform)
 
-    params = [platform]
+    params.append(platform)
     media_filter_sql = ""
     if media_type is not None:
         media_filter_sql = "AND t.media_type = ?"
         params.append(media_type)
 
-    params.append(limit)
-
-    return conn.execute(
-        f"""
-        SELECT t.*
+    sql = f"""
+        SELECT {columns_sql}
         FROM tracks t
+        {backoff_join_sql}
         WHERE NOT EXISTS (
             SELECT 1
             FROM platform_tracks pt
@@ -150,8 +193,236 @@ def list_tracks_missing_platform_mapping(
                 AND pt.platform = ?
         )
         {media_filter_sql}
-        ORDER BY t.created_at ASC
-        LIMIT ?;
-        """,
-        tuple(params),
+        {backoff_filter_sql}
+        {{keyset}}
+    """
+    return sql, params
+
+
+def list_tracks_missing_platform_mapping(
+    conn: sqlite3.Connection,
+    platform: str,
+    *,
+    media_type: Optional[str] = None,
+    limit: int = 500,
+    respect_backoff: bool = False,
+) -> Sequence[sqlite3.Row]:
+    """
+    Tracks with no mapping on `platform`, oldest first.
+
+    With respect_backoff=True, tracks with a recorded failed match attempt
+    (platform_match_attempts) are skipped until their next_retry_at, and
+    never-tried tracks come before retries.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be > 0")
+
+    sql, params = _missing_platform_mapping_query(
+        platform,
+        columns_sql="t.*",
+        media_type=media_type,
+        backoff="eligible" if respect_backoff else None,
+    )
+    order_sql = "t.created_at ASC, t.track_uid ASC"
+    if respect_backoff:
+        order_sql = f"ma.track_uid IS NOT NULL, {order_sql}"
+
+    return conn.execute(
+        f"{sql.format(keyset='')} ORDER BY {order_sql} LIMIT ?;",
+        (*params, limit),
     ).fetchall()
+
+
+@dataclass(frozen=True)
+class MissingMappingPosition:
+    """A place in the walk over tracks missing a mapping, to resume after."""
+
+    backoff_pass: Optional[str]              # 'untried' / 'due', None without backoff
+    created_at: str
+    track_uid: str
+
+
+def _iter_missing_platform_mapping(
+    conn: sqlite3.Connection,
+    platform: str,
+    *,
+    columns_sql: str,
+    media_type: Optional[str],
+    respect_backoff: bool,
+    limit: Optional[int],
+    page_size: int,
+    after: Optional[MissingMappingPosition] = None,
+) -> Iterator[sqlite3.Row]:
+    # Keyset order is (created_at, track_uid), so "never tried before retries"
+    # becomes two passes instead of a sort key.
+    passes: tuple[Optional[str], ...] = ("untried", "due") if respect_backoff else (None,)
+    if after is not None and after.backoff_pass in passes:
+        passes = passes[passes.index(after.backoff_pass) :]
+    else:
+        after = None
+    remaining = limit
+    for backoff in passes:
+        sql, params = _missing_platform_mapping_query(
+            platform,
+            columns_sql=f"{columns_sql}, {_sql_literal(backoff)} AS backoff_pass",
+            media_type=media_type,
+            backoff=backoff,
+        )
+        start = None
+        if after is not None and backoff == after.backoff_pass:
+            start = (after.created_at, after.track_uid)
+        for row in iter_keyset(
+            conn,
+            sql,
+            params,
+            key=("t.created_at", "t.track_uid"),
+            page_size=page_size,
+            limit=remaining,
+            after=start,
+        ):
+            yield row
+            if remaining is not None:
+                remaining -= 1
+        if remaining is not None and remaining <= 0:
+            return
+
+
+@dataclass(frozen=True)
+class TrackWithArtists:
+    track_uid: str
+    title: str
+    album: Optional[str]
+    duration_ms: Optional[int]
+    isrc: Optional[str]
+    media_type: str
+    artists: tuple[str, ...]                 # names, in artist_order
+    created_at: Optional[str] = None
+    backoff_pass: Optional[str] = None       # set by the streaming walk
+
+    def position(self) -> MissingMappingPosition:
+        """Where this track sits in the streaming walk that produced it; pass it back as `after`."""
+        return MissingMappingPosition(self.backoff_pass, self.created_at or "", self.track_uid)
+
+
+# Artist names joined with the ASCII unit separator: much cheaper to split than
+# decoding a JSON array per row; control characters do not occur in names.
+_ARTIST_NAME_SEP = "\x1f"
+
+# Aggregate ORDER BY arrived in SQLite 3.44. Before that, SQLite doesn't promise
+# any order for group_concat (not even a subquery's ORDER BY), so each name
+# carries its artist_order and _artist_names sorts them.
+_ARTIST_ORDER_SEP = "\x1e"
+_ARTIST_NAMES_ORDERED = sqlite3.sqlite_version_info >= (3, 44, 0)
+if _ARTIST_NAMES_ORDERED:
+    _ARTIST_NAMES_SQL = """
+        SELECT group_concat(a.name, char(31) ORDER BY ta.artist_order)
+        FROM track_artists ta
+        JOIN artists a ON a.artist_uid = ta.artist_uid
+        WHERE ta.track_uid = t.track_uid
+    """
+else:
+    _ARTIST_NAMES_SQL = """
+        SELECT group_concat(ta.artist_order || char(30) || a.name, char(31))
+        FROM track_artists ta
+        JOIN artists a ON a.artist_uid = ta.artist_uid
+        WHERE ta.track_uid = t.track_uid
+    """
+
+
+def _artist_names(value: Optional[str]) -> tuple[str, ...]:
+    if not value:
+        return ()
+    names = value.split(_ARTIST_NAME_SEP)
+    if _ARTIST_NAMES_ORDERED:
+        return tuple(names)
+    pairs = (n.split(_ARTIST_ORDER_SEP, 1) for n in names)
+    return tuple(name for _, name in sorted(pairs, key=lambda pair: int(pair[0])))
+
+_TRACK_WITH_ARTISTS_COLUMNS_SQL = f"""
+    t.track_uid,
+    t.title,
+    t.album,
+    t.duration_ms,
+    t.isrc,
+    t.media_type,
+    t.created_at,
+    ({_ARTIST_NAMES_SQL}) AS artist_names
+"""
+
+
+def _track_with_artists(row: sqlite3.Row) -> TrackWithArtists:
+    return TrackWithArtists(
+        track_uid=row["track_uid"],
+        title=row["title"],
+        album=row["album"],
+        duration_ms=row["duration_ms"],
+        isrc=row["isrc"],
+        media_type=row["media_type"],
+        artists=_artist_names(row["artist_names"]),
+        created_at=row["created_at"],
+        backoff_pass=row["backoff_pass"],
+    )
+
+
+def list_tracks_with_artists_missing_platform_mapping(
+    conn: sqlite3.Connection,
+    platform: str,
+    *,
+    media_type: Optional[str] = None,
+    limit: int = 500,
+    respect_backoff: bool = False,
+) -> list[TrackWithArtists]:
+    """
+    Same tracks, in the same order, as list_tracks_missing_platform_mapping, with
+    their artist names attached. One query and one row per track: the names are
+    concatenated in artist_order (idx_track_artists_track) by a subquery that
+    SQLite only evaluates for rows that survive the ORDER BY ... LIMIT.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be > 0")
+
+    sql, params = _missing_platform_mapping_query(
+        platform,
+        columns_sql=f"{_TRACK_WITH_ARTISTS_COLUMNS_SQL}, NULL AS backoff_pass",
+        media_type=media_type,
+        backoff="eligible" if respect_backoff else None,
+    )
+    order_sql = "t.created_at ASC, t.track_uid ASC"
+    if respect_backoff:
+        order_sql = f"ma.track_uid IS NOT NULL, {order_sql}"
+
+    rows = conn.execute(
+        f"{sql.format(keyset='')} ORDER BY {order_sql} LIMIT ?;",
+        (*params, limit),
+    ).fetchall()
+    return [_track_with_artists(r) for r in rows]
+
+
+def iter_tracks_with_artists_missing_platform_mapping(
+    conn: sqlite3.Connection,
+    platform: str,
+    *,
+    media_type: Optional[str] = None,
+    limit: Optional[int] = None,
+    respect_backoff: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    after: Optional[MissingMappingPosition] = None,
+) -> Iterator[TrackWithArtists]:
+    """
+    Streaming list_tracks_with_artists_missing_platform_mapping: same tracks and
+    order, read page_size at a time by keyset (idx_tracks_created). Safe to
+    consume while writing mappings or match failures on the same connection.
+    `after` is a track's position() from an earlier walk with the same arguments
+    to continue past.
+    """
+    rows = _iter_missing_platform_mapping(
+        conn,
+        platform,
+        columns_sql=_TRACK_WITH_ARTISTS_COLUMNS_SQL,
+        media_type=media_type,
+        respect_backoff=respect_backoff,
+        limit=limit,
+        page_size=page_size,
+        after=after,
+    )
+    return (_track_with_artists(r) for r in rows)
@@ -0,0 +1,239 @@
+"""
+A seeded synthetic music catalog for the offline Spotify and YT Music fakes.
+
+Objects are generated from (seed, index) on demand rather than held in memory,
+so a 200k-track catalog costs nothing until it is paged through. The same
+config always produces the same catalog.
+"""
+from __future__ import annotations
+
+import random
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+_WORDS = (
+    "after", "all", "alone", "angel", "back", "blue", "body", "broken", "burn", "call",
+    "city", "cold", "come", "crazy", "dance", "dark", "day", "dream", "down", "drive",
+    "electric", "every", "fade", "fire", "forever", "free", "ghost", "gold", "good", "heart",
+    "high", "home", "honey", "killing", "last", "light", "lonely", "lost", "love", "midnight",
+    "moon", "more", "never", "night", "ocean", "paradise", "rain", "river", "run", "shadow",
+    "sky", "slow", "space", "star", "stay", "summer", "sweet", "time", "wild", "young",
+)
+_FIRST_NAMES = (
+    "Alex", "Amara", "Ben", "Chloe", "Dana", "Eli", "Frank", "Grace", "Hana", "Ivan",
+    "Jade", "Kai", "Leon", "Maya", "Nico", "Olivia", "Pablo", "Quinn", "Rosa", "Sami",
+    "Theo", "Uma", "Victor", "Wren", "Yuki", "Zoë", "Björn", "Inès", "José", "Noémie",
+)
+_LAST_NAMES = (
+    "Adams", "Baker", "Costa", "Diaz", "Evans", "Fischer", "Garcia", "Hughes", "Ito", "Jensen",
+    "Kim", "Lopez", "Moreau", "Nakamura", "Ocean", "Park", "Quinn", "Rossi", "Silva", "Turner",
+    "Ueda", "Vega", "Walker", "Xu", "Young", "Zimmer", "Müller", "Núñez", "Søndergaard", "Öberg",
+)
+_BAND_NOUNS = ("Lights", "Wolves", "Machines", "Tides", "Echoes", "Satellites", "Kids", "Rivers")
+
+# Title decorations YT Music often adds that the matcher has to see through.
+_YTM_SUFFIXES = ("", "", "", " (Official Audio)", " - Remastered", " (Live)", " (Radio Edit)")
+
+_SAVED_NEWEST = datetime(2024, 12, 31, 23, 0, tzinfo=timezone.utc)
+
+_MARKETS = ("AR", "AU", "BR", "CA", "DE", "ES", "FR", "GB", "IN", "IT", "JP", "MX", "NL", "SE", "US")
+
+
+@dataclass(frozen=True)
+class CatalogConfig:
+    tracks: int = 10_000
+    artists: int = 2_000
+    albums: int = 3_000
+    playlists: int = 20
+    playlist_size: int = 100                 # mean; each playlist has 50%..150% of this
+    saved_tracks: int = 2_000
+    playlist_overlap: float = 0.5            # share of playlist items drawn from the saved tracks
+    isrc_rate: float = 0.9                   # share of tracks with an ISRC
+    ytm_coverage: float = 0.85               # share of tracks YT Music search can find
+    seed: int = 0
+
+
+def _rng(*parts: Any) -> random.Random:
+    return random.Random("/".join(str(p) for p in parts))
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 4))).title()
+
+
+def format_duration(duration_ms: int) -> str:
+    """Milliseconds as YT Music's 'm:ss'."""
+    seconds = duration_ms // 1000
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class SyntheticCatalog:
+    def __init__(self, config: Optional[CatalogConfig] = None) -> None:
+        self.config = config or CatalogConfig()
+        if self.config.tracks <= 0 or self.config.artists <= 0 or self.config.albums <= 0:
+            raise ValueError("tracks, artists and albums must be > 0")
+        self._markets = list(_MARKETS) * 4   # shared: Spotify payloads are mostly market lists
+        self._ytm_index: Optional[dict[str, list[int]]] = None
+        self._ytm_index_lock = threading.Lock()
+
+    def _track_spec(self, idx: int) -> tuple[str, int, bool, Optional[str], int, list[int]]:
+        """(name, duration_ms, explicit, isrc, album_idx, artist_idxs) of catalog track `idx`."""
+        if not 0 <= idx < self.config.tracks:
+            raise IndexError(idx)
+        rng = _rng(self.config.seed, "track", idx)
+        n_artists = min(1 if rng.random() < 0.75 else rng.randint(2, 3), self.config.artists)
+        # Skewed towards low indexes, so a few artists are credited on many
+        # tracks and most on a handful, as in a real library.
+        artist_idxs: list[int] = []
+        while len(artist_idxs) < n_artists:
+            a = int(self.config.artists * rng.random() ** 3)
+            if a not in artist_idxs:
+                artist_idxs.append(a)
+        isrc = f"QZ{self.config.seed % 100:02d}{idx:08d}" if rng.random() < self.config.isrc_rate else None
+        return (
+            _title(rng),
+            rng.randint(90_000, 420_000),
+            rng.random() < 0.15,
+            isrc,
+            rng.randrange(self.config.albums),
+            artist_idxs,
+        )
+
+    # Spotify-shaped objects
+
+    def artist(self, idx: int) -> dict[str, Any]:
+        rng = _rng(self.config.seed, "artist", idx)
+        if rng.random() < 0.2:
+            name = f"The {rng.choice(_WORDS).title()} {rng.choice(_BAND_NOUNS)}"
+        else:
+            name = f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+        # Keep generated names unique so artists don't merge in the ledger.
+        if idx >= len(_FIRST_NAMES) * len(_LAST_NAMES) // 4:
+            name = f"{name} {idx}"
+        artist_id = f"fakeartist{idx:07d}"
+        return {
+            "id": artist_id,
+            "name": name,
+            "type": "artist",
+            "uri": f"spotify:artist:{artist_id}",
+            "href": f"https://api.spotify.com/v1/artists/{artist_id}",
+            "external_urls": {"spotify": f"https://open.spotify.com/artist/{artist_id}"},
+        }
+
+    def album(self, idx: int) -> dict[str, Any]:
+        rng = _rng(self.config.seed, "album", idx)
+        album_id = f"fakealbum{idx:07d}"
+        return {
+            "id": album_id,
+            "name": _title(rng),
+            "album_type": rng.choice(("album", "single", "compilation")),
+            "release_date": f"{rng.randint(1965, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "available_markets": self._markets,
+            "images": [
+                {"url": f"https://i.scdn.co/image/{album_id}{size}", "height": size, "width": size}
+                for size in (640, 300, 64)
+            ],
+            "external_urls": {"spotify": f"https://open.spotify.com/album/{album_id}"},
+        }
+
+    def track(self, idx: int) -> dict[str, Any]:
+        name, duration_ms, explicit, isrc, album_idx, artist_idxs = self._track_spec(idx)
+        track_id = f"faketrack{idx:08d}"
+        return {
+            "id": track_id,
+            "name": name,
+            "duration_ms": duration_ms,
+            "explicit": explicit,
+            "popularity": idx % 101,
+            "track_number": idx % 14 + 1,
+            "external_ids": {"isrc": isrc} if isrc else {},
+            "album": self.album(album_idx),
+            "artists": [self.artist(a) for a in artist_idxs],
+            "available_markets": self._markets,
+            "type": "track",
+            "uri": f"spotify:track:{track_id}",
+            "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+        }
+
+    def saved_track_index(self, k: int) -> int:
+        # 7919 is prime, so the first `tracks` saved items are distinct tracks
+        # unless the catalog size is a multiple of it.
+        return (k * 7919) % self.config.tracks
+
+    def saved_item(self, k: int) -> dict[str, Any]:
+        """The k-th saved track, newest first (one an hour going back from 2024-12-31)."""
+        added_at = (_SAVED_NEWEST - timedelta(hours=k)).isoformat().replace("+00:00", "Z")
+        return {"added_at": added_at, "track": self.track(self.saved_track_index(k))}
+
+    def playlist(self, j: int) -> dict[str, Any]:
+        rng = _rng(self.config.seed, "playlist", j)
+        playlist_id = f"fakeplaylist{j:05d}"
+        size = self.playlist_length(j)
+        return {
+            "id": playlist_id,
+            "name": f"{_title(rng)} Mix #{j + 1}",
+            "description": rng.choice(("", "Synthetic playlist", "Made for load tests")),
+            "public": rng.random() < 0.7,
+            "collaborative": False,
+            "snapshot_id": f"snap-{self.config.seed}-{j}-{size}",
+            "owner": {"id": "fakeuser", "display_name": "Fake User"},
+            "images": [{"url": f"https://mosaic.scdn.co/{playlist_id}", "height": 640, "width": 640}],
+            "tracks": {"total": size},
+            "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"},
+        }
+
+    def playlist_length(self, j: int) -> int:
+        rng = _rng(self.config.seed, "playlist-size", j)
+        mean = self.config.playlist_size
+        return rng.randint(max(1, mean // 2), max(1, mean * 3 // 2))
+
+    def playlist_item(self, j: int, position: int) -> dict[str, Any]:
+        rng = _rng(self.config.seed, "playlist-item", j, position)
+        if self.config.saved_tracks and rng.random() < self.config.playlist_overlap:
+            idx = self.saved_track_index(rng.randrange(self.config.saved_tracks))
+        else:
+            idx = rng.randrange(self.config.tracks)
+        return {
+            "added_at": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00Z",
+            "is_local": False,
+            "track": self.track(idx),
+        }
+
+    # YT Music-shaped objects
+
+    def on_ytm(self, idx: int) -> bool:
+        return _rng(self.config.seed, "ytm", idx).random() < self.config.ytm_coverage
+
+    def ytm_song(self, idx: int) -> dict[str, Any]:
+        """The YT Music search result for catalog track `idx`, with typical drift."""
+        t = self.track(idx)
+        rng = _rng(self.config.seed, "ytm-song", idx)
+        duration_ms = t["duration_ms"] + rng.randint(-3_000, 3_000)
+        return {
+            "resultType": "song",
+            "videoId": f"v{self.config.seed % 100:02d}{idx:09d}",
+            "title": t["name"] + rng.choice(_YTM_SUFFIXES),
+            "artists": [{"name": a["name"], "id": f"UC{a['id']}"} for a in t["artists"]],
+            "album": {"name": t["album"]["name"], "id": f"MPRE{t['album']['id']}"},
+            "duration": format_duration(duration_ms),
+            "duration_seconds": duration_ms // 1000,
+            "isExplicit": t["explicit"],
+            "thumbnails": [{"url": f"https://lh3.googleusercontent.com/{idx}=w{s}", "width": s, "height": s} for s in (60, 120)],
+        }
+
+    def ytm_lookup(self, query: str) -> list[int]:
+        """
+        Catalog tracks whose '<title> <first artist>' is `query` (case-insensitive).
+        The index is built on first use, which takes a few seconds for 200k tracks.
+        """
+        with self._ytm_index_lock:
+            if self._ytm_index is None:
+                artist_names = [self.artist(a)["name"] for a in range(self.config.artists)]
+                index: dict[str, list[int]] = {}
+                for idx in range(self.config.tracks):
+                    name, _, _, _, _, artist_idxs = self._track_spec(idx)
+                    index.setdefault(f"{name} {artist_names[artist_idxs[0]]}".casefold(), []).append(idx)
+                self._ytm_index = index
+        return self._ytm_index.get(query.strip().casefold(), [])
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class FaultConfig:
+    """Latency and failures injected into every call of a fake client."""
+
+    latency_ms: float = 0.0                  # mean added latency per call
+    jitter_ms: float = 0.0                   # uniform +/- around latency_ms
+    error_rate: float = 0.0                  # share of calls failing with a 5xx
+    rate_limit_rate: float = 0.0             # share of calls failing with a 429
+    retry_after_s: float = 1.0               # Retry-After sent with each 429
+    seed: int = 0
+
+
+NO_FAULTS = FaultConfig()
+
+# (status, retry_after_s or None) -> the exception the real client would raise
+ErrorFactory = Callable[[int, Optional[float]], Exception]
+
+
+class FaultInjector:
+    """Applies a FaultConfig; safe to share between worker threads."""
+
+    def __init__(self, config: FaultConfig, make_error: ErrorFactory) -> None:
+        if not 0.0 <= config.error_rate + config.rate_limit_rate <= 1.0:
+            raise ValueError("error_rate + rate_limit_rate must be within [0, 1]")
+        self.config = config
+        self._make_error = make_error
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    def __call__(self) -> None:
+        """Sleep for the configured latency, then maybe raise an injected failure."""
+        cfg = self.config
+        with self._lock:
+            self.calls += 1
+            roll = self._rng.random()
+            jitter = self._rng.uniform(-cfg.jitter_ms, cfg.jitter_ms) if cfg.jitter_ms else 0.0
+            if roll < cfg.rate_limit_rate:
+                self.rate_limited += 1
+            elif roll < cfg.rate_limit_rate + cfg.error_rate:
+                self.errors += 1
+
+        delay_ms = max(0.0, cfg.latency_ms + jitter)
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+
+        if roll < cfg.rate_limit_rate:
+            raise self._make_error(429, cfg.retry_after_s)
+        if roll < cfg.rate_limit_rate + cfg.error_rate:
+            raise self._make_error(503, None)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+
+from spotipy import SpotifyException
+
+from music_library_ledger.fakes.catalog import SyntheticCatalog
+from music_library_ledger.fakes.faults import NO_FAULTS, FaultConfig, FaultInjector
+
+_API = "https://api.spotify.com/v1"
+
+
+def _spotify_error(status: int, retry_after_s: Optional[float]) -> SpotifyException:
+    headers = {"Retry-After": str(retry_after_s)} if retry_after_s is not None else {}
+    reason = "Too Many Requests" if status == 429 else "Service Unavailable"
+    return SpotifyException(status, -1, f"{_API}/: {reason}", reason=reason, headers=headers)
+
+
+class FakeSpotify:
+    """
+    Offline stand-in for spotipy.Spotify, serving a SyntheticCatalog.
+
+    Implements the calls the ingest scripts make, with Spotify's paging objects
+    (items/total/limit/offset/next) and its page size limits. Failures come back
+    as SpotifyException with http_status and Retry-After, like spotipy raises
+    once its own retries are exhausted.
+
+    unsave_tracks and remove_playlist_items take items out of the lists served
+    from then on (a removal from a playlist also changes its snapshot_id), to
+    simulate library edits between runs.
+    """
+
+    def __init__(self, catalog: SyntheticCatalog, faults: FaultConfig = NO_FAULTS) -> None:
+        self.catalog = catalog
+        self.faults = FaultInjector(faults, _spotify_error)
+        self._unsaved: set[int] = set()                      # catalog saved-track indexes
+        self._removed_items: dict[int, set[int]] = {}        # playlist index -> catalog positions
+
+    def unsave_tracks(self, *saved_indexes: int) -> None:
+        """Remove the catalog's saved tracks at these (newest-first) indexes."""
+        self._unsaved.update(saved_indexes)
+
+    def remove_playlist_items(self, playlist_id: str, *positions: int) -> None:
+        """Remove the items at these positions of the catalog's playlist."""
+        self._removed_items.setdefault(self._playlist_index(playlist_id), set()).update(positions)
+
+    @staticmethod
+    def _kept(total: int, removed: set[int]) -> list[int]:
+        return [i for i in range(total) if i not in removed]
+
+    def _playlist_index(self, playlist_id: str) -> int:
+        prefix = "fakeplaylist"
+        return int(playlist_id[len(prefix):]) if playlist_id.startswith(prefix) else -1
+
+    def _listed_playlist(self, j: int) -> dict[str, Any]:
+        pl = self.catalog.playlist(j)
+        removed = self._removed_items.get(j)
+        if removed:
+            kept = len(self._kept(self.catalog.playlist_length(j), removed))
+            pl["snapshot_id"] = f"{pl['snapshot_id']}-r{len(removed)}"
+            pl["tracks"] = {"total": kept}
+        return pl
+
+    def _page(
+        self,
+        url: str,
+        total: int,
+        limit: int,
+        offset: int,
+        item: Callable[[int], dict[str, Any]],
+        *,
+        max_limit: int,
+    ) -> dict[str, Any]:
+        self.faults()
+        if not 1 <= limit <= max_limit:
+            raise SpotifyException(400, -1, f"{url}: Invalid limit", reason="Bad Request")
+        if offset < 0:
+            raise SpotifyException(400, -1, f"{url}: Invalid offset", reason="Bad Request")
+        end = min(total, offset + limit)
+        return {
+            "href": f"{url}?offset={offset}&limit={limit}",
+            "items": [item(i) for i in range(offset, end)],
+            "limit": limit,
+            "offset": offset,
+            "total": total,
+            "next": f"{url}?offset={end}&limit={limit}" if end < total else None,
+            "previous": f"{url}?offset={max(0, offset - limit)}&limit={limit}" if offset else None,
+        }
+
+    def current_user_saved_tracks(self, limit: int = 20, offset: int = 0, market: Optional[str] = None) -> dict[str, Any]:
+        total = self.catalog.config.saved_tracks
+        item = self.catalog.saved_item
+        if self._unsaved:
+            kept = self._kept(total, self._unsaved)
+            total = len(kept)
+            item = lambda k: self.catalog.saved_item(kept[k])  # noqa: E731
+        return self._page(f"{_API}/me/tracks", total, limit, offset, item, max_limit=50)
+
+    def current_user_playlists(self, limit: int = 50, offset: int = 0) -> dict[str, Any]:
+        return self._page(
+            f"{_API}/me/playlists",
+            self.catalog.config.playlists,
+            limit,
+            offset,
+            self._listed_playlist,
+            max_limit=50,
+        )
+
+    def playlist_items(
+        self,
+        playlist_id: str,
+        fields: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        market: Optional[str] = None,
+        additional_types: tuple[str, ...] = ("track", "episode"),
+    ) -> dict[str, Any]:
+        j = self._playlist_index(playlist_id)
+        if not 0 <= j < self.catalog.config.playlists:
+            self.faults()
+            raise SpotifyException(404, -1, f"{_API}/playlists/{playlist_id}/tracks: Not found.", reason="Not Found")
+        kept = self._kept(self.catalog.playlist_length(j), self._removed_items.get(j, set()))
+        return self._page(
+            f"{_API}/playlists/{playlist_id}/tracks",
+            len(kept),
+            limit,
+            offset,
+            lambda position: self.catalog.playlist_item(j, kept[position]),
+            max_limit=100,
+        )
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Optional
+
+from ytmusicapi.exceptions import YTMusicServerError, YTMusicUserError
+from ytmusicapi.models.content.enums import LikeStatus
+
+from music_library_ledger.fakes.catalog import SyntheticCatalog, _rng
+from music_library_ledger.fakes.faults import NO_FAULTS, FaultConfig, FaultInjector
+
+_REASONS = {429: "Too Many Requests", 503: "Service Unavailable"}
+
+
+def _ytmusic_error(status: int, retry_after_s: Optional[float]) -> YTMusicServerError:
+    # ytmusicapi carries no headers on its errors, only the status in the message.
+    return YTMusicServerError(f"Server returned HTTP {status}: {_REASONS.get(status, 'Error')}.")
+
+
+class FakeYTMusic:
+    """
+    Offline stand-in for ytmusicapi.YTMusic, searching a SyntheticCatalog.
+
+    A query of '<title> <first artist>' finds the track (with the title and
+    duration drift real results have) unless it is outside config.ytm_coverage;
+    the rest of each result list is unrelated songs. Likes and playlists are
+    kept in memory for assertions. Failures come back as YTMusicServerError.
+    """
+
+    def __init__(self, catalog: SyntheticCatalog, faults: FaultConfig = NO_FAULTS) -> None:
+        self.catalog = catalog
+        self.faults = FaultInjector(faults, _ytmusic_error)
+        self._lock = threading.Lock()
+        self.ratings: dict[str, LikeStatus] = {}
+        self.playlists: dict[str, dict[str, Any]] = {}
+        self._next_entry = 0
+
+    def search(
+        self,
+        query: str,
+        filter: Optional[str] = None,
+        scope: Optional[str] = None,
+        limit: int = 20,
+        ignore_spelling: bool = False,
+    ) -> list[dict[str, Any]]:
+        self.faults()
+        if filter not in (None, "songs", "videos"):
+            return []
+
+        n_tracks = self.catalog.config.tracks
+        results: list[dict[str, Any]] = []
+        if filter != "videos":
+            results.extend(
+                self.catalog.ytm_song(idx) for idx in self.catalog.ytm_lookup(query) if self.catalog.on_ytm(idx)
+            )
+
+        # Pad with unrelated songs, the same ones for the same query.
+        rng = _rng(self.catalog.config.seed, "ytm-search", query.casefold())
+        while len(results) < limit and len(results) < n_tracks:
+            results.append(self.catalog.ytm_song(rng.randrange(n_tracks)))
+        if filter == "videos":
+            for r in results:
+                r["resultType"] = "video"
+                r.pop("album", None)
+        return results[:limit]
+
+    def rate_song(self, videoId: str, rating: LikeStatus = LikeStatus.INDIFFERENT) -> Optional[dict[str, Any]]:
+        self.faults()
+        with self._lock:
+            self.ratings[videoId] = rating
+        return {"actions": []}
+
+    def _entry_ids(self, n: int) -> list[str]:
+        # Like YT Music's setVideoIds: one per playlist entry, never reused. Caller holds the lock.
+        start = self._next_entry
+        self._next_entry += n
+        return [f"SET{idx:010d}" for idx in range(start, start + n)]
+
+    def _playlist(self, playlistId: str) -> dict[str, Any]:
+        playlist = self.playlists.get(playlistId)
+        if playlist is None:
+            raise YTMusicUserError(f"Playlist not found: {playlistId}")
+        return playlist
+
+    def create_playlist(
+        self,
+        title: str,
+        description: str,
+        privacy_status: str = "PRIVATE",
+        video_ids: Optional[list[str]] = None,
+        source_playlist: Optional[str] = None,
+    ) -> str:
+        self.faults()
+        with self._lock:
+            playlist_id = f"PLfake{len(self.playlists):06d}"
+            video_ids = list(video_ids or [])
+            self.playlists[playlist_id] = {
+                "title": title,
+                "description": description,
+                "privacy": privacy_status,
+                "videoIds": video_ids,
+                "setVideoIds": self._entry_ids(len(video_ids)),
+            }
+        return playlist_id
+
+    def get_playlist(
+        self,
+        playlistId: str,
+        limit: Optional[int] = 100,
+        related: bool = False,
+        suggestions_limit: int = 0,
+    ) -> dict[str, Any]:
+        self.faults()
+        with self._lock:
+            playlist = self._playlist(playlistId)
+            entries = list(zip(playlist["videoIds"], playlist["setVideoIds"]))
+            title = playlist["title"]
+        if limit is not None:
+            entries = entries[:limit]
+        return {
+            "id": playlistId,
+            "title": title,
+            "trackCount": len(playlist["videoIds"]),
+            "tracks": [{"videoId": v, "setVideoId": s} for v, s in entries],
+        }
+
+    def add_playlist_items(
+        self,
+        playlistId: str,
+        videoIds: Optional[list[str]] = None,
+        source_playlist: Optional[str] = None,
+        duplicates: bool = False,
+    ) -> dict[str, Any]:
+        self.faults()
+        with self._lock:
+            playlist = self._playlist(playlistId)
+            added = [v for v in videoIds or [] if duplicates or v not in playlist["videoIds"]]
+            set_ids = self._entry_ids(len(added))
+            playlist["videoIds"].extend(added)
+            playlist["setVideoIds"].extend(set_ids)
+        return {
+            "status": "STATUS_SUCCEEDED",
+            "playlistEditResults": [{"videoId": v, "setVideoId": s} for v, s in zip(added, set_ids)],
+        }
+
+    def remove_playlist_items(self, playlistId: str, videos: list[dict[str, Any]]) -> str:
+        self.faults()
+        with self._lock:
+            playlist = self._playlist(playlistId)
+            removed = {(v["videoId"], v["setVideoId"]) for v in videos}
+            kept = [e for e in zip(playlist["videoIds"], playlist["setVideoIds"]) if e not in removed]
+            playlist["videoIds"] = [v for v, _ in kept]
+            playlist["setVideoIds"] = [s for _, s in kept]
+        return "STATUS_SUCCEEDED"
+
+    def edit_playlist(
+        self,
+        playlistId: str,
+        title: Optional[str] = None,
+        description: Optional[str] = None,
+        privacyStatus: Optional[str] = None,
+        moveItem: Optional[str | tuple[str, str]] = None,
+        **kwargs: Any,
+    ) -> str:
+        self.faults()
+        with self._lock:
+            playlist = self._playlist(playlistId)
+            if title is not None:
+                playlist["title"] = title
+            if description is not None:
+                playlist["description"] = description
+            if privacyStatus is not None:
+                playlist["privacy"] = privacyStatus
+            if moveItem:
+                moved, successor = (moveItem, None) if isinstance(moveItem, str) else moveItem
+                entries = list(zip(playlist["videoIds"], playlist["setVideoIds"]))
+                idx = next((i for i, e in enumerate(entries) if e[1] == moved), None)
+                if idx is None:
+                    raise YTMusicUserError(f"No entry {moved} in {playlistId}")
+                entry = entries.pop(idx)
+                at = next((i for i, e in enumerate(entries) if e[1] == successor), len(entries))
+                entries.insert(at, entry)
+                playlist["videoIds"] = [v for v, _ in entries]
+                playlist["setVideoIds"] = [s for _, s in entries]
+        return "STATUS_SUCCEEDED"
@@ -0,0 +1,269 @@
+"""
+Counters and timers for one ingest or export run, and the report written at
+the end of it: JSON for people and scripts, and a Prometheus textfile (for
+node_exporter's textfile collector) for the scheduler dashboards.
+
+    metrics = RunMetrics("ingest_playlists")
+    sp = MeteredClient(get_spotify_client(), metrics, api="spotify")
+    with metrics.timer("db_write"):
+        ...
+    metrics.incr("rows_written", 50, table="tracks")
+    metrics.write_report(directory)   # ingest_playlists.json + ingest_playlists.prom
+
+Metric names are plain snake_case; the Prometheus output prefixes them with
+`ledger_` and labels every sample with the pipeline name.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from music_library_ledger.client_pool import connection_stats
+from music_library_ledger.retry import http_status
+
+PROM_PREFIX = "ledger_"
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _utc_iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+@dataclass
+class TimerStats:
+    count: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+
+
+class RunMetrics:
+    """Thread-safe counters, gauges and timers for one pipeline run."""
+
+    def __init__(self, pipeline: str) -> None:
+        self.pipeline = pipeline
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.gauges: dict[tuple[str, Labels], float] = {}
+        self.timers: dict[tuple[str, Labels], TimerStats] = {}
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            stats = self.timers.get(key)
+            if stats is None:
+                stats = self.timers[key] = TimerStats()
+            stats.count += 1
+            stats.total_s += seconds
+            stats.max_s = max(stats.max_s, seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self.counters.get((name, _labels(labels)), 0)
+
+    def retry_hook(self, api: str) -> Callable[[BaseException], None]:
+        """An on_retry callback for call_with_retry / iter_pages that counts retries."""
+
+        def on_retry(exc: BaseException) -> None:
+            self.incr("api_retries", api=api, status=http_status(exc) or "none")
+
+        return on_retry
+
+    def report(self, *, status: str = "ok") -> dict[str, Any]:
+        finished_at = time.time()
+        with self._lock:
+            return {
+                "pipeline": self.pipeline,
+                "status": status,
+                "started_at": _utc_iso(self.started_at),
+                "finished_at": _utc_iso(finished_at),
+                "duration_s": round(finished_at - self.started_at, 3),
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.gauges.items())
+                ],
+                "timers": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "count": t.count,
+                        "total_s": round(t.total_s, 6),
+                        "max_s": round(t.max_s, 6),
+                    }
+                    for (name, labels), t in sorted(self.timers.items())
+                ],
+            }
+
+    def prometheus_text(self, report: dict[str, Any]) -> str:
+        """The report in the Prometheus text exposition format."""
+        lines: list[str] = []
+
+        def family(name: str, kind: str, samples: list[tuple[str, dict[str, Any], float]]) -> None:
+            if not samples:
+                return
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                all_labels = {"pipeline": self.pipeline, **labels}
+                rendered = ",".join(f'{k}="{_escape(str(v))}"' for k, v in all_labels.items())
+                lines.append(f"{sample_name}{{{rendered}}} {_number(value)}")
+
+        def named(items: list[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
+            by_name: dict[str, list[dict[str, Any]]] = {}
+            for item in items:
+                by_name.setdefault(item["name"], []).append(item)
+            return by_name
+
+        finished = datetime.fromisoformat(report["finished_at"].replace("Z", "+00:00")).timestamp()
+        for name, value in (
+            ("run_success", int(report["status"] == "ok")),
+            ("run_duration_seconds", report["duration_s"]),
+            ("run_finished_timestamp_seconds", round(finished)),
+        ):
+            family(f"{PROM_PREFIX}{name}", "gauge", [(f"{PROM_PREFIX}{name}", {}, value)])
+        for name, items in named(report["counters"]).items():
+            metric = f"{PROM_PREFIX}{name}_total"
+            family(metric, "counter", [(metric, c["labels"], c["value"]) for c in items])
+        for name, items in named(report["gauges"]).items():
+            metric = f"{PROM_PREFIX}{name}"
+            family(metric, "gauge", [(metric, g["labels"], g["value"]) for g in items])
+        for name, items in named(report["timers"]).items():
+            metric = f"{PROM_PREFIX}{name}_seconds"
+            samples = []
+            for t in items:
+                samples.append((f"{metric}_sum", t["labels"], t["total_s"]))
+                samples.append((f"{metric}_count", t["labels"], t["count"]))
+            family(metric, "summary", samples)
+            family(f"{metric}_max", "gauge", [(f"{metric}_max", t["labels"], t["max_s"]) for t in items])
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, directory: str, *, status: str = "ok") -> dict[str, Any]:
+        """
+        Write <pipeline>.json and <pipeline>.prom into `directory`. Each file is
+        replaced atomically so a collector never reads a half-written one.
+        """
+        report = self.report(status=status)
+        path = Path(directory).expanduser()
+        path.mkdir(parents=True, exist_ok=True)
+        _write_atomic(path / f"{self.pipeline}.json", json.dumps(report, indent=2) + "\n")
+        _write_atomic(path / f"{self.pipeline}.prom", self.prometheus_text(report))
+        return report
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class MeteredClient:
+    """
+    Wraps an API client (spotipy, ytmusicapi or a fake) so every method call is
+    counted and timed as api_calls / api_latency, with failures counted by
+    HTTP status as api_errors. Attributes that aren't methods pass through.
+    """
+
+    def __init__(self, client: Any, metrics: RunMetrics, *, api: str) -> None:
+        self._client = client
+        self._metrics = metrics
+        self._api = api
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        metrics, api = self._metrics, self._api
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            metrics.incr("api_calls", api=api, method=name)
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            except Exception as exc:
+                metrics.incr("api_errors", api=api, method=name, status=http_status(exc) or "none")
+                raise
+            finally:
+                metrics.observe("api_latency", time.perf_counter() - start, api=api, method=name)
+
+        return call
+
+
+def metrics_dir_from_env() -> Optional[str]:
+    return os.getenv("LEDGER_METRICS_DIR") or None
+
+
+def add_metrics_dir_argument(parser: argparse.ArgumentParser) -> None:
+    """The --metrics-dir option of the pipeline CLIs, for run_report."""
+    parser.add_argument(
+        "--metrics-dir",
+        default=metrics_dir_from_env(),
+        help="Write a JSON and Prometheus run report here (default: $LEDGER_METRICS_DIR).",
+    )
+
+
+@contextmanager
+def run_report(pipeline: str, directory: Optional[str]) -> Iterator[RunMetrics]:
+    """
+    Metrics for a CLI run. When `directory` is set, the report is written there
+    on the way out, with status "failed" if the run raised.
+    """
+    metrics = RunMetrics(pipeline)
+    status = "failed"
+    try:
+        yield metrics
+        status = "ok"
+    finally:
+        if directory:
+            record_connection_stats(metrics)
+            metrics.write_report(directory, status=status)
+
+
+def record_connection_stats(metrics: RunMetrics) -> None:
+    """Gauge the HTTP requests and new connections of each shared API client (see client_pool)."""
+    for api, stats in connection_stats().items():
+        metrics.set_gauge("http_requests", stats.requests, api=api)
+        metrics.set_gauge("http_connections", stats.connections, api=api)
+        metrics.set_gauge("http_connections_reused", stats.reused, api=api)
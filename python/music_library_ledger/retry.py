@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar
+
+LOGGER = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+# ytmusicapi reports HTTP failures only in the message, e.g.
+# "Server returned HTTP 429: Too Many Requests."
+_HTTP_STATUS_RE = re.compile(r"\bHTTP (\d{3})\b")
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 5                        # total calls, including the first
+    base_delay_s: float = 1.0                # doubled per attempt, with jitter
+    max_delay_s: float = 60.0
+    statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+# For calls that aren't idempotent (creating a playlist, appending to one): a 429
+# was rejected before doing anything, but a 5xx may have been applied.
+RATE_LIMIT_RETRY_POLICY = RetryPolicy(statuses=frozenset({429}))
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+def http_status(exc: BaseException) -> Optional[int]:
+    """The HTTP status behind a spotipy or ytmusicapi error, if it carries one."""
+    status = getattr(exc, "http_status", None)
+    if isinstance(status, int):
+        return status
+    m = _HTTP_STATUS_RE.search(str(exc))
+    return int(m.group(1)) if m else None
+
+
+def retry_after_s(exc: BaseException) -> Optional[float]:
+    """The server's Retry-After, in seconds, when the error carries one."""
+    headers = getattr(exc, "headers", None) or {}
+    for key, value in headers.items():
+        if key.lower() == "retry-after":
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def call_with_retry(
+    fn: Callable[[], R],
+    *,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    sleep: Callable[[float], None] = time.sleep,
+    on_retry: Optional[Callable[[BaseException], None]] = None,
+) -> R:
+    """
+    Call `fn`, retrying the failures whose HTTP status is in `policy.statuses`
+    (rate limits and transient server errors by default) with exponential
+    backoff; a Retry-After from the server takes precedence. `on_retry` is
+    called with each error that is about to be retried.
+    Any other error, or the last failed attempt, is raised to the caller.
+    """
+    if policy.attempts <= 0:
+        raise ValueError("attempts must be > 0")
+
+    for attempt in range(1, policy.attempts + 1):
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt >= policy.attempts or http_status(exc) not in policy.statuses:
+                raise
+            delay = retry_after_s(exc)
+            if delay is None:
+                backoff = policy.base_delay_s * (2 ** (attempt - 1))
+                delay = random.uniform(backoff / 2, backoff)
+            delay = min(delay, policy.max_delay_s)
+            if on_retry is not None:
+                on_retry(exc)
+            LOGGER.debug("Retrying after HTTP %s in %.2fs (attempt %s)", http_status(exc), delay, attempt)
+            sleep(delay)
+    raise AssertionError("unreachable")
@@ -0,0 +1,93 @@
+"""
+Ingest throughput per connection profile: synthetic Spotify-like pages written
+with bulk_upsert_tracks and one commit per page, as the ingest scripts do.
+Closing the connection (which checkpoints under 'bulk') is part of the timing.
+
+    python -m music_library_ledger.scripts.bench.connection_profile_bench --tracks 50000
+
+Point --dir at the synced drive to measure what the profiles cost there.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from music_library_ledger.db.bulk import BulkArtist, BulkTrack, bulk_upsert_tracks
+from music_library_ledger.db.collections import CollectionInput, get_or_create_collection
+from music_library_ledger.db.connection import get_connection
+from music_library_ledger.db.identity_cache import IdentityCache
+from music_library_ledger.db.schema import apply_schema
+from music_library_ledger.db.tracks import TrackInput
+
+
+def _pages(n_tracks: int, page_size: int, seed: int) -> list[list[BulkTrack]]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_tracks):
+        artists = [
+            BulkArtist(name=f"Artist {a}", platform_artist_id=f"sp-a{a}")
+            for a in rng.sample(range(max(1, n_tracks // 5)), rng.randint(1, 3))
+        ]
+        rows.append(
+            BulkTrack(
+                track=TrackInput(
+                    title=f"Song {i}",
+                    album=f"Album {i % 2000}",
+                    duration_ms=rng.randint(120_000, 360_000),
+                    isrc=f"BENCH{i:08d}" if i % 4 else None,
+                ),
+                platform_track_id=f"sp-t{i}",
+                artists=artists,
+                raw_json={"id": f"sp-t{i}", "name": f"Song {i}", "popularity": rng.randint(0, 100)},
+                added_at="2024-01-01T00:00:00Z",
+            )
+        )
+    return [rows[i : i + page_size] for i in range(0, len(rows), page_size)]
+
+
+def _ingest(profile: str, path: Path, pages: list[list[BulkTrack]]) -> float:
+    os.environ["SQLITE_DB_PATH"] = str(path)
+    conn = get_connection(profile)
+    apply_schema(conn)
+    with conn:
+        collection_uid = get_or_create_collection(conn, CollectionInput(name="Bench", collection_type="playlist"))
+    cache = IdentityCache()
+
+    start = time.perf_counter()
+    position = 0
+    for page in pages:
+        with cache.transaction(conn):
+            bulk_upsert_tracks(
+                conn,
+                page,
+                platform="spotify",
+                collection_uid=collection_uid,
+                start_position=position,
+                cache=cache,
+            )
+        position += len(page)
+    conn.close()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ingest throughput per SQLite connection profile.")
+    parser.add_argument("--tracks", type=int, default=20_000)
+    parser.add_argument("--page-size", type=int, default=50, help="Tracks per commit (Spotify page size).")
+    parser.add_argument("--dir", help="Directory for the scratch databases (default: a temp dir).")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    pages = _pages(args.tracks, args.page_size, args.seed)
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for profile in ("durable", "bulk"):
+            elapsed = _ingest(profile, Path(tmp) / f"{profile}.db", pages)
+            print(f"{profile:<8} {elapsed:7.2f} s  {args.tracks / elapsed:9.0f} tracks/s  ({len(pages)} commits)")
+
+
+if __name__ == "__main__":
+    main()
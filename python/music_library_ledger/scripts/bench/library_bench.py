@@ -0,0 +1,310 @@
+"""
+End-to-end benchmark on a synthetic library: Spotify ingest, the YT Music
+export (candidate listing, matching, both exporters) and collection reads,
+driven through the offline fakes so no network or credentials are involved.
+
+    python -m music_library_ledger.scripts.bench.library_bench --tracks 10000 --output before.json
+    python -m music_library_ledger.scripts.bench.library_bench --tracks 10000 --compare before.json
+
+The library is generated from --seed, so runs at the same --tracks and --seed
+see the same data and their JSON results can be compared across commits:
+--compare exits non-zero when a stage's throughput drops by more than
+--tolerance. Stage times include building the fakes' responses, which is
+constant across commits. Peak memory is what tracemalloc sees (Python allocations only,
+not SQLite's page cache) and slows every stage down; pass --no-tracemalloc
+for timings closest to production.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from music_library_ledger.db.collections import iter_collection_tracks
+from music_library_ledger.db.connection import get_connection
+from music_library_ledger.db.schema import apply_schema
+from music_library_ledger.db.tracks import (
+    iter_tracks_with_artists_missing_platform_mapping,
+    list_tracks_missing_platform_mapping,
+)
+from music_library_ledger.fakes.catalog import CatalogConfig, SyntheticCatalog
+from music_library_ledger.fakes.spotify import FakeSpotify
+from music_library_ledger.fakes.ytmusic import FakeYTMusic
+from music_library_ledger.spotify.ingest_playlists import ingest_playlists
+from music_library_ledger.spotify.ingest_saved_tracks import ingest_saved_tracks
+from music_library_ledger.ytmusic.export_playlists import export_playlists_to_ytmusic
+from music_library_ledger.ytmusic.export_tracks import (
+    _pick_best_match,
+    _search_query,
+    _track_info,
+    export_tracks_to_ytmusic,
+)
+from music_library_ledger.ytmusic.matching import Matcher
+
+RESULTS_VERSION = 1
+
+MIN_SCORE = 0.65
+
+
+@dataclass
+class StageResult:
+    name: str
+    items: int
+    seconds: float
+    items_per_s: float
+    peak_bytes: Optional[int]                # None with --no-tracemalloc
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+def catalog_config(n_tracks: int, seed: int) -> CatalogConfig:
+    """A library of about `n_tracks` tracks with the proportions of a real one."""
+    if n_tracks < 100:
+        raise ValueError("tracks must be >= 100")
+    return CatalogConfig(
+        tracks=n_tracks,
+        artists=max(50, n_tracks // 8),
+        albums=max(50, n_tracks // 4),
+        playlists=max(5, n_tracks // 1_000),
+        playlist_size=120,
+        saved_tracks=n_tracks * 3 // 4,
+        playlist_overlap=0.6,
+        seed=seed,
+    )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _run_stage(
+    name: str,
+    fn: Callable[[], tuple[int, dict[str, Any]]],
+    *,
+    trace_memory: bool,
+) -> StageResult:
+    """Time fn(), which returns (items processed, extra details)."""
+    if trace_memory:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    items, extra = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - base if trace_memory else None
+
+    result = StageResult(
+        name=name,
+        items=items,
+        seconds=round(seconds, 4),
+        items_per_s=round(items / seconds, 1) if seconds > 0 else 0.0,
+        peak_bytes=peak,
+        extra=extra,
+    )
+    mem = f"{peak / 2**20:8.1f} MiB" if peak is not None else "       -    "
+    print(f"{name:<22} {items:>8} items {seconds:8.2f} s {result.items_per_s:>10.0f} /s {mem}", flush=True)
+    return result
+
+
+def run_benchmarks(
+    db_path: Path,
+    *,
+    n_tracks: int,
+    seed: int,
+    export_limit: int,
+    match_tracks: int,
+    concurrency: int,
+    trace_memory: bool,
+) -> list[StageResult]:
+    catalog = SyntheticCatalog(catalog_config(n_tracks, seed))
+    sp = FakeSpotify(catalog)
+    ytm = FakeYTMusic(catalog)
+    # The exporters open their own connections from SQLITE_DB_PATH.
+    os.environ["SQLITE_DB_PATH"] = str(db_path)
+
+    results: list[StageResult] = []
+
+    conn = get_connection("bulk")
+    apply_schema(conn)
+
+    def _saved() -> tuple[int, dict[str, Any]]:
+        stats = ingest_saved_tracks(conn, client=sp)
+        return stats.written, asdict(stats.writes)
+
+    def _playlists() -> tuple[int, dict[str, Any]]:
+        stats = ingest_playlists(conn, client=sp)
+        return stats.items_inserted, {"playlists": stats.new, **asdict(stats.writes)}
+
+    results.append(_run_stage("spotify_saved_tracks", _saved, trace_memory=trace_memory))
+    results.append(_run_stage("spotify_playlists", _playlists, trace_memory=trace_memory))
+    conn.close()
+
+    conn = get_connection("query")
+    library_tracks = conn.execute("SELECT COUNT(*) FROM tracks;").fetchone()[0]
+
+    def _missing() -> tuple[int, dict[str, Any]]:
+        rows = list_tracks_missing_platform_mapping(conn, "ytm", limit=library_tracks)
+        return len(rows), {}
+
+    results.append(_run_stage("list_missing_mappings", _missing, trace_memory=trace_memory))
+
+    # Candidates are fetched up front (this also builds the fake's search index)
+    # so the stage times matching alone.
+    matcher = Matcher()
+    jobs = [
+        (info, ytm.search(_search_query(info), filter="songs", limit=5))
+        for info in (
+            _track_info(t)
+            for t in iter_tracks_with_artists_missing_platform_mapping(conn, platform="ytm", limit=match_tracks)
+        )
+    ]
+
+    def _match() -> tuple[int, dict[str, Any]]:
+        matched = sum(1 for info, cands in jobs if _pick_best_match(matcher, info, cands, min_score=MIN_SCORE))
+        return len(jobs), {"matched": matched}
+
+    results.append(_run_stage("pick_best_match", _match, trace_memory=trace_memory))
+    del jobs
+
+    def _export_tracks() -> tuple[int, dict[str, Any]]:
+        before = len(ytm.ratings)
+        export_tracks_to_ytmusic(
+            client=ytm,
+            limit=export_limit,
+            concurrency=concurrency,
+            requests_per_second=None,
+            search_cache_config=None,
+            min_score=MIN_SCORE,
+        )
+        return min(export_limit, library_tracks), {"liked": len(ytm.ratings) - before}
+
+    results.append(_run_stage("export_tracks", _export_tracks, trace_memory=trace_memory))
+
+    def _export_playlists() -> tuple[int, dict[str, Any]]:
+        export_playlists_to_ytmusic(client=ytm, limit=10_000, concurrency=concurrency, requests_per_second=None)
+        added = sum(len(p["videoIds"]) for p in ytm.playlists.values())
+        return added, {"playlists": len(ytm.playlists)}
+
+    results.append(_run_stage("export_playlists", _export_playlists, trace_memory=trace_memory))
+
+    collection_uids = [r[0] for r in conn.execute("SELECT collection_uid FROM collections ORDER BY collection_uid;")]
+
+    def _collections() -> tuple[int, dict[str, Any]]:
+        rows = 0
+        for uid in collection_uids:
+            for _ in iter_collection_tracks(conn, uid, platform="ytm"):
+                rows += 1
+        return rows, {"collections": len(collection_uids)}
+
+    results.append(_run_stage("collection_reads", _collections, trace_memory=trace_memory))
+    conn.close()
+    return results
+
+
+def compare_results(current: dict[str, Any], baseline: dict[str, Any], *, tolerance: float) -> list[str]:
+    """Stages whose throughput fell by more than `tolerance` (a fraction) against the baseline."""
+    if current["config"] != baseline.get("config"):
+        print("warning: baseline was run with a different config; comparing anyway", file=sys.stderr)
+
+    base_stages = {s["name"]: s for s in baseline.get("stages", [])}
+    regressions = []
+    print(f"\n{'stage':<22} {'baseline /s':>12} {'current /s':>12} {'change':>8}")
+    for stage in current["stages"]:
+        base = base_stages.get(stage["name"])
+        if not base or not base["items_per_s"]:
+            continue
+        change = stage["items_per_s"] / base["items_per_s"] - 1
+        flag = "  REGRESSION" if change < -tolerance else ""
+        print(f"{stage['name']:<22} {base['items_per_s']:>12.0f} {stage['items_per_s']:>12.0f} {change:>+7.1%}{flag}")
+        if flag:
+            regressions.append(stage["name"])
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of ingest, export and reads on a synthetic library.")
+    parser.add_argument("--tracks", type=int, default=10_000, help="Catalog size (1k to 500k is the useful range).")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--export-limit", type=int, default=10_000, help="Tracks per export_tracks run.")
+    parser.add_argument("--match-tracks", type=int, default=5_000, help="Tracks scored in the matching stage.")
+    parser.add_argument("--concurrency", type=int, default=4, help="export_tracks / export_playlists workers.")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip peak memory tracking.")
+    parser.add_argument("--dir", help="Directory for the scratch database (default: a temp dir).")
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed throughput drop vs the baseline.")
+    args = parser.parse_args()
+
+    # The exporters log every unmatched track.
+    logging.basicConfig(level=logging.ERROR)
+
+    trace_memory = not args.no_tracemalloc
+    if trace_memory:
+        tracemalloc.start()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        stages = run_benchmarks(
+            Path(tmp) / "bench.db",
+            n_tracks=args.tracks,
+            seed=args.seed,
+            export_limit=args.export_limit,
+            match_tracks=args.match_tracks,
+            concurrency=args.concurrency,
+            trace_memory=trace_memory,
+        )
+
+    results = {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.platform(),
+        "config": {
+            "tracks": args.tracks,
+            "seed": args.seed,
+            "export_limit": args.export_limit,
+            "match_tracks": args.match_tracks,
+            "concurrency": args.concurrency,
+            "tracemalloc": trace_memory,
+        },
+        # ru_maxrss is KiB on Linux, bytes on macOS.
+        "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "stages": [asdict(s) for s in stages],
+    }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"wrote {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare_results(results, baseline, tolerance=args.tolerance)
+        if regressions:
+            print(f"throughput regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
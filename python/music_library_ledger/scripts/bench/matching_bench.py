@@ -0,0 +1,149 @@
+"""
+Throughput of YT Music candidate scoring: the original per-call SequenceMatcher
+scorer against the matching.Matcher profiles, on a synthetic catalog.
+
+    python -m music_library_ledger.scripts.bench.matching_bench --tracks 2000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from difflib import SequenceMatcher
+from typing import Any, Callable, Optional
+
+from music_library_ledger.ytmusic.matching import (
+    LEGACY_PROFILE,
+    FAST_PROFILE,
+    Matcher,
+    duration_score,
+    duration_str_to_ms,
+    prepare_text,
+    prepare_track,
+)
+
+_WORDS = (
+    "love night heart fire dream blue summer rain city light dance gold road "
+    "home wild echo river ghost star young forever midnight paradise electric "
+    "shadow velvet silver ocean thunder honey neon broken golden lonely"
+).split()
+
+_SUFFIXES = ("", "", "", " (Remastered 2011)", " - Live", " (feat. Someone)", " [Official Video]")
+
+
+# The scorer export_tracks used before matching.py, kept verbatim as the baseline.
+def _baseline_normalize(value: str) -> str:
+    value = value.lower()
+    value = re.sub(r"[^a-z0-9]+", " ", value)
+    return " ".join(value.split())
+
+
+def _baseline_ratio(a: str, b: str) -> float:
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, _baseline_normalize(a), _baseline_normalize(b)).ratio()
+
+
+def _baseline_best(track: dict[str, Any], candidates: list[dict[str, Any]]) -> Optional[tuple[str, float]]:
+    best: Optional[tuple[str, float]] = None
+    for cand in candidates:
+        artists = [a["name"] for a in cand["artists"]]
+        title_ratio = _baseline_ratio(track["title"], cand["title"])
+        artist_ratio = max(
+            (_baseline_ratio(x, y) for x in track["artists"] for y in artists),
+            default=0.0,
+        )
+        duration_ratio = duration_score(track["duration_ms"], duration_str_to_ms(cand["duration"]))
+        score = 0.65 * title_ratio + 0.25 * artist_ratio + 0.10 * duration_ratio
+        if title_ratio < 0.6:
+            continue
+        if best is None or score > best[1]:
+            best = (cand["videoId"], score)
+    return best
+
+
+def _phrase(rng: random.Random, lo: int, hi: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(lo, hi))).title()
+
+
+def _mutate(rng: random.Random, value: str) -> str:
+    if rng.random() < 0.5 and len(value) > 4:
+        i = rng.randrange(len(value))
+        value = value[:i] + value[i + 1 :]
+    return value + rng.choice(_SUFFIXES)
+
+
+def _catalog(n: int, per_query: int, seed: int) -> list[tuple[dict[str, Any], list[dict[str, Any]]]]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        artists = [_phrase(rng, 1, 2) for _ in range(rng.randint(1, 3))]
+        track = {
+            "title": _phrase(rng, 1, 4),
+            "artists": artists,
+            "duration_ms": rng.randint(120, 360) * 1000,
+        }
+        candidates = []
+        for j in range(per_query):
+            exact = j == 0
+            seconds = track["duration_ms"] // 1000 + (0 if exact else rng.randint(-15, 15))
+            candidates.append(
+                {
+                    "videoId": f"v{i}-{j}",
+                    "title": _mutate(rng, track["title"]) if exact or rng.random() < 0.5 else _phrase(rng, 1, 4),
+                    "artists": [{"name": a} for a in (artists if exact else [_phrase(rng, 1, 2)])],
+                    "duration": f"{seconds // 60}:{seconds % 60:02d}",
+                }
+            )
+        rng.shuffle(candidates)
+        rows.append((track, candidates))
+    return rows
+
+
+def _time(label: str, fn: Callable[[], list], n: int) -> list:
+    start = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed * 1000:9.1f} ms  {n / elapsed:10.0f} tracks/s")
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark YT Music match scoring.")
+    parser.add_argument("--tracks", type=int, default=2000)
+    parser.add_argument("--candidates", type=int, default=5, help="Search results per track.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = _catalog(args.tracks, args.candidates, args.seed)
+    legacy, fast = Matcher(LEGACY_PROFILE), Matcher(FAST_PROFILE)
+
+    def _run(matcher: Matcher) -> list:
+        out = []
+        for track, candidates in rows:
+            best = matcher.best(prepare_track(track["title"], track["artists"], track["duration_ms"]), candidates)
+            out.append((best.video_id, best.score) if best else None)
+        return out
+
+    print(f"{args.tracks} tracks x {args.candidates} candidates")
+    baseline = _time("baseline (difflib)", lambda: [_baseline_best(t, c) for t, c in rows], args.tracks)
+    prepare_text.cache_clear()
+    legacy_out = _time("matcher legacy", lambda: _run(legacy), args.tracks)
+    prepare_text.cache_clear()
+    fast_out = _time("matcher fast", lambda: _run(fast), args.tracks)
+
+    same_pick = sum(1 for a, b in zip(baseline, legacy_out) if (a and a[0]) == (b and b[0]))
+    max_delta = max((abs(a[1] - b[1]) for a, b in zip(baseline, legacy_out) if a and b), default=0.0)
+    agree = sum(1 for a, b in zip(baseline, fast_out) if (a and a[0]) == (b and b[0]))
+    print(f"legacy profile: same pick {same_pick}/{args.tracks}, max score delta {max_delta:.2e}")
+    print(f"fast profile:   same pick as baseline {agree}/{args.tracks}")
+
+    # Candidate 0 of each track is the true match.
+    for label, out in (("baseline", baseline), ("fast", fast_out)):
+        correct = sum(1 for i, best in enumerate(out) if best and best[0] == f"v{i}-0")
+        print(f"{label:<9} picked the true match for {correct}/{args.tracks}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Loading tracks plus their ordered artists for the YT Music export, on a
+synthetic database: one artist query per track (the old export path) against
+the chunked IN lookup and the single joined query.
+
+    python -m music_library_ledger.scripts.bench.track_hydration_bench --tracks 100000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+from music_library_ledger.db.artists import get_artists_for_track
+from music_library_ledger.db.paging import MAX_IN_PARAMS
+from music_library_ledger.db.schema import apply_schema
+from music_library_ledger.db.tracks import (
+    list_tracks_missing_platform_mapping,
+    list_tracks_with_artists_missing_platform_mapping,
+)
+
+
+def _build(path: Path, n_tracks: int, n_artists: int, seed: int) -> sqlite3.Connection:
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    apply_schema(conn)
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO artists (artist_uid, name) VALUES (?, ?);",
+            ((f"a{i:07d}", f"Artist {i}") for i in range(n_artists)),
+        )
+        conn.executemany(
+            "INSERT INTO tracks (track_uid, title, album, duration_ms) VALUES (?, ?, ?, ?);",
+            ((f"t{i:08d}", f"Song {i}", f"Album {i % 5000}", 120_000 + i % 240_000) for i in range(n_tracks)),
+        )
+        credits = []
+        for i in range(n_tracks):
+            for order, artist in enumerate(rng.sample(range(n_artists), rng.randint(1, 3))):
+                credits.append((f"t{i:08d}", f"a{artist:07d}", order))
+        conn.executemany(
+            "INSERT INTO track_artists (track_uid, artist_uid, artist_order, role) VALUES (?, ?, ?, 'primary');",
+            credits,
+        )
+        # A third of the library already mapped, as after a few export runs.
+        conn.executemany(
+            """
+            INSERT INTO platform_tracks (platform, platform_track_id, track_uid)
+            VALUES ('ytm', ?, ?);
+            """,
+            ((f"v{i}", f"t{i:08d}") for i in range(0, n_tracks, 3)),
+        )
+    return conn
+
+
+def _artist_names_for_tracks(
+    conn: sqlite3.Connection,
+    track_uids: Iterable[str],
+) -> dict[str, list[str]]:
+    """Artist names per track, in artist_order, for many tracks in a few queries."""
+    uids = list(dict.fromkeys(track_uids))
+    names: dict[str, list[str]] = {uid: [] for uid in uids}
+    for idx in range(0, len(uids), MAX_IN_PARAMS):
+        chunk = uids[idx : idx + MAX_IN_PARAMS]
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"""
+            SELECT ta.track_uid, a.name
+            FROM track_artists ta
+            JOIN artists a ON a.artist_uid = ta.artist_uid
+            WHERE ta.track_uid IN ({placeholders})
+            ORDER BY ta.track_uid, ta.artist_order ASC;
+            """,
+            chunk,
+        )
+        for track_uid, name in rows:
+            names[track_uid].append(name)
+    return names
+
+
+def _time(label: str, fn: Callable[[], list[tuple[str, list[str]]]], repeat: int) -> list[tuple[str, list[str]]]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<18} {best * 1000:9.1f} ms  ({len(out)} tracks, best of {repeat})")
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark track + artist hydration for the YT Music export.")
+    parser.add_argument("--tracks", type=int, default=100_000)
+    parser.add_argument("--artists", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=50_000, help="Tracks fetched per export run.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        conn = _build(Path(tmp) / "bench.db", args.tracks, args.artists, args.seed)
+        print(f"built {args.tracks} tracks in {time.perf_counter() - start:.1f}s")
+
+        def _n_plus_one():
+            rows = list_tracks_missing_platform_mapping(conn, "ytm", limit=args.limit)
+            return [(r["track_uid"], [a["name"] for a in get_artists_for_track(conn, r["track_uid"])]) for r in rows]
+
+        def _chunked_in():
+            rows = list_tracks_missing_platform_mapping(conn, "ytm", limit=args.limit)
+            names = _artist_names_for_tracks(conn, (r["track_uid"] for r in rows))
+            return [(r["track_uid"], names[r["track_uid"]]) for r in rows]
+
+        def _joined():
+            tracks = list_tracks_with_artists_missing_platform_mapping(conn, "ytm", limit=args.limit)
+            return [(t.track_uid, list(t.artists)) for t in tracks]
+
+        baseline = _time("per-track (N+1)", _n_plus_one, args.repeat)
+        chunked = _time("chunked IN", _chunked_in, args.repeat)
+        joined = _time("single join", _joined, args.repeat)
+        conn.close()
+
+    assert chunked == baseline
+    assert joined == baseline
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Client registries, pooled sessions and the Spotify token cache. Talks only to
+a local HTTP server, so it needs no network and no database.
+"""
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+from music_library_ledger.client_pool import ClientRegistry, get_client_registry, pooled_session
+from music_library_ledger.spotify.client import MemoryTokenCache
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"            # keep-alive, so connections can be reused
+
+    def do_GET(self) -> None:
+        if self.path == "/slow":
+            time.sleep(0.5)
+        body = b"ok"
+        try:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass                             # the client timed out and hung up
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class _Built:
+    def __init__(self, session: requests.Session) -> None:
+        self.session = session
+
+
+def registries() -> None:
+    builds: list[str] = []
+
+    def build(session: requests.Session) -> _Built:
+        builds.append("built")
+        time.sleep(0.01)                     # widen the race between first callers
+        return _Built(session)
+
+    # Every thread in the process gets the one client, built once.
+    registry = ClientRegistry(pool_size=2)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        clients = list(pool.map(lambda _: registry.get("api", build), range(16)))
+    assert len(builds) == 1 and all(client is clients[0] for client in clients)
+    assert registry.get("other", build) is not clients[0]
+    assert set(registry.stats()) == {"api", "other"}
+
+    # Registries don't share clients or sessions.
+    other = ClientRegistry(pool_size=2)
+    isolated = other.get("api", build)
+    assert isolated is not clients[0] and isolated.session is not clients[0].session
+    assert registry.get("api", build) is clients[0]
+
+    # clear() drops the clients; the next get() builds a new one.
+    registry.clear()
+    assert registry.stats() == {}
+    assert registry.get("api", build) is not clients[0]
+    assert len(builds) == 4
+
+    assert get_client_registry() is get_client_registry()
+
+
+def pooled_sessions() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        # Keep-alive: sequential requests share one connection.
+        registry = ClientRegistry(pool_size=2)
+        client = registry.get("local", _Built)
+        for _ in range(3):
+            client.session.get(f"{base}/fast").raise_for_status()
+        stats = registry.stats()["local"]
+        assert (stats.requests, stats.connections, stats.reused) == (3, 1, 2)
+        registry.clear()
+
+        # The default timeout applies to requests sent without one, and only to those.
+        session = pooled_session(pool_size=2, timeout=0.1)
+        assert session.request.__func__ is requests.Session.request  # not patched on the session
+        try:
+            session.get(f"{base}/slow")
+        except requests.exceptions.ReadTimeout:
+            pass
+        else:
+            raise AssertionError("expected the default timeout to apply")
+        assert session.get(f"{base}/slow", timeout=5).text == "ok"
+        session.close()
+
+        assert pooled_session(pool_size=2).get(f"{base}/slow").text == "ok"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def token_cache() -> None:
+    token = {"access_token": "a", "refresh_token": "r", "expires_at": 1}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "token_cache")
+
+        cache = MemoryTokenCache(path)
+        assert cache.get_cached_token() is None and cache.disk_reads == 1
+        cache.save_token_to_cache(token)
+        cache.save_token_to_cache(dict(token))   # unchanged: not rewritten
+        assert cache.disk_writes == 1
+
+        # Reads after the first come from memory, as copies.
+        served = cache.get_cached_token()
+        assert served == token
+        served["access_token"] = "mutated"
+        assert cache.get_cached_token() == token and cache.disk_reads == 1
+
+        cache.save_token_to_cache({**token, "access_token": "b"})
+        assert cache.disk_writes == 2
+
+        # A new cache picks up the last token written.
+        assert MemoryTokenCache(path).get_cached_token() == {**token, "access_token": "b"}
+
+
+def main() -> None:
+    registries()
+    pooled_sessions()
+    token_cache()
+    print("client pool smoke tests passed")
+
+
+if __name__ == "__main__":
+    main()
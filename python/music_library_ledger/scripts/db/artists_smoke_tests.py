@@ -1,5 +1,9 @@
 from music_library_ledger.db.connection import get_connection
-from music_library_ledger.db.tracks import TrackInput, upsert_track
+from music_library_ledger.db.tracks import (
+    TrackInput,
+    list_tracks_with_artists_missing_platform_mapping,
+    upsert_track,
+)
 from music_library_ledger.db.artists import (
     ArtistInput,
     get_or_create_artist,
@@ -26,23 +30,27 @@ def main() -> None:
         frank_uid = get_or_create_artist(conn, ArtistInput(name="Frank Ocean"))
         beyonce_uid = get_or_create_artist(conn, ArtistInput(name="Beyoncé"))
 
-        # Attach with explicit ordering
+        # Attach with explicit ordering (inserted out of order on purpose)
         attach_artist_to_track(
             conn,
             track_uid=track_uid,
-            artist_uid=frank_uid,
-            artist_order=0,
-            role="primary",
+            artist_uid=beyonce_uid,
+            artist_order=1,
+            role="featured",
         )
         attach_artist_to_track(
             conn,
             track_uid=track_uid,
-            artist_uid=beyonce_uid,
-            artist_order=1,
-            role="featured",
+            artist_uid=frank_uid,
+            artist_order=0,
+            role="primary",
         )
 
         rows = get_artists_for_track(conn, track_uid)
+        with_artists = {
+            t.track_uid: t
+            for t in list_tracks_with_artists_missing_platform_mapping(conn, "ytm", limit=100_000)
+        }
 
     print("Track UID:", track_uid)
     print("Artists (ordered):")
@@ -54,6 +62,8 @@ def main() -> None:
     assert rows[0]["name"] == "Frank Ocean"
     assert rows[0]["artist_order"] == 0
     assert rows[1]["artist_order"] == 1
+    # Names come back in artist_order, not insertion order.
+    assert with_artists[track_uid].artists == ("Frank Ocean", "Beyoncé")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+from music_library_ledger.db.connection import get_connection
+from music_library_ledger.db.tracks import TrackInput
+from music_library_ledger.db.bulk import BulkArtist, BulkTrack, BulkWriteStats, bulk_upsert_tracks
+from music_library_ledger.db.collections import (
+    CollectionInput,
+    get_or_create_collection,
+    get_collection_tracks,
+)
+from music_library_ledger.db.artists import get_artists_for_track
+from music_library_ledger.db.payloads import payload_from_row
+
+
+def _page() -> list[BulkTrack]:
+    return [
+        BulkTrack(
+            track=TrackInput(title="Nights", album="Blonde", duration_ms=307000, isrc="USUM71607007"),
+            platform_track_id="sp-nights",
+            artists=[BulkArtist(name="Frank Ocean", platform_artist_id="sp-frank")],
+            raw_json={"id": "sp-nights", "name": "Nights", "available_markets": ["US", "GB"] * 90},
+            added_at="2024-01-02T00:00:00Z",
+        ),
+        BulkTrack(
+            track=TrackInput(title="Pink + White", album="Blonde", duration_ms=184000),
+            platform_track_id="sp-pink",
+            artists=[
+                BulkArtist(name="Frank Ocean", platform_artist_id="sp-frank"),
+                BulkArtist(name="Beyoncé", platform_artist_id="sp-bey"),
+            ],
+        ),
+    ]
+
+
+def main() -> None:
+    conn = get_connection()
+
+    with conn:
+        col_uid = get_or_create_collection(
+            conn,
+            CollectionInput(name="Test Playlist - Bulk", collection_type="playlist"),
+        )
+        first = bulk_upsert_tracks(conn, _page(), platform="spotify", collection_uid=col_uid)
+        conn.execute(
+            """
+            UPDATE platform_tracks
+            SET last_verified_at = NULL
+            WHERE platform = 'spotify' AND platform_track_id = 'sp-nights';
+            """
+        )
+        conn.execute(
+            """
+            UPDATE platform_tracks
+            SET last_verified_at = '2000-01-01 00:00:00'
+            WHERE platform = 'spotify' AND platform_track_id = 'sp-pink';
+            """
+        )
+
+        # Re-ingesting the same page must resolve to the same tracks (ISRC or platform id)
+        # and rewrite nothing, while still stamping mappings not verified lately.
+        stats = BulkWriteStats()
+        second = bulk_upsert_tracks(conn, _page(), platform="spotify", collection_uid=col_uid, stats=stats)
+
+        rows = get_collection_tracks(conn, col_uid)
+        credits = get_artists_for_track(conn, first[1])
+        stored = conn.execute(
+            "SELECT * FROM platform_tracks WHERE platform = 'spotify' AND platform_track_id = 'sp-nights';"
+        ).fetchone()
+        stamped = conn.execute(
+            "SELECT last_verified_at FROM platform_tracks WHERE platform = 'spotify' AND platform_track_id = 'sp-pink';"
+        ).fetchone()[0]
+
+        # Verified a moment ago: a third ingest writes no mapping row at all.
+        before = conn.total_changes
+        bulk_upsert_tracks(conn, _page(), platform="spotify")
+        unchanged_writes = conn.total_changes - before
+
+    print("Collection UID:", col_uid)
+    for r in rows:
+        print(f"  pos={r['position']}: {r['title']}")
+
+    assert first == second
+    assert stats == BulkWriteStats(tracks_skipped=2, mappings_skipped=2)
+    assert stored["last_verified_at"] is not None
+    assert stamped != "2000-01-01 00:00:00"
+    assert unchanged_writes == 0, unchanged_writes
+    assert [r["title"] for r in rows] == ["Nights", "Pink + White"]
+    assert rows[0]["added_at"] == "2024-01-02T00:00:00Z"
+    assert [c["name"] for c in credits] == ["Frank Ocean", "Beyoncé"]
+    # Stored compressed, with the market list pruned.
+    assert stored["raw_json"] is None
+    assert payload_from_row(stored).value == {"id": "sp-nights", "name": "Nights"}
+
+
+if __name__ == "__main__":
+    main()
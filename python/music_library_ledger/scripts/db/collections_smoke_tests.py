@@ -1,3 +1,5 @@
+import re
+
 from music_library_ledger.db.connection import get_connection
 from music_library_ledger.db.tracks import TrackInput, upsert_track
 from music_library_ledger.db.collections import (
@@ -5,8 +7,11 @@ from music_library_ledger.db.collections import (
     get_or_create_collection,
     add_track_to_collection,
     get_collection_tracks,
+    get_collections_platform_tracks,
+    iter_collection_tracks,
     list_collections,
     remove_track_from_collection,
+    reconcile_collection_items,
 )
 
 
@@ -42,6 +47,16 @@ def main() -> None:
         remove_track_from_collection(conn, collection_uid=col_uid, track_uid=t1)
         rows_after_remove = get_collection_tracks(conn, col_uid)
 
+        # Reconcile to a new ordering: Nights back in, Pink + White first, Ivy dropped
+        delta = reconcile_collection_items(
+            conn,
+            collection_uid=col_uid,
+            items=[(t3, None), (t1, "2024-01-01 01:00:00+01:00")],
+        )
+        rows_after_reconcile = get_collection_tracks(conn, col_uid)
+        streamed = list(iter_collection_tracks(conn, col_uid, page_size=1))
+        prefetched = get_collections_platform_tracks(conn, [col_uid, "missing-collection"], platform="ytm")
+
     print("Collection UID:", col_uid)
     print("Tracks (ordered):")
     for r in rows:
@@ -58,6 +73,15 @@ def main() -> None:
     assert len(rows_after_remove) == 2
     assert all(r["title"] != "Nights" for r in rows_after_remove)
 
+    assert (delta.inserted, delta.deleted, delta.moved, delta.unchanged) == (1, 1, 1, 0)
+    assert [r["title"] for r in rows_after_reconcile] == ["Pink + White", "Nights"]
+    # added_at is stored as UTC 'YYYY-MM-DDTHH:MM:SSZ' whatever format it came in.
+    assert rows_after_reconcile[1]["added_at"] == "2024-01-01T00:00:00Z"
+    assert re.fullmatch(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z", rows_after_reconcile[0]["added_at"])
+    assert [r["track_uid"] for r in streamed] == [r["track_uid"] for r in rows_after_reconcile]
+    assert prefetched[col_uid] == [(r["track_uid"], None) for r in rows_after_reconcile]
+    assert prefetched["missing-collection"] == []
+
 
 if __name__ == "__main__":
     main()
@@ -1,3 +1,5 @@
+import sqlite3
+
 from music_library_ledger.db.connection import get_connection
 
 conn = get_connection()
@@ -6,3 +8,28 @@ rows = conn.execute("SELECT name FROM sqlite_master WHERE type='table';").fetcha
 print("Tables:")
 for r in rows:
     print(" -", r["name"])
+
+for profile in ("durable", "bulk", "query"):
+    c = get_connection(profile)
+    sync = c.execute("PRAGMA synchronous;").fetchone()[0]
+    mmap = c.execute("PRAGMA mmap_size;").fetchone()[0]
+    print(f"{profile}: synchronous={sync} mmap_size={mmap}")
+    c.close()
+
+ro = get_connection("query")
+try:
+    ro.execute("CREATE TABLE smoke_should_fail (x INTEGER);")
+except sqlite3.OperationalError:
+    pass
+else:
+    raise AssertionError("query profile accepted a write")
+ro.close()
+
+# Closing a bulk connection checkpoints the WAL but never commits an open transaction.
+bulk = get_connection("bulk")
+bulk.execute("INSERT INTO artists (artist_uid, name) VALUES ('smoke-uncommitted', 'Smoke Uncommitted');")
+bulk.close()
+conn = get_connection()
+left = conn.execute("SELECT COUNT(*) FROM artists WHERE name = 'Smoke Uncommitted';").fetchone()[0]
+assert left == 0, "closing the bulk connection committed an open transaction"
+conn.close()
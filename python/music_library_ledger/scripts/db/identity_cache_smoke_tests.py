@@ -0,0 +1,82 @@
+"""
+The shared identity cache is per database: ingesting into two databases in one
+process must not hand one database's uids to the other. Uses throwaway
+databases, so SQLITE_DB_PATH is not needed.
+"""
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from music_library_ledger.db.connection import get_connection
+from music_library_ledger.db.identity_cache import IdentityCache, get_identity_cache
+from music_library_ledger.db.platform import upsert_platform_track
+from music_library_ledger.db.schema import apply_schema
+from music_library_ledger.fakes.catalog import CatalogConfig, SyntheticCatalog
+from music_library_ledger.fakes.spotify import FakeSpotify
+from music_library_ledger.spotify.ingest_saved_tracks import ingest_saved_tracks
+
+CATALOG = CatalogConfig(tracks=200, artists=40, albums=60, playlists=1, saved_tracks=50, seed=9)
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    os.environ["SQLITE_DB_PATH"] = str(db_path)
+    conn = get_connection()
+    apply_schema(conn)
+    return conn
+
+
+def per_database(tmp: Path) -> None:
+    counts = []
+    for name in ("a.db", "b.db"):
+        conn = _connect(tmp / name)
+        try:
+            # No cache passed: both runs use the shared one for their database.
+            ingest_saved_tracks(conn, client=FakeSpotify(SyntheticCatalog(CATALOG)))
+            counts.append(conn.execute("SELECT COUNT(*) FROM collection_items;").fetchone()[0])
+        finally:
+            conn.close()
+    assert counts == [CATALOG.saved_tracks, CATALOG.saved_tracks], counts
+
+    a1, a2, b = _connect(tmp / "a.db"), _connect(tmp / "a.db"), _connect(tmp / "b.db")
+    try:
+        assert get_identity_cache(a1) is get_identity_cache(a2)
+        assert get_identity_cache(a1) is not get_identity_cache(b)
+    finally:
+        for conn in (a1, a2, b):
+            conn.close()
+
+    memory1, memory2 = sqlite3.connect(":memory:"), sqlite3.connect(":memory:")
+    try:
+        for conn in (memory1, memory2):
+            apply_schema(conn)
+        assert get_identity_cache(memory1) is not get_identity_cache(memory2)
+    finally:
+        memory1.close()
+        memory2.close()
+
+
+def warms_ytm_ids(tmp: Path) -> None:
+    conn = _connect(tmp / "ytm.db")
+    try:
+        # A private cache, so the shared one is first built below.
+        ingest_saved_tracks(conn, client=FakeSpotify(SyntheticCatalog(CATALOG)), cache=IdentityCache())
+        track_uid = conn.execute("SELECT track_uid FROM tracks LIMIT 1;").fetchone()[0]
+        with conn:
+            upsert_platform_track(conn, platform="ytm", platform_track_id="smoke-video", track_uid=track_uid)
+
+        # The exporters look up YT Music ids in it too.
+        assert get_identity_cache(conn).get_track_by_platform_id("ytm", "smoke-video") == track_uid
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        per_database(Path(tmp))
+        warms_ytm_ids(Path(tmp))
+    print("identity cache smoke tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from music_library_ledger.db.artists import ArtistInput, attach_artist_to_track, get_or_create_artist
+from music_library_ledger.db.connection import get_connection
+from music_library_ledger.db.search import rebuild_search_index, search_albums, search_artists, search_tracks
+from music_library_ledger.db.tracks import TrackInput, upsert_track
+
+conn = get_connection()
+with conn:
+    # The ISRC makes reruns resolve to the same track instead of adding another.
+    uid = upsert_track(
+        conn,
+        TrackInput(title="Pink + White", album="Blonde", duration_ms=184000, isrc="USUM71607008"),
+    )
+    for order, name in enumerate(["Frank Ocean", "Beyoncé"]):
+        artist_uid = get_or_create_artist(conn, ArtistInput(name=name))
+        attach_artist_to_track(conn, track_uid=uid, artist_uid=artist_uid, artist_order=order)
+
+    hits = search_tracks(conn, "pink beyonce")
+    for h in hits:
+        print(f"{h.score:.2f} {h.title} — {', '.join(h.artists)}")
+
+    # Triggers keep credits in order; diacritics and partial last words still match.
+    ours = [h for h in hits if h.track_uid == uid]
+    assert ours and ours[0].artists == ("Frank Ocean", "Beyoncé")
+    assert [a.name for a in search_artists(conn, "beyon")] == ["Beyoncé"]
+    assert search_tracks(conn, "blonde", field="title") == []
+
+    # Albums of the same name by different artists stay apart.
+    other = upsert_track(conn, TrackInput(title="Smoke Intro", album="Blonde", isrc="SMOKE0000001"))
+    other_artist = get_or_create_artist(conn, ArtistInput(name="Smoke Other Band"))
+    attach_artist_to_track(conn, track_uid=other, artist_uid=other_artist, artist_order=0)
+    albums = {al.artists[0] for al in search_albums(conn, "blond") if al.album == "Blonde" and al.artists}
+    assert {"Frank Ocean", "Smoke Other Band"} <= albums
+
+    # Credits attached out of order: the triggers and a rebuild both index them
+    # by artist_order.
+    trio = upsert_track(conn, TrackInput(title="Smoke Trio", album="Smoke Credits", isrc="SMOKE0000002"))
+    for order, name in [(2, "Smoke Third"), (0, "Smoke First"), (1, "Smoke Second")]:
+        artist_uid = get_or_create_artist(conn, ArtistInput(name=name))
+        attach_artist_to_track(conn, track_uid=trio, artist_uid=artist_uid, artist_order=order)
+
+    def indexed_artists() -> str:
+        return conn.execute(
+            """
+            SELECT s.artists
+            FROM track_search s
+            JOIN track_search_docs d ON d.docid = s.rowid
+            WHERE d.track_uid = ?;
+            """,
+            (trio,),
+        ).fetchone()[0]
+
+    by_triggers = indexed_artists()
+    assert by_triggers == "\x1f".join(["Smoke First", "Smoke Second", "Smoke Third"]), by_triggers
+    rebuild_search_index(conn)
+    assert indexed_artists() == by_triggers
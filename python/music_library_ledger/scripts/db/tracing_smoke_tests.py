@@ -0,0 +1,65 @@
+import gc
+import logging
+import os
+
+# Trace everything and treat every statement as slow, before the tracer is created.
+os.environ["LEDGER_SQL_TRACE"] = "1"
+os.environ["LEDGER_SQL_SLOW_MS"] = "0"
+
+from music_library_ledger.db.connection import get_connection
+from music_library_ledger.db.tracing import TracedConnection, get_tracer, statement_shape
+
+
+class _Capture(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+def shapes() -> None:
+    assert statement_shape("SELECT * FROM t WHERE a = 'x''y' AND b = 42;") == "SELECT * FROM t WHERE a = ? AND b = ?"
+    assert statement_shape("SELECT 1.5,\n   t1.c2  FROM t1") == "SELECT ?, t1.c2 FROM t1"
+    # Placeholders are kept; IN and VALUES lists of any length share one shape.
+    assert statement_shape("SELECT x FROM t WHERE id IN (?, ?, ?)") == "SELECT x FROM t WHERE id IN (?, ...)"
+    assert statement_shape("SELECT x FROM t WHERE id IN (?1,?2)") == statement_shape(
+        "SELECT x FROM t WHERE id IN (?,?,?,?)"
+    )
+    assert statement_shape("SELECT :name, ?3, $v, @w FROM t") == "SELECT :name, ?3, $v, @w FROM t"
+    assert (
+        statement_shape("INSERT INTO t VALUES (?, ?), (?, ?), (?, ?)")
+        == statement_shape("INSERT INTO t VALUES (1, 'a'), (2, 'b')")
+        == "INSERT INTO t VALUES (?, ...), ..."
+    )
+
+
+def deferred_plans() -> None:
+    capture = _Capture()
+    logging.getLogger("music_library_ledger.db.tracing").addHandler(capture)
+
+    conn = get_connection()
+    assert isinstance(conn, TracedConnection)
+    cur = conn.execute("SELECT track_uid FROM tracks WHERE title = ?;", ("smoke-tracing",))
+    explained_before = len([m for m in capture.messages if m.startswith("Query plan")])
+
+    # A cursor finished by the garbage collector records its timing but runs no query.
+    del cur
+    gc.collect()
+    assert [m for m in capture.messages if m.startswith("Query plan")][explained_before:] == []
+    assert ("SELECT track_uid FROM tracks WHERE title = ?;", ("smoke-tracing",)) in conn._pending_plans
+    assert "SELECT track_uid FROM tracks WHERE title = ?" in get_tracer().shapes
+
+    conn.close()
+    assert conn._pending_plans == []
+    assert any(m.startswith("Query plan for SELECT track_uid FROM tracks") for m in capture.messages)
+
+
+def main() -> None:
+    shapes()
+    deferred_plans()
+
+
+if __name__ == "__main__":
+    main()
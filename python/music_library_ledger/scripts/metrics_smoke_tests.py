@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from spotipy import SpotifyException
+
+from music_library_ledger.db.connection import get_connection
+from music_library_ledger.db.identity_cache import IdentityCache
+from music_library_ledger.db.schema import apply_schema
+from music_library_ledger.fakes.catalog import CatalogConfig, SyntheticCatalog
+from music_library_ledger.fakes.spotify import FakeSpotify
+from music_library_ledger.metrics import MeteredClient, RunMetrics, add_metrics_dir_argument, run_report
+from music_library_ledger.spotify.ingest_playlists import ingest_playlists
+
+
+class _FailingSpotify(FakeSpotify):
+    """Fails every items request of the second playlist listed."""
+
+    def playlist_items(self, playlist_id: str, *args, **kwargs):
+        if playlist_id == "fakeplaylist00001":
+            raise SpotifyException(404, -1, "smoke: gone", reason="Not Found")
+        return super().playlist_items(playlist_id, *args, **kwargs)
+
+
+def report_and_prometheus() -> None:
+    metrics = RunMetrics("smoke")
+    metrics.incr("rows_written", 3, table="tracks")
+    metrics.incr("rows_written", 2, table="tracks")
+    metrics.set_gauge("match_rate", 0.5)
+    metrics.observe("db_write", 0.25)
+    metrics.observe("db_write", 0.75)
+
+    catalog = SyntheticCatalog(CatalogConfig(tracks=50, artists=10, albums=10))
+    api = MeteredClient(FakeSpotify(catalog), metrics, api="spotify")
+    api.current_user_playlists(limit=5)
+    try:
+        api.playlist_items("nope")
+    except SpotifyException:
+        pass
+
+    assert metrics.counter("rows_written", table="tracks") == 5
+    assert metrics.counter("api_calls", api="spotify", method="playlist_items") == 1
+    assert metrics.counter("api_errors", api="spotify", method="playlist_items", status=404) == 1
+
+    report = metrics.report()
+    timer = next(t for t in report["timers"] if t["name"] == "db_write")
+    assert (timer["count"], timer["total_s"], timer["max_s"]) == (2, 1.0, 0.75)
+
+    text = metrics.prometheus_text(report)
+    assert '# TYPE ledger_rows_written_total counter' in text
+    assert 'ledger_rows_written_total{pipeline="smoke",table="tracks"} 5' in text
+    assert 'ledger_match_rate{pipeline="smoke"} 0.5' in text
+    assert 'ledger_db_write_seconds_count{pipeline="smoke"} 2' in text
+    assert 'ledger_run_success{pipeline="smoke"} 1' in text
+
+
+def failed_run_is_reported() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            with run_report("smoke_failed", directory) as metrics:
+                metrics.incr("rows_written", 7, table="tracks")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        report = json.loads((Path(directory) / "smoke_failed.json").read_text())
+        prom = (Path(directory) / "smoke_failed.prom").read_text()
+    assert report["status"] == "failed"
+    assert report["counters"] == [{"name": "rows_written", "labels": {"table": "tracks"}, "value": 7}]
+    assert 'ledger_run_success{pipeline="smoke_failed"} 0' in prom
+
+
+def metrics_dir_argument() -> None:
+    previous = os.environ.get("LEDGER_METRICS_DIR")
+    os.environ["LEDGER_METRICS_DIR"] = "/tmp/smoke-metrics"
+    try:
+        parser = argparse.ArgumentParser()
+        add_metrics_dir_argument(parser)
+        assert parser.parse_args([]).metrics_dir == "/tmp/smoke-metrics"
+        assert parser.parse_args(["--metrics-dir", "elsewhere"]).metrics_dir == "elsewhere"
+    finally:
+        if previous is None:
+            del os.environ["LEDGER_METRICS_DIR"]
+        else:
+            os.environ["LEDGER_METRICS_DIR"] = previous
+
+
+def failed_ingest_records_stats() -> None:
+    conn = get_connection()
+    try:
+        apply_schema(conn)
+        catalog = SyntheticCatalog(
+            CatalogConfig(tracks=300, artists=50, albums=80, playlists=3, playlist_size=20, seed=7)
+        )
+        metrics = RunMetrics("ingest_playlists")
+        try:
+            ingest_playlists(conn, client=_FailingSpotify(catalog), metrics=metrics, cache=IdentityCache())
+        except SpotifyException:
+            pass
+        else:
+            raise AssertionError("the second playlist should have failed the run")
+    finally:
+        conn.close()
+
+    # The first playlist was written before the failure, and the run says so.
+    tracks = metrics.counter("rows_written", table="tracks") + metrics.counter("rows_skipped", table="tracks")
+    assert tracks > 0
+
+
+def main() -> None:
+    report_and_prometheus()
+    failed_run_is_reported()
+    metrics_dir_argument()
+    failed_ingest_records_stats()
+    print("metrics smoke tests passed")
+
+
+if __name__ == "__main__":
+    main()
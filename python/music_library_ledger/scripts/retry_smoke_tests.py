@@ -0,0 +1,145 @@
+import os
+from typing import Optional
+
+from spotipy import SpotifyException
+
+from music_library_ledger.client_pool import ClientRegistry
+from music_library_ledger.fakes.catalog import CatalogConfig, SyntheticCatalog
+from music_library_ledger.fakes.faults import FaultConfig
+from music_library_ledger.fakes.spotify import FakeSpotify
+from music_library_ledger.fakes.ytmusic import FakeYTMusic
+from music_library_ledger.retry import (
+    NO_RETRY,
+    RATE_LIMIT_RETRY_POLICY,
+    RetryPolicy,
+    call_with_retry,
+    http_status,
+    retry_after_s,
+)
+
+
+class _Flaky:
+    """Raises each of `errors` in turn, then returns "ok"."""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def _sp_error(status: int, retry_after: Optional[float] = None) -> SpotifyException:
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+    return SpotifyException(status, -1, "smoke", headers=headers)
+
+
+def _expect(exc_type: type[BaseException], fn) -> BaseException:
+    try:
+        fn()
+    except exc_type as exc:
+        return exc
+    raise AssertionError(f"expected {exc_type.__name__}")
+
+
+def retry_policy() -> None:
+    sleeps: list[float] = []
+    retried: list[BaseException] = []
+
+    # Retry-After wins over the backoff, and is capped at max_delay_s.
+    flaky = _Flaky(_sp_error(429, 2.0), _sp_error(503), _sp_error(429, 120.0))
+    policy = RetryPolicy(attempts=4, base_delay_s=1.0, max_delay_s=30.0)
+    assert call_with_retry(flaky, policy=policy, sleep=sleeps.append, on_retry=retried.append) == "ok"
+    assert flaky.calls == 4 and len(retried) == 3
+    assert sleeps[0] == 2.0
+    assert 1.0 <= sleeps[1] <= 2.0                       # jittered 2nd backoff step
+    assert sleeps[2] == 30.0
+
+    # The last failed attempt is raised.
+    flaky = _Flaky(*(_sp_error(503) for _ in range(3)))
+    exc = _expect(SpotifyException, lambda: call_with_retry(flaky, policy=RetryPolicy(attempts=3), sleep=lambda s: None))
+    assert http_status(exc) == 503 and flaky.calls == 3
+
+    # Statuses outside the policy are not retried.
+    flaky = _Flaky(_sp_error(404))
+    _expect(SpotifyException, lambda: call_with_retry(flaky, sleep=lambda s: None))
+    assert flaky.calls == 1
+    flaky = _Flaky(_sp_error(503))
+    _expect(SpotifyException, lambda: call_with_retry(flaky, policy=RATE_LIMIT_RETRY_POLICY, sleep=lambda s: None))
+    assert flaky.calls == 1
+    flaky = _Flaky(_sp_error(429))
+    _expect(SpotifyException, lambda: call_with_retry(flaky, policy=NO_RETRY, sleep=lambda s: None))
+    assert flaky.calls == 1
+
+    _expect(ValueError, lambda: call_with_retry(lambda: None, policy=RetryPolicy(attempts=0)))
+
+
+def fakes() -> None:
+    catalog = SyntheticCatalog(CatalogConfig(tracks=200, artists=40, albums=60, playlists=3, saved_tracks=120))
+
+    # Paging objects cover the whole list and match a second client on the same seed.
+    sp = FakeSpotify(catalog)
+    items, offset = [], 0
+    while True:
+        page = sp.current_user_saved_tracks(limit=50, offset=offset)
+        items.extend(page["items"])
+        if page["next"] is None:
+            break
+        offset += page["limit"]
+    assert len(items) == page["total"] == 120
+    again = FakeSpotify(SyntheticCatalog(catalog.config)).current_user_saved_tracks(limit=50)
+    assert again["items"] == items[:50]
+    assert http_status(_expect(SpotifyException, lambda: sp.current_user_saved_tracks(limit=51))) == 400
+    assert http_status(_expect(SpotifyException, lambda: sp.playlist_items("nope"))) == 404
+
+    # Injected failures look like what the real clients raise.
+    limited = FakeSpotify(catalog, FaultConfig(rate_limit_rate=1.0, retry_after_s=3.0))
+    exc = _expect(SpotifyException, lambda: limited.current_user_playlists())
+    assert http_status(exc) == 429 and retry_after_s(exc) == 3.0
+    failing = FakeYTMusic(catalog, FaultConfig(error_rate=1.0))
+    exc = _expect(Exception, lambda: failing.search("anything"))
+    assert http_status(exc) == 503 and retry_after_s(exc) is None
+    assert failing.faults.calls == failing.faults.errors == 1
+
+    # A track is found by '<title> <first artist>'.
+    track = catalog.track(0)
+    hits = FakeYTMusic(catalog).search(f"{track['name']} {track['artists'][0]['name']}", filter="songs")
+    if catalog.on_ytm(0):
+        assert hits[0]["videoId"] == catalog.ytm_song(0)["videoId"]
+
+    # call_with_retry gets through a fake that rate-limits half its calls.
+    flaky_sp = FakeSpotify(catalog, FaultConfig(rate_limit_rate=0.5, retry_after_s=0.0, seed=1))
+    for _ in range(20):
+        call_with_retry(lambda: flaky_sp.current_user_playlists(), policy=RetryPolicy(attempts=20), sleep=lambda s: None)
+    assert flaky_sp.faults.rate_limited > 0
+
+
+def spotify_client_has_no_transport_retries() -> None:
+    from music_library_ledger.spotify.client import _build_spotify_client
+
+    for key in ("SPOTIFY_CLIENT_ID", "SPOTIFY_CLIENT_SECRET", "SPOTIFY_REDIRECT_URI", "SPOTIFY_SCOPES"):
+        os.environ.setdefault(key, "http://127.0.0.1:8888/callback" if key.endswith("URI") else "smoke")
+
+    registry = ClientRegistry(pool_size=2)
+    sp = registry.get("spotify", _build_spotify_client)
+    try:
+        # call_with_retry owns retries; urllib3 must not retry underneath it.
+        retries = sp._session.get_adapter("https://api.spotify.com").max_retries
+        assert retries.total == 0 and not retries.status_forcelist
+        assert sp.retries == 0 and sp.status_retries == 0
+    finally:
+        registry.clear()
+
+
+def main() -> None:
+    retry_policy()
+    fakes()
+    spotify_client_has_no_transport_retries()
+    print("retry smoke tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+The async playlist ingest must leave the database as the sequential one does,
+also when a playlist fetch fails partway through a run. Uses throwaway
+databases, so SQLITE_DB_PATH is not needed.
+"""
+import asyncio
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from spotipy import SpotifyException
+
+from music_library_ledger.db.connection import get_connection
+from music_library_ledger.db.identity_cache import IdentityCache
+from music_library_ledger.db.payloads import payload_from_row
+from music_library_ledger.db.schema import apply_schema
+from music_library_ledger.fakes.catalog import CatalogConfig, SyntheticCatalog
+from music_library_ledger.fakes.spotify import FakeSpotify
+from music_library_ledger.spotify.ingest_playlists import ingest_playlists
+from music_library_ledger.spotify.ingest_playlists_async import ingest_playlists_async
+
+CATALOG = CatalogConfig(
+    tracks=400, artists=60, albums=90, playlists=6, playlist_size=150, saved_tracks=100, seed=11
+)
+BROKEN_PLAYLIST = "fakeplaylist00003"
+
+
+class _BrokenPlaylist(FakeSpotify):
+    """Fails the second items page of one playlist, after its first page was served."""
+
+    def playlist_items(self, playlist_id: str, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        if playlist_id == BROKEN_PLAYLIST and kwargs.get("offset", 0) > 0:
+            raise SpotifyException(404, -1, "smoke: playlist went away", reason="Not Found")
+        return super().playlist_items(playlist_id, *args, **kwargs)
+
+
+def _state(conn: sqlite3.Connection) -> dict[str, Any]:
+    """What an ingest wrote, without the generated uids."""
+    playlists: dict[str, tuple[str, Any, list[tuple[Any, ...]]]] = {}
+    for pc in conn.execute(
+        """
+        SELECT pc.*, c.name
+        FROM platform_collections pc
+        JOIN collections c ON c.collection_uid = pc.collection_uid
+        WHERE pc.platform = 'spotify';
+        """
+    ):
+        items = conn.execute(
+            """
+            SELECT ci.position, t.title, t.isrc, ci.added_at
+            FROM collection_items ci
+            JOIN tracks t ON t.track_uid = ci.track_uid
+            WHERE ci.collection_uid = ?
+            ORDER BY ci.position;
+            """,
+            (pc["collection_uid"],),
+        ).fetchall()
+        payload = payload_from_row(pc).value
+        playlists[pc["platform_collection_id"]] = (pc["name"], payload, [tuple(r) for r in items])
+
+    tracks = sorted(
+        tuple(r)
+        for r in conn.execute(
+            """
+            SELECT pt.platform_track_id, t.title, t.isrc, t.duration_ms, t.content_hash,
+                   (SELECT group_concat(a.name || '@' || ta.artist_order, '|')
+                    FROM track_artists ta JOIN artists a ON a.artist_uid = ta.artist_uid
+                    WHERE ta.track_uid = t.track_uid)
+            FROM platform_tracks pt
+            JOIN tracks t ON t.track_uid = pt.track_uid
+            WHERE pt.platform = 'spotify';
+            """
+        )
+    )
+    return {"playlists": playlists, "tracks": tracks}
+
+
+def _run(mode: str, db_path: Path) -> tuple[dict[str, Any], dict[str, Any]]:
+    """(state after a run that fails on BROKEN_PLAYLIST, state after a clean rerun)."""
+    os.environ["SQLITE_DB_PATH"] = str(db_path)
+    conn = get_connection(check_same_thread=mode != "async")
+    try:
+        apply_schema(conn)
+        cache = IdentityCache()
+
+        def ingest(client: FakeSpotify) -> None:
+            if mode == "async":
+                # Small batches and several workers, so writes from different playlists interleave.
+                asyncio.run(
+                    ingest_playlists_async(conn, client=client, cache=cache, fetch_concurrency=3, batch_tracks=120)
+                )
+            else:
+                ingest_playlists(conn, client=client, cache=cache)
+
+        try:
+            ingest(_BrokenPlaylist(SyntheticCatalog(CATALOG)))
+        except SpotifyException:
+            pass
+        else:
+            raise AssertionError(f"{mode}: the broken playlist should have failed the run")
+        failed = _state(conn)
+
+        ingest(FakeSpotify(SyntheticCatalog(CATALOG)))
+        return failed, _state(conn)
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_failed, sync_full = _run("sync", Path(tmp) / "sync.db")
+        async_failed, async_full = _run("async", Path(tmp) / "async.db")
+
+    assert len(sync_full["playlists"]) == CATALOG.playlists
+    assert async_full == sync_full
+
+    # A failed run records only playlists whose items are all in, identical to a
+    # clean run's; the broken one is never marked as ingested.
+    for failed in (sync_failed, async_failed):
+        assert BROKEN_PLAYLIST not in failed["playlists"]
+        for playlist_id, playlist in failed["playlists"].items():
+            assert playlist == sync_full["playlists"][playlist_id], playlist_id
+    assert set(sync_failed["playlists"]) == {f"fakeplaylist{j:05d}" for j in range(3)}
+    print(
+        f"sync and async agree on {len(sync_full['playlists'])} playlists and {len(sync_full['tracks'])} tracks; "
+        f"after the failure: sync={len(sync_failed['playlists'])} async={len(async_failed['playlists'])} playlists"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Resuming an interrupted ingest after the list shrank must end with the list as it
+is now, the same as a fresh ingest. Uses throwaway databases, so SQLITE_DB_PATH
+is not needed.
+"""
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Any, Callable
+
+from spotipy import SpotifyException
+
+from music_library_ledger.db.connection import get_connection
+from music_library_ledger.db.identity_cache import IdentityCache
+from music_library_ledger.db.schema import apply_schema
+from music_library_ledger.fakes.catalog import CatalogConfig, SyntheticCatalog
+from music_library_ledger.fakes.spotify import FakeSpotify
+from music_library_ledger.spotify.ingest_playlists import ingest_playlists
+from music_library_ledger.spotify.ingest_saved_tracks import ingest_saved_tracks
+
+CATALOG = CatalogConfig(
+    tracks=400, artists=60, albums=90, playlists=2, playlist_size=250, saved_tracks=230, seed=5
+)
+PLAYLIST = "fakeplaylist00000"
+FAIL_AT = 100
+
+
+class _Interrupted(FakeSpotify):
+    """Fails every page from FAIL_AT on, as if the run died there."""
+
+    def current_user_saved_tracks(self, limit: int = 20, offset: int = 0, market: Any = None) -> dict[str, Any]:
+        if offset >= FAIL_AT:
+            raise SpotifyException(404, -1, "smoke: interrupted", reason="Not Found")
+        return super().current_user_saved_tracks(limit=limit, offset=offset, market=market)
+
+    def playlist_items(self, playlist_id: str, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        if playlist_id == PLAYLIST and kwargs.get("offset", 0) >= FAIL_AT:
+            raise SpotifyException(404, -1, "smoke: interrupted", reason="Not Found")
+        return super().playlist_items(playlist_id, *args, **kwargs)
+
+
+def _shrink(sp: FakeSpotify) -> FakeSpotify:
+    # Drop items from the head of both lists, so every later offset shifts.
+    sp.unsave_tracks(0, 1, 2)
+    sp.remove_playlist_items(PLAYLIST, 0, 1, 5)
+    return sp
+
+
+def _distinct_tracks(fetch: Callable[..., dict[str, Any]], page_size: int) -> int:
+    ids, offset = set(), 0
+    while True:
+        page = fetch(limit=page_size, offset=offset)
+        ids.update(item["track"]["id"] for item in page["items"])
+        if page["next"] is None:
+            return len(ids)
+        offset += page_size
+
+
+def _items(conn: sqlite3.Connection, collection_name: str) -> list[tuple[Any, ...]]:
+    return [
+        tuple(r)
+        for r in conn.execute(
+            """
+            SELECT ci.position, t.title, t.isrc
+            FROM collection_items ci
+            JOIN collections c ON c.collection_uid = ci.collection_uid
+            JOIN tracks t ON t.track_uid = ci.track_uid
+            WHERE c.name = ?
+            ORDER BY ci.position;
+            """,
+            (collection_name,),
+        )
+    ]
+
+
+def _run(db_path: Path, ingest: Callable[..., Any], collection_name: str, *, interrupt: bool) -> list[tuple[Any, ...]]:
+    os.environ["SQLITE_DB_PATH"] = str(db_path)
+    conn = get_connection()
+    try:
+        apply_schema(conn)
+        cache = IdentityCache()
+        if interrupt:
+            try:
+                ingest(conn, client=_Interrupted(SyntheticCatalog(CATALOG)), cache=cache)
+            except SpotifyException:
+                pass
+            else:
+                raise AssertionError("the interrupted run should have failed")
+        ingest(conn, client=_shrink(FakeSpotify(SyntheticCatalog(CATALOG))), cache=cache, resume=interrupt)
+        return _items(conn, collection_name)
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    shrunk = _shrink(FakeSpotify(SyntheticCatalog(CATALOG)))
+    cases = [
+        ("saved tracks", ingest_saved_tracks, "Liked Songs", _distinct_tracks(shrunk.current_user_saved_tracks, 50)),
+        (
+            "playlist",
+            ingest_playlists,
+            shrunk.catalog.playlist(0)["name"],
+            _distinct_tracks(lambda **page: shrunk.playlist_items(PLAYLIST, **page), 100),
+        ),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for n, (label, ingest, collection_name, expected_len) in enumerate(cases):
+            resumed = _run(Path(tmp) / f"resumed{n}.db", ingest, collection_name, interrupt=True)
+            fresh = _run(Path(tmp) / f"fresh{n}.db", ingest, collection_name, interrupt=False)
+            assert len(fresh) == expected_len, (label, len(fresh))
+            assert resumed == fresh, label
+            print(f"{label}: resumed run matches a fresh one ({len(fresh)} items)")
+
+
+if __name__ == "__main__":
+    main()
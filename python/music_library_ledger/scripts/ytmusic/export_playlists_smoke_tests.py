@@ -0,0 +1,76 @@
+"""
+export_playlists picks the most recently updated collections first, and a
+resumed run still exports collections edited after the interrupted run started.
+Uses a throwaway database, so SQLITE_DB_PATH is not needed.
+"""
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from music_library_ledger.db.connection import get_connection
+from music_library_ledger.db.identity_cache import IdentityCache
+from music_library_ledger.db.schema import apply_schema
+from music_library_ledger.fakes.catalog import CatalogConfig, SyntheticCatalog
+from music_library_ledger.fakes.spotify import FakeSpotify
+from music_library_ledger.fakes.ytmusic import FakeYTMusic
+from music_library_ledger.metrics import RunMetrics
+from music_library_ledger.spotify.ingest_playlists import ingest_playlists
+from music_library_ledger.ytmusic.export_playlists import export_playlists_to_ytmusic
+from music_library_ledger.ytmusic.export_tracks import export_tracks_to_ytmusic
+
+CATALOG = CatalogConfig(tracks=300, artists=50, albums=80, playlists=6, playlist_size=20, seed=4)
+
+
+def _exported(ytm: FakeYTMusic) -> list[str]:
+    return sorted(p["title"] for p in ytm.playlists.values())
+
+
+def main() -> None:
+    logging.getLogger("music_library_ledger").setLevel(logging.ERROR)
+    catalog = SyntheticCatalog(CATALOG)
+    ytm = FakeYTMusic(catalog)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SQLITE_DB_PATH"] = str(Path(tmp) / "export.db")
+        conn = get_connection()
+        try:
+            apply_schema(conn)
+            ingest_playlists(conn, client=FakeSpotify(catalog), cache=IdentityCache())
+            # Distinct recency: the first playlist is the most recently updated.
+            names = [catalog.playlist(j)["name"] for j in range(CATALOG.playlists)]
+            with conn:
+                for j, name in enumerate(names):
+                    conn.execute(
+                        "UPDATE collections SET updated_at = datetime('now', ?) WHERE name = ?;",
+                        (f"-{j + 1} hours", name),
+                    )
+        finally:
+            conn.close()
+        export_tracks_to_ytmusic(client=ytm, requests_per_second=None, search_cache_config=None)
+
+        # --limit picks the most recently updated collections.
+        metrics = RunMetrics("export_playlists")
+        export_playlists_to_ytmusic(client=ytm, metrics=metrics, limit=2, requests_per_second=None)
+        assert _exported(ytm) == sorted(names[:2]), _exported(ytm)
+        # Each playlist is counted once, under its outcome.
+        assert metrics.counter("playlists", outcome="created") == 2
+        assert metrics.counter("playlists", outcome="exported") == 0
+
+        # The oldest collection is edited after that run started, which moves it
+        # ahead of the checkpoint; the resumed run exports it first.
+        conn = get_connection()
+        try:
+            with conn:
+                conn.execute("UPDATE collections SET updated_at = datetime('now') WHERE name = ?;", (names[-1],))
+        finally:
+            conn.close()
+        export_playlists_to_ytmusic(client=ytm, limit=2, requests_per_second=None, resume=True)
+        assert _exported(ytm) == sorted(names[:3] + names[-1:]), _exported(ytm)
+
+        export_playlists_to_ytmusic(client=ytm, limit=100, requests_per_second=None, resume=True)
+        assert _exported(ytm) == sorted(names)
+    print(f"exported {len(names)} collections over three runs, most recent first")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+The search cache serves repeated searches, but never replays a failed match to
+a retry. Uses a throwaway database, so SQLITE_DB_PATH is not needed.
+"""
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from music_library_ledger.db.connection import get_connection
+from music_library_ledger.db.identity_cache import IdentityCache
+from music_library_ledger.db.schema import apply_schema
+from music_library_ledger.fakes.catalog import CatalogConfig, SyntheticCatalog
+from music_library_ledger.fakes.spotify import FakeSpotify
+from music_library_ledger.fakes.ytmusic import FakeYTMusic
+from music_library_ledger.metrics import RunMetrics
+from music_library_ledger.spotify.ingest_saved_tracks import ingest_saved_tracks
+from music_library_ledger.ytmusic.export_tracks import export_tracks_to_ytmusic
+
+CATALOG = CatalogConfig(tracks=300, artists=50, albums=80, playlists=1, saved_tracks=40, seed=3)
+
+
+def _export(**kwargs) -> RunMetrics:
+    metrics = RunMetrics("export_tracks")
+    export_tracks_to_ytmusic(
+        client=FakeYTMusic(SyntheticCatalog(CATALOG)), metrics=metrics, requests_per_second=None, **kwargs
+    )
+    return metrics
+
+
+def _searches(metrics: RunMetrics) -> int:
+    return metrics.counter("api_calls", api="ytm", method="search")
+
+
+def main() -> None:
+    logging.getLogger("music_library_ledger.ytmusic.export_tracks").setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SQLITE_DB_PATH"] = str(Path(tmp) / "export.db")
+        conn = get_connection()
+        try:
+            apply_schema(conn)
+            ingest_saved_tracks(conn, client=FakeSpotify(SyntheticCatalog(CATALOG)), cache=IdentityCache())
+        finally:
+            conn.close()
+
+        # A second dry run repeats every search, all from the cache.
+        first = _export(dry_run=True)
+        assert _searches(first) >= CATALOG.saved_tracks
+        assert _searches(_export(dry_run=True)) == 0
+
+        # Nothing matches: every track gets a failed attempt, and its responses stay cached.
+        failed = _export(min_score=2.0)
+        assert failed.counter("tracks_unmatched") == CATALOG.saved_tracks
+        assert _searches(failed) == 0
+
+        # Retries search YT Music again instead of replaying the cached misses.
+        retried = _export(ignore_backoff=True)
+        assert _searches(retried) == _searches(first)
+        assert retried.counter("tracks_matched") > 0
+        print(f"{_searches(first)} searches cached; retries of {CATALOG.saved_tracks} failed matches searched again")
+
+
+if __name__ == "__main__":
+    main()
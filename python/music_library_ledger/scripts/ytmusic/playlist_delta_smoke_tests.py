@@ -0,0 +1,103 @@
+"""
+plan_playlist_delta plans, applied to FakeYTMusic the way export_playlists
+applies them, must leave each playlist holding exactly the target, in order.
+Needs no database.
+"""
+import random
+
+from music_library_ledger.fakes.catalog import CatalogConfig, SyntheticCatalog
+from music_library_ledger.fakes.ytmusic import FakeYTMusic
+from music_library_ledger.metrics import RunMetrics
+from music_library_ledger.ytmusic.export_playlists import _apply_delta
+from music_library_ledger.ytmusic.playlist_delta import (
+    PlaylistDelta,
+    RemoteItem,
+    plan_playlist_delta,
+    remote_items_from_playlist,
+)
+from music_library_ledger.ytmusic.rate_limit import RateLimiter
+
+CHUNK_SIZE = 5
+
+
+def _apply(remote_ids: list[str], desired: list[str], *, batch_size=None) -> tuple[PlaylistDelta, list[str]]:
+    """(the plan, the playlist's video ids once it is applied)."""
+    ytm = FakeYTMusic(SyntheticCatalog(CatalogConfig(tracks=10, artists=5, albums=5)))
+    playlist_id = ytm.create_playlist("smoke", "", video_ids=remote_ids)
+    remote = remote_items_from_playlist(ytm.get_playlist(playlist_id, limit=None))
+    delta = plan_playlist_delta(remote, desired, batch_size=batch_size)
+    _apply_delta(
+        ytm,
+        playlist_id,
+        delta,
+        remote,
+        chunk_size=CHUNK_SIZE,
+        limiter=RateLimiter(None),
+        on_retry=lambda exc: None,
+        metrics=RunMetrics("smoke"),
+    )
+    return delta, [item.video_id for item in remote_items_from_playlist(ytm.get_playlist(playlist_id, limit=None))]
+
+
+def _check(remote_ids: list[str], desired: list[str], *, batch_size=None) -> PlaylistDelta:
+    delta, result = _apply(remote_ids, desired, batch_size=batch_size)
+    assert result == desired, (remote_ids, desired, result)
+    # Planning again from the result has nothing left to do.
+    assert plan_playlist_delta([RemoteItem(v, None) for v in result], desired).empty
+    return delta
+
+
+def planned_edits() -> None:
+    ids = [f"v{idx:02d}" for idx in range(20)]
+
+    assert _check(ids[:6], ids[:6]).empty
+    assert _check([], ids[:4]).add == ids[:4]
+
+    # An empty target removes everything, duplicates included.
+    delta = _check(["v00", "v01", "v00"], [])
+    assert len(delta.remove) == 3 and not delta.add and not delta.moves
+
+    # Duplicate entries: the first copy is kept, the later ones removed.
+    delta = _check(["v00", "v01", "v00", "v02", "v01"], ["v00", "v01", "v02"])
+    assert [item.video_id for item in delta.remove] == ["v00", "v01"] and not delta.moves
+
+    # Only entries outside the longest run already in order are moved.
+    delta = _check(ids[:8], [ids[7]] + ids[:7])
+    assert delta.moves == [(ids[7], ids[0])]
+    delta = _check(["v03", "v00", "v09", "v01", "v02"], ["v00", "v01", "v02", "v03", "v04"])
+    assert {v for v, _ in delta.moves} == {"v03"}
+    assert [item.video_id for item in delta.remove] == ["v09"] and delta.add == ["v04"]
+
+
+def rebuild_cutoff() -> None:
+    ids = [f"v{idx:02d}" for idx in range(20)]
+
+    # Reversed: 19 moves, against 4 remove and 4 add calls for a rebuild.
+    moved = _check(ids, ids[::-1])
+    assert len(moved.moves) == 19
+    rebuilt = _check(ids, ids[::-1], batch_size=CHUNK_SIZE)
+    assert [item.video_id for item in rebuilt.remove] == ids and rebuilt.add == ids[::-1] and not rebuilt.moves
+
+    # One move is cheaper than rebuilding.
+    delta = _check(ids, ids[1:] + ids[:1], batch_size=CHUNK_SIZE)
+    assert len(delta.moves) == 1 and not delta.remove and not delta.add
+
+
+def random_plans() -> None:
+    rng = random.Random(7)
+    pool = [f"v{idx:02d}" for idx in range(30)]
+    for trial in range(200):
+        remote_ids = [rng.choice(pool) for _ in range(rng.randint(0, 25))]
+        desired = rng.sample(pool, rng.randint(0, 20))
+        _check(remote_ids, desired, batch_size=CHUNK_SIZE if trial % 2 else None)
+
+
+def main() -> None:
+    planned_edits()
+    rebuild_cutoff()
+    random_plans()
+    print("playlist delta smoke tests passed")
+
+
+if __name__ == "__main__":
+    main()
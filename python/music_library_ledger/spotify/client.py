@@ -1,9 +1,51 @@
 import os
+import threading
+from typing import Any, Optional
+
+import requests
 import spotipy
+from spotipy.cache_handler import CacheFileHandler, CacheHandler
 from spotipy.oauth2 import SpotifyOAuth
 
+from music_library_ledger.client_pool import get_client_registry
 
-def get_spotify_client() -> spotipy.Spotify:
+TOKEN_CACHE_PATH = ".spotify_token_cache"
+
+
+class MemoryTokenCache(CacheHandler):
+    """
+    Token cache for SpotifyOAuth, which asks for the token before every request.
+    The file is read once; after that the token is served from memory and the
+    file is only rewritten when a refresh actually changes it.
+    """
+
+    def __init__(self, cache_path: str = TOKEN_CACHE_PATH) -> None:
+        self._file = CacheFileHandler(cache_path=cache_path)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._token: Optional[dict[str, Any]] = None
+        self.disk_reads = 0
+        self.disk_writes = 0
+
+    def get_cached_token(self) -> Optional[dict[str, Any]]:
+        with self._lock:
+            if not self._loaded:
+                self._token = self._file.get_cached_token()
+                self._loaded = True
+                self.disk_reads += 1
+            return dict(self._token) if self._token is not None else None
+
+    def save_token_to_cache(self, token_info: dict[str, Any]) -> None:
+        with self._lock:
+            self._loaded = True
+            if token_info == self._token:
+                return
+            self._token = dict(token_info)
+            self._file.save_token_to_cache(token_info)
+            self.disk_writes += 1
+
+
+def _build_spotify_client(session: requests.Session) -> spotipy.Spotify:
     scopes = os.environ["SPOTIFY_SCOPES"]
     return spotipy.Spotify(
         auth_manager=SpotifyOAuth(
@@ -12,6 +54,17 @@ def get_spotify_client() -> spotipy.Spotify:
             redirect_uri=os.environ["SPOTIFY_REDIRECT_URI"],
             scope=scopes,
             open_browser=True,
-            cache_path=".spotify_token_cache",
-        )
+            cache_handler=MemoryTokenCache(TOKEN_CACHE_PATH),
+            requests_session=session,
+        ),
+        requests_session=session,
+        # Every pipeline call goes through retry.call_with_retry; retrying in
+        # urllib3 as well would multiply the attempts a 429 gets.
+        retries=0,
+        status_retries=0,
     )
+
+
+def get_spotify_client() -> spotipy.Spotify:
+    """The process-wide Spotify client, built on first use."""
+    return get_client_registry().get("spotify", _build_spotify_client)
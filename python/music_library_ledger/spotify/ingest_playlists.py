@@ -1,30 +1,105 @@
 from __future__ import annotations
 
+import argparse
 import sqlite3
-from typing import Any, Optional
-
-from music_library_ledger.db.tracks import TrackInput, upsert_track
-from music_library_ledger.db.artists import ArtistInput, get_or_create_artist, attach_artist_to_track
-from music_library_ledger.db.collections import CollectionInput, get_or_create_collection, add_track_to_collection
-from music_library_ledger.db.platform import upsert_platform_track, upsert_platform_artist, upsert_platform_collection
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+import spotipy
+
+from music_library_ledger.db.bulk import BulkWriteStats, bulk_upsert_tracks
+from music_library_ledger.db.collections import (
+    CollectionReconcileResult,
+    get_or_create_collection,
+    reconcile_collection_items,
+)
+from music_library_ledger.db.identity_cache import IdentityCache, get_identity_cache
+from music_library_ledger.db.jobs import (
+    clear_job_items,
+    complete_job,
+    load_job_items,
+    save_job_cursor,
+    stage_job_items,
+    start_job,
+)
+from music_library_ledger.db.payloads import payload_from_row
+from music_library_ledger.db.platform import get_platform_collection, upsert_platform_collection
+from music_library_ledger.metrics import MeteredClient, RunMetrics, add_metrics_dir_argument, run_report
 from music_library_ledger.spotify.client import get_spotify_client
-
-
-def _spotify_url(obj: dict) -> Optional[str]:
-    ext = obj.get("external_urls") or {}
-    return ext.get("spotify")
-
-
-def _as_dict(x: Any) -> Optional[dict]:
-    return x if isinstance(x, dict) else None
+from music_library_ledger.spotify.paging import (
+    DEFAULT_PREFETCH_WORKERS,
+    PLAYLIST_ITEMS_PAGE_LIMIT,
+    PLAYLISTS_PAGE_LIMIT,
+    iter_pages,
+)
+from music_library_ledger.spotify.transform import (
+    as_dict,
+    bulk_tracks_from_page,
+    collection_input_from_playlist,
+    spotify_url,
+)
+
+JOB_NAME = "ingest_playlists"
+
+
+@dataclass
+class PlaylistSyncStats:
+    new: int = 0
+    refreshed: int = 0
+    skipped: int = 0
+    items_inserted: int = 0
+    items_deleted: int = 0
+    items_moved: int = 0
+    writes: BulkWriteStats = field(default_factory=BulkWriteStats)
+
+
+def _stored_snapshot_id(conn: sqlite3.Connection, playlist_id: str) -> tuple[bool, Optional[str]]:
+    """Return (known, snapshot_id) for the playlist as of the last completed ingest."""
+    row = get_platform_collection(conn, platform="spotify", platform_collection_id=playlist_id)
+    if row is None:
+        return False, None
+    try:
+        return True, payload_from_row(row).get("snapshot_id")
+    except ValueError:
+        return True, None
+
+
+def _iter_listed_playlists(
+    sp: spotipy.Spotify,
+    *,
+    start: int,
+    prefetch_workers: int,
+    metrics: RunMetrics,
+) -> Iterator[tuple[int, dict]]:
+    """(offset in the listing, simplified playlist) for every playlist from `start` on."""
+    first_page = start - start % PLAYLISTS_PAGE_LIMIT
+    pages = iter_pages(
+        lambda limit, offset: sp.current_user_playlists(limit=limit, offset=offset),
+        limit=PLAYLISTS_PAGE_LIMIT,
+        start=first_page,
+        max_workers=prefetch_workers,
+        on_retry=metrics.retry_hook("spotify"),
+    )
+    offset = first_page
+    for page in pages:
+        for pl in page.get("items", []) or []:
+            if offset >= start:
+                yield offset, pl
+            offset += 1
 
 
 def ingest_playlists(
     conn: sqlite3.Connection,
     *,
+    client: Optional[spotipy.Spotify] = None,
+    metrics: Optional[RunMetrics] = None,
     include_private: bool = True,
     limit_playlists: Optional[int] = None,
-) -> None:
+    cache: Optional[IdentityCache] = None,
+    prefetch_workers: int = DEFAULT_PREFETCH_WORKERS,
+    incremental: bool = False,
+    resume: bool = False,
+) -> PlaylistSyncStats:
     """
     Ingest all user-visible playlists (public + private + collaborative, depending on scopes)
     and store:
@@ -32,22 +107,41 @@ def ingest_playlists(
       - platform_collections mapping (spotify playlist id -> collection_uid)
       - playlist items as collection_items with stable position + added_at
       - tracks/artists + platform mappings as needed
+
+    With incremental=True, playlists whose snapshot_id matches the one stored in
+    their platform_collections payload are skipped without downloading their items.
+    The playlist object (and its snapshot_id) is only stored after its items have
+    been ingested, so an interrupted run never marks a playlist as up to date.
+
+    Progress (listing offset, and item offset within the current playlist) is
+    checkpointed in sync_jobs with each page written. With resume=True, a run
+    that was interrupted (or stopped by limit_playlists) continues from there;
+    a playlist whose snapshot_id has changed since is read again from the start.
+
+    `client` defaults to an authenticated spotipy client; pass a stand-in (e.g.
+    fakes.spotify.FakeSpotify) to run offline. API calls, retries, DB write
+    time and rows written are recorded into `metrics` when given.
     """
-    sp = get_spotify_client()
+    metrics = metrics if metrics is not None else RunMetrics("ingest_playlists")
+    sp = MeteredClient(client if client is not None else get_spotify_client(), metrics, api="spotify")
+    cache = cache if cache is not None else get_identity_cache(conn)
 
-    playlist_page_limit = 50
-    playlist_offset = 0
-    ingested_playlists = 0
+    with conn:
+        checkpoint = start_job(conn, JOB_NAME, resume=resume)
 
-    while True:
-        page = sp.current_user_playlists(limit=playlist_page_limit, offset=playlist_offset)
-        playlists = page.get("items", []) or []
-        if not playlists:
-            break
+    stats = PlaylistSyncStats()
+    ingested_playlists = 0
 
-        for pl in playlists:
+    try:
+        listed = _iter_listed_playlists(
+            sp,
+            start=checkpoint.get("playlist_offset", 0),
+            prefetch_workers=prefetch_workers,
+            metrics=metrics,
+        )
+        for playlist_offset, pl in listed:
             if limit_playlists is not None and ingested_playlists >= limit_playlists:
-                return
+                break
 
             playlist_id = pl.get("id")
             if not playlist_id:
@@ -59,149 +153,230 @@ def ingest_playlists(
             if not include_private and is_public is False:
                 continue
 
-            playlist_name = (pl.get("name") or "").strip() or f"Unnamed Playlist ({playlist_id})"
-            playlist_desc = pl.get("description")
-            playlist_url = _spotify_url(pl)
+            known, stored_snapshot = _stored_snapshot_id(conn, playlist_id)
+            snapshot_id = pl.get("snapshot_id")
+            if incremental and known and snapshot_id and snapshot_id == stored_snapshot:
+                stats.skipped += 1
+                metrics.incr("playlists", outcome="skipped")
+                ingested_playlists += 1
+                continue
 
-            # Create/resolve canonical collection
-            with conn:
-                collection_uid = get_or_create_collection(
-                    conn,
-                    CollectionInput(
-                        name=playlist_name,
-                        collection_type="playlist",
-                        description=playlist_desc,
-                    ),
-                )
+            # Pick up mid-playlist only if neither the listing nor the playlist has
+            # changed since the checkpoint: a new snapshot_id means items may have
+            # been removed or moved, so the saved item offset no longer lines up.
+            item_offset = 0
+            if (
+                checkpoint.get("playlist_offset") == playlist_offset
+                and checkpoint.get("playlist_id") == playlist_id
+                and snapshot_id
+                and checkpoint.get("snapshot_id") == snapshot_id
+            ):
+                item_offset = checkpoint.get("item_offset", 0)
 
-                upsert_platform_collection(
-                    conn,
-                    platform="spotify",
-                    platform_collection_id=playlist_id,
-                    collection_uid=collection_uid,
-                    playlist_url=playlist_url,
-                    raw_json=_as_dict(pl),
-                )
+            # Create/resolve canonical collection
+            with metrics.timer("db_write"), conn:
+                collection_uid = get_or_create_collection(conn, collection_input_from_playlist(pl))
+                if not item_offset:
+                    clear_job_items(conn, JOB_NAME)
 
             # Ingest items for this playlist
-            _ingest_playlist_items(
+            delta = _ingest_playlist_items(
                 conn,
+                sp,
                 playlist_id=playlist_id,
                 collection_uid=collection_uid,
+                cache=cache,
+                prefetch_workers=prefetch_workers,
+                writes=stats.writes,
+                metrics=metrics,
+                checkpoint={
+                    "playlist_offset": playlist_offset,
+                    "playlist_id": playlist_id,
+                    "snapshot_id": snapshot_id,
+                },
+                start=item_offset,
             )
 
+            # Record the playlist (and its snapshot_id) once its items are in.
+            with metrics.timer("db_write"), conn:
+                upsert_platform_collection(
+                    conn,
+                    platform="spotify",
+                    platform_collection_id=playlist_id,
+                    collection_uid=collection_uid,
+                    playlist_url=spotify_url(pl),
+                    raw_json=as_dict(pl),
+                )
+                clear_job_items(conn, JOB_NAME)
+                save_job_cursor(conn, JOB_NAME, {"playlist_offset": playlist_offset + 1})
+
+            stats.items_inserted += delta.inserted
+            stats.items_deleted += delta.deleted
+            stats.items_moved += delta.moved
+            if known:
+                stats.refreshed += 1
+            else:
+                stats.new += 1
+            metrics.incr("playlists", outcome="refreshed" if known else "new")
             ingested_playlists += 1
+        else:
+            with conn:
+                complete_job(conn, JOB_NAME)
+    finally:
+        # Failed runs report what they wrote too.
+        _record_stats(metrics, stats)
+    return stats
 
-        playlist_offset += playlist_page_limit
+
+def _record_stats(metrics: RunMetrics, stats: PlaylistSyncStats) -> None:
+    stats.writes.record(metrics)
+    metrics.incr("collection_items", stats.items_inserted, change="inserted")
+    metrics.incr("collection_items", stats.items_deleted, change="deleted")
+    metrics.incr("collection_items", stats.items_moved, change="moved")
 
 
 def _ingest_playlist_items(
     conn: sqlite3.Connection,
+    sp: spotipy.Spotify,
     *,
     playlist_id: str,
     collection_uid: str,
-) -> None:
-    # Clear existing items for idempotency
-    conn.execute("DELETE FROM collection_items WHERE collection_uid = ?;", (collection_uid,))
-
-    sp = get_spotify_client()
-
-    item_limit = 100
-    item_offset = 0
-    position = 0
-
-    while True:
-        page = sp.playlist_items(
+    cache: IdentityCache,
+    prefetch_workers: int,
+    writes: BulkWriteStats,
+    metrics: RunMetrics,
+    checkpoint: dict[str, Any],
+    start: int = 0,
+) -> CollectionReconcileResult:
+    # Tracks are written page by page; the playlist's items are reconciled
+    # against what we have in one transaction once every page is in. Items are
+    # staged in sync_job_items alongside, so a resumed run (start > 0) has the
+    # pages before `start` without fetching them again.
+    items: list[tuple[str, Optional[str]]] = load_job_items(conn, JOB_NAME) if start else []
+
+    pages = iter_pages(
+        lambda limit, offset: sp.playlist_items(
             playlist_id,
-            limit=item_limit,
-            offset=item_offset,
+            limit=limit,
+            offset=offset,
             additional_types=("track",),
-        )
-        items = page.get("items", []) or []
-        if not items:
-            break
-
-        with conn:
-            for item in items:
-                added_at = item.get("added_at")
-
-                t = item.get("track") or {}
-                if not isinstance(t, dict) or not t:
-                    continue
-
-                # Spotify sometimes returns local/unavailable items without an id
-                spotify_track_id = t.get("id")
-                if not spotify_track_id:
-                    continue
-
-                track_name = t.get("name") or "UNKNOWN TITLE"
+        ),
+        limit=PLAYLIST_ITEMS_PAGE_LIMIT,
+        start=start,
+        max_workers=prefetch_workers,
+        on_retry=metrics.retry_hook("spotify"),
+    )
+    offset = start
+    for page in pages:
+        rows = bulk_tracks_from_page(page)
+        offset += PLAYLIST_ITEMS_PAGE_LIMIT
+        with metrics.timer("db_write"), cache.transaction(conn):
+            track_uids = bulk_upsert_tracks(
+                conn,
+                rows,
+                platform="spotify",
+                match_confidence=1.0,
+                match_method="spotify_id",
+                cache=cache,
+                stats=writes,
+            )
+            page_items = list(zip(track_uids, (r.added_at for r in rows)))
+            stage_job_items(conn, JOB_NAME, page_items, start_seq=len(items))
+            save_job_cursor(conn, JOB_NAME, {**checkpoint, "item_offset": offset})
+        items.extend(page_items)
 
-                track_uid = upsert_track(
-                    conn,
-                    TrackInput(
-                        title=track_name,
-                        album=(t.get("album") or {}).get("name"),
-                        duration_ms=t.get("duration_ms"),
-                        isrc=((t.get("external_ids") or {}).get("isrc")),
-                        explicit=t.get("explicit"),
-                        media_type="song",
-                        source_url=_spotify_url(t),
-                        canonical_platform="spotify",
-                    ),
-                )
+    with metrics.timer("db_write"), conn:
+        return reconcile_collection_items(conn, collection_uid=collection_uid, items=items)
 
-                upsert_platform_track(
-                    conn,
-                    platform="spotify",
-                    platform_track_id=spotify_track_id,
-                    track_uid=track_uid,
-                    song_url=_spotify_url(t),
-                    raw_json=_as_dict(t),
-                    match_confidence=1.0,
-                    match_method="spotify_id",
-                )
 
-                # Artists in order
-                artists = t.get("artists") or []
-                for idx, a in enumerate(artists):
-                    if not isinstance(a, dict):
-                        continue
-                    artist_uid = get_or_create_artist(conn, ArtistInput(name=a.get("name") or ""))
-                    attach_artist_to_track(
+def main() -> None:
+    from music_library_ledger.db.connection import get_connection
+    from music_library_ledger.db.schema import apply_schema
+    from music_library_ledger.spotify.ingest_playlists_async import DEFAULT_BATCH_TRACKS, DEFAULT_FETCH_CONCURRENCY
+
+    parser = argparse.ArgumentParser(description="Ingest Spotify playlists into SQLite.")
+    parser.add_argument("--incremental", action="store_true", help="Skip playlists whose snapshot_id is unchanged.")
+    parser.add_argument("--limit-playlists", type=int, help="Max playlists to process per run.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted (or --limit-playlists) run from its checkpoint.",
+    )
+    parser.add_argument("--exclude-private", action="store_true", help="Skip playlists marked private.")
+    parser.add_argument(
+        "--prefetch-workers",
+        type=int,
+        default=DEFAULT_PREFETCH_WORKERS,
+        help="Concurrent Spotify page requests.",
+    )
+    parser.add_argument(
+        "--pipeline",
+        choices=("sequential", "async"),
+        default="sequential",
+        help="'async' fetches several playlists at once and batches writes across them.",
+    )
+    parser.add_argument(
+        "--fetch-concurrency",
+        type=int,
+        default=DEFAULT_FETCH_CONCURRENCY,
+        help="Playlists fetched at once with --pipeline async.",
+    )
+    parser.add_argument(
+        "--batch-tracks",
+        type=int,
+        default=DEFAULT_BATCH_TRACKS,
+        help="Tracks per write transaction with --pipeline async.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=("durable", "bulk"),
+        default="durable",
+        help="SQLite connection profile ('bulk' for large first-time imports).",
+    )
+    add_metrics_dir_argument(parser)
+    args = parser.parse_args()
+    if args.resume and args.pipeline == "async":
+        parser.error("--resume needs --pipeline sequential")
+
+    # The async pipeline writes from a thread of its own.
+    conn = get_connection(args.profile, check_same_thread=args.pipeline != "async")
+    try:
+        apply_schema(conn)
+        with run_report("ingest_playlists", args.metrics_dir) as metrics:
+            if args.pipeline == "async":
+                import asyncio
+
+                from music_library_ledger.spotify.ingest_playlists_async import ingest_playlists_async
+
+                stats = asyncio.run(
+                    ingest_playlists_async(
                         conn,
-                        track_uid=track_uid,
-                        artist_uid=artist_uid,
-                        artist_order=idx,
-                        role="primary" if idx == 0 else "artist",
+                        metrics=metrics,
+                        include_private=not args.exclude_private,
+                        limit_playlists=args.limit_playlists,
+                        incremental=args.incremental,
+                        fetch_concurrency=args.fetch_concurrency,
+                        batch_tracks=args.batch_tracks,
                     )
-                    if a.get("id"):
-                        upsert_platform_artist(
-                            conn,
-                            platform="spotify",
-                            platform_artist_id=a["id"],
-                            artist_uid=artist_uid,
-                            raw_json=_as_dict(a),
-                        )
-
-                # Add to collection with ordering
-                add_track_to_collection(
+                )
+            else:
+                stats = ingest_playlists(
                     conn,
-                    collection_uid=collection_uid,
-                    track_uid=track_uid,
-                    position=position,
-                    added_at=added_at,
+                    metrics=metrics,
+                    include_private=not args.exclude_private,
+                    limit_playlists=args.limit_playlists,
+                    prefetch_workers=args.prefetch_workers,
+                    incremental=args.incremental,
+                    resume=args.resume,
                 )
-                position += 1
-
-        item_offset += item_limit
-
-
-def main() -> None:
-    from music_library_ledger.db.connection import get_connection
-
-    conn = get_connection()
-    ingest_playlists(conn)
-    print("Done: ingested Spotify playlists.")
+    finally:
+        conn.close()
+    print(
+        f"Done: ingested Spotify playlists (new={stats.new} "
+        f"refreshed={stats.refreshed} skipped={stats.skipped}; items inserted={stats.items_inserted} "
+        f"deleted={stats.items_deleted} moved={stats.items_moved}; tracks written={stats.writes.tracks_written} "
+        f"skipped={stats.writes.tracks_skipped})."
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,286 @@
+"""
+An asyncio version of ingest_playlists for accounts with many playlists.
+
+Three stages joined by bounded queues:
+
+  fetch      `fetch_concurrency` workers, each downloading one playlist's pages
+             at a time (spotipy is blocking, so each request runs in a thread)
+  transform  pure: pages become BulkTrack rows, playlists become CollectionInputs
+  write      a single task that commits pages from many playlists together,
+             `batch_tracks` rows per transaction, on a dedicated writer thread
+
+Every SQLite call, writes and the snapshot_id reads alike, runs on that one
+thread, so the event loop keeps fetching while a batch is written and reads
+never land inside a write transaction. When the writer falls behind, the page
+queue fills and the fetch workers wait, so memory stays flat however many
+playlists the account has. A playlist's snapshot_id is stored in the same
+transaction as its reconciled items, so an interrupted run still never marks a
+playlist as up to date.
+"""
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import spotipy
+
+from music_library_ledger.db.bulk import BulkTrack, bulk_upsert_tracks
+from music_library_ledger.db.collections import CollectionInput, get_or_create_collection, reconcile_collection_items
+from music_library_ledger.db.identity_cache import IdentityCache, get_identity_cache
+from music_library_ledger.db.platform import upsert_platform_collection
+from music_library_ledger.metrics import MeteredClient, RunMetrics
+from music_library_ledger.retry import call_with_retry
+from music_library_ledger.spotify.client import get_spotify_client
+from music_library_ledger.spotify.ingest_playlists import PlaylistSyncStats, _record_stats, _stored_snapshot_id
+from music_library_ledger.spotify.paging import PLAYLIST_ITEMS_PAGE_LIMIT, PLAYLISTS_PAGE_LIMIT
+from music_library_ledger.spotify.transform import (
+    as_dict,
+    bulk_tracks_from_page,
+    collection_input_from_playlist,
+    spotify_url,
+)
+
+DEFAULT_FETCH_CONCURRENCY = 8
+DEFAULT_BATCH_TRACKS = 5_000
+DEFAULT_QUEUE_PAGES = 32
+
+R = TypeVar("R")
+
+
+@dataclass(frozen=True)
+class _PlaylistJob:
+    playlist_id: str
+    playlist: dict[str, Any]
+    collection: CollectionInput
+    known: bool
+
+
+@dataclass(frozen=True)
+class _PageRows:
+    job: _PlaylistJob
+    rows: list[BulkTrack]
+    first: bool
+    last: bool
+
+
+class _Writer:
+    """Buffers transformed pages and writes them in large transactions."""
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        on_db: Callable[[Callable[[], None]], Awaitable[None]],
+        cache: IdentityCache,
+        stats: PlaylistSyncStats,
+        metrics: RunMetrics,
+        batch_tracks: int,
+    ) -> None:
+        self.conn = conn
+        self.on_db = on_db
+        self.cache = cache
+        self.stats = stats
+        self.metrics = metrics
+        self.batch_tracks = batch_tracks
+        self._pending: list[_PageRows] = []
+        self._pending_rows = 0
+        self._collections: dict[str, str] = {}                           # playlist id -> collection_uid
+        self._items: dict[str, list[tuple[str, Optional[str]]]] = {}     # playlist id -> items so far
+
+    async def run(self, pages: asyncio.Queue[Optional[_PageRows]]) -> None:
+        while True:
+            msg = await pages.get()
+            if msg is None:
+                break
+            self._pending.append(msg)
+            self._pending_rows += len(msg.rows)
+            if self._pending_rows >= self.batch_tracks:
+                await self.on_db(self.flush)
+        await self.on_db(self.flush)
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        conn = self.conn
+
+        with self.metrics.timer("db_write"), self.cache.transaction(conn):
+            for msg in pending:
+                if msg.first:
+                    self._collections[msg.job.playlist_id] = get_or_create_collection(conn, msg.job.collection)
+                    self._items[msg.job.playlist_id] = []
+
+            rows = [r for msg in pending for r in msg.rows]
+            track_uids = bulk_upsert_tracks(
+                conn,
+                rows,
+                platform="spotify",
+                match_confidence=1.0,
+                match_method="spotify_id",
+                cache=self.cache,
+                stats=self.stats.writes,
+            )
+
+            offset = 0
+            for msg in pending:
+                uids = track_uids[offset : offset + len(msg.rows)]
+                offset += len(msg.rows)
+                self._items[msg.job.playlist_id].extend(zip(uids, (r.added_at for r in msg.rows)))
+                if msg.last:
+                    self._complete(msg.job)
+
+    def _complete(self, job: _PlaylistJob) -> None:
+        collection_uid = self._collections.pop(job.playlist_id)
+        delta = reconcile_collection_items(
+            self.conn,
+            collection_uid=collection_uid,
+            items=self._items.pop(job.playlist_id),
+        )
+        upsert_platform_collection(
+            self.conn,
+            platform="spotify",
+            platform_collection_id=job.playlist_id,
+            collection_uid=collection_uid,
+            playlist_url=spotify_url(job.playlist),
+            raw_json=as_dict(job.playlist),
+        )
+        self.stats.items_inserted += delta.inserted
+        self.stats.items_deleted += delta.deleted
+        self.stats.items_moved += delta.moved
+        if job.known:
+            self.stats.refreshed += 1
+        else:
+            self.stats.new += 1
+        self.metrics.incr("playlists", outcome="refreshed" if job.known else "new")
+
+
+async def _supervise(*coros: Awaitable[None]) -> None:
+    """Run the coroutines together; the first failure cancels the rest and is raised."""
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def ingest_playlists_async(
+    conn: sqlite3.Connection,
+    *,
+    client: Optional[spotipy.Spotify] = None,
+    metrics: Optional[RunMetrics] = None,
+    include_private: bool = True,
+    limit_playlists: Optional[int] = None,
+    cache: Optional[IdentityCache] = None,
+    incremental: bool = False,
+    fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    batch_tracks: int = DEFAULT_BATCH_TRACKS,
+    queue_pages: int = DEFAULT_QUEUE_PAGES,
+) -> PlaylistSyncStats:
+    """
+    ingest_playlists with playlists fetched concurrently and written in batches;
+    same arguments and results, without resume. `conn` is used from a writer
+    thread of its own, so open it with get_connection(..., check_same_thread=False).
+    """
+    if fetch_concurrency <= 0:
+        raise ValueError("fetch_concurrency must be > 0")
+    if batch_tracks <= 0:
+        raise ValueError("batch_tracks must be > 0")
+    if queue_pages <= 0:
+        raise ValueError("queue_pages must be > 0")
+
+    metrics = metrics if metrics is not None else RunMetrics("ingest_playlists")
+    sp = MeteredClient(client if client is not None else get_spotify_client(), metrics, api="spotify")
+    on_retry = metrics.retry_hook("spotify")
+    stats = PlaylistSyncStats()
+
+    loop = asyncio.get_running_loop()
+    db_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+
+    async def on_db(fn: Callable[..., R], *args: Any) -> R:
+        return await loop.run_in_executor(db_thread, partial(fn, *args))
+
+    async def fetch(call: Callable[[], dict]) -> dict:
+        return await asyncio.to_thread(call_with_retry, call, on_retry=on_retry)
+
+    jobs: asyncio.Queue[Optional[_PlaylistJob]] = asyncio.Queue(maxsize=fetch_concurrency)
+    pages: asyncio.Queue[Optional[_PageRows]] = asyncio.Queue(maxsize=queue_pages)
+
+    async def list_playlists() -> None:
+        # Stored snapshot_ids are read on the writer thread, between its transactions.
+        seen = 0
+        offset = 0
+        while True:
+            page = await fetch(lambda: sp.current_user_playlists(limit=PLAYLISTS_PAGE_LIMIT, offset=offset))
+            for pl in page.get("items", []) or []:
+                if limit_playlists is not None and seen >= limit_playlists:
+                    return
+                playlist_id = pl.get("id")
+                if not playlist_id:
+                    continue
+                if not include_private and pl.get("public") is False:
+                    continue
+
+                seen += 1
+                known, stored_snapshot = await on_db(_stored_snapshot_id, conn, playlist_id)
+                snapshot_id = pl.get("snapshot_id")
+                if incremental and known and snapshot_id and snapshot_id == stored_snapshot:
+                    stats.skipped += 1
+                    metrics.incr("playlists", outcome="skipped")
+                    continue
+                await jobs.put(_PlaylistJob(playlist_id, pl, collection_input_from_playlist(pl), known))
+            if not page.get("next"):
+                return
+            offset += PLAYLISTS_PAGE_LIMIT
+
+    async def fetch_worker() -> None:
+        while True:
+            job = await jobs.get()
+            if job is None:
+                return
+            offset = 0
+            while True:
+                page = await fetch(
+                    lambda: sp.playlist_items(
+                        job.playlist_id,
+                        limit=PLAYLIST_ITEMS_PAGE_LIMIT,
+                        offset=offset,
+                        additional_types=("track",),
+                    )
+                )
+                last = not page.get("next")
+                await pages.put(_PageRows(job, bulk_tracks_from_page(page), first=offset == 0, last=last))
+                if last:
+                    break
+                offset += PLAYLIST_ITEMS_PAGE_LIMIT
+
+    async def fetch_all() -> None:
+        workers = [asyncio.ensure_future(fetch_worker()) for _ in range(fetch_concurrency)]
+        try:
+            await list_playlists()
+            for _ in workers:
+                await jobs.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for w in workers:
+                w.cancel()
+        await pages.put(None)
+
+    try:
+        if cache is None:
+            cache = await on_db(get_identity_cache, conn)
+        writer = _Writer(conn, on_db=on_db, cache=cache, stats=stats, metrics=metrics, batch_tracks=batch_tracks)
+        await _supervise(fetch_all(), writer.run(pages))
+    finally:
+        # A cancelled writer may still be in the middle of a flush; let it finish
+        # before the caller gets `conn` back.
+        db_thread.shutdown(wait=True)
+        _record_stats(metrics, stats)
+    return stats
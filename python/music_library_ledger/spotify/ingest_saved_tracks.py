@@ -1,129 +1,389 @@
 from __future__ import annotations
 
+import argparse
 import sqlite3
-from typing import Optional
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator, Optional
 
-from music_library_ledger.db.tracks import TrackInput, upsert_track
-from music_library_ledger.db.artists import ArtistInput, clear_artists_for_track, get_or_create_artist, attach_artist_to_track
-from music_library_ledger.db.collections import CollectionInput, get_or_create_collection, add_track_to_collection
-from music_library_ledger.db.platform import upsert_platform_track, upsert_platform_artist, upsert_platform_collection
+import spotipy
+
+from music_library_ledger.db.bulk import BulkWriteStats, bulk_upsert_tracks
+from music_library_ledger.db.collections import (
+    CollectionInput,
+    CollectionReconcileResult,
+    get_or_create_collection,
+    normalize_added_at,
+    prepend_tracks_to_collection,
+    reconcile_collection_items,
+)
+from music_library_ledger.db.identity_cache import IdentityCache, get_identity_cache
+from music_library_ledger.db.jobs import (
+    clear_job_items,
+    complete_job,
+    load_job_items,
+    save_job_cursor,
+    stage_job_items,
+    start_job,
+)
+from music_library_ledger.db.payloads import payload_from_row
+from music_library_ledger.db.platform import get_platform_collection, upsert_platform_collection
+from music_library_ledger.metrics import MeteredClient, RunMetrics, add_metrics_dir_argument, run_report
+from music_library_ledger.retry import call_with_retry
 from music_library_ledger.spotify.client import get_spotify_client
+from music_library_ledger.spotify.paging import DEFAULT_PREFETCH_WORKERS, SAVED_TRACKS_PAGE_LIMIT, iter_pages
+from music_library_ledger.spotify.transform import bulk_tracks_from_page
 
+SAVED_TRACKS_COLLECTION_ID = "me:tracks"
 
-def _spotify_url(obj: dict) -> Optional[str]:
-    ext = obj.get("external_urls") or {}
-    return ext.get("spotify")
+JOB_NAME = "ingest_saved_tracks"
 
 
-def ingest_saved_tracks(conn: sqlite3.Connection) -> None:
-    sp = get_spotify_client()
+@dataclass
+class SavedTracksSyncStats:
+    full_reconcile: bool = False
+    written: int = 0
+    removed: int = 0
+    writes: BulkWriteStats = field(default_factory=BulkWriteStats)
 
-    # Canonical "Liked Songs" collection
-    liked_uid = get_or_create_collection(
-        conn,
-        CollectionInput(
-            name="Liked Songs",
-            collection_type="liked",
-            description="Imported from Spotify saved tracks",
-        ),
-    )
-    upsert_platform_collection(
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _load_sync_state(conn: sqlite3.Connection) -> dict[str, Any]:
+    row = get_platform_collection(
         conn,
         platform="spotify",
-        platform_collection_id="me:tracks",
-        collection_uid=liked_uid,
-        playlist_url=None,
-        raw_json={"kind": "saved_tracks"},
+        platform_collection_id=SAVED_TRACKS_COLLECTION_ID,
     )
+    if row is None:
+        return {}
+    try:
+        raw = payload_from_row(row).value
+    except ValueError:
+        return {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def _full_reconcile_due(state: dict[str, Any], after_days: Optional[int]) -> bool:
+    if after_days is None:
+        return False
+    last = state.get("last_full_sync_at")
+    if not last:
+        return True
+    try:
+        last_dt = datetime.fromisoformat(str(last).replace("Z", "+00:00"))
+    except ValueError:
+        return True
+    return _utc_now() - last_dt >= timedelta(days=after_days)
+
+
+def _load_watermark(conn: sqlite3.Connection, liked_uid: str) -> tuple[Optional[str], set[str]]:
+    """Newest added_at in Liked Songs and the Spotify ids recorded at exactly that instant."""
+    # strftime brings rows stored before added_at was normalized into the same format.
+    row = conn.execute(
+        """
+        SELECT MAX(strftime('%Y-%m-%dT%H:%M:%SZ', added_at))
+        FROM collection_items
+        WHERE collection_uid = ?;
+        """,
+        (liked_uid,),
+    ).fetchone()
+    watermark = row[0] if row else None
+    if watermark is None:
+        return None, set()
+
+    ids = conn.execute(
+        """
+        SELECT pt.platform_track_id
+        FROM collection_items ci
+        JOIN platform_tracks pt
+            ON pt.track_uid = ci.track_uid AND pt.platform = 'spotify'
+        WHERE ci.collection_uid = ? AND strftime('%Y-%m-%dT%H:%M:%SZ', ci.added_at) = ?;
+        """,
+        (liked_uid, watermark),
+    ).fetchall()
+    return watermark, {r[0] for r in ids}
+
+
+def _iter_saved_pages(sp, *, prefetch_workers: int, metrics: RunMetrics, start: int = 0) -> Iterator[dict]:
+    return iter_pages(
+        lambda limit, offset: sp.current_user_saved_tracks(limit=limit, offset=offset),
+        limit=SAVED_TRACKS_PAGE_LIMIT,
+        start=start,
+        max_workers=prefetch_workers,
+        on_retry=metrics.retry_hook("spotify"),
+    )
+
+
+def _page_boundary(page: dict[str, Any]) -> dict[str, Any]:
+    """The list size and last item of a page, to tell on resume whether the list has shifted."""
+    items = page.get("items") or []
+    last = (items[-1].get("track") or {}).get("id") if items else None
+    return {
+        "total": page.get("total"),
+        "boundary_offset": page.get("offset", 0) + len(items) - 1,
+        "boundary_id": last,
+    }
+
+
+def _resume_still_valid(sp, checkpoint: dict[str, Any], *, metrics: RunMetrics) -> bool:
+    """
+    Whether the saved list still has the size and boundary item the checkpoint
+    recorded. Saved tracks are newest first, so a track saved or removed above
+    the checkpoint shifts every item after it.
+    """
+    offset = checkpoint.get("boundary_offset")
+    if offset is None or offset < 0 or checkpoint.get("boundary_id") is None:
+        return False
+    page = call_with_retry(
+        lambda: sp.current_user_saved_tracks(limit=1, offset=offset),
+        on_retry=metrics.retry_hook("spotify"),
+    )
+    return _page_boundary(page) == {
+        "total": checkpoint.get("total"),
+        "boundary_offset": offset,
+        "boundary_id": checkpoint.get("boundary_id"),
+    }
+
 
-    limit = 30
-    offset = 0
-    position = 0  # stable ordering in our DB
+def _ingest_new_head(
+    conn: sqlite3.Connection,
+    sp,
+    *,
+    liked_uid: str,
+    watermark: str,
+    watermark_ids: set[str],
+    cache: IdentityCache,
+    writes: BulkWriteStats,
+    metrics: RunMetrics,
+) -> int:
+    # Saved tracks come back newest first: page serially (we expect to stop on the
+    # first page or two) and stop at the first item already recorded.
+    head: list[tuple[str, Optional[str]]] = []
+    reached_known = False
 
-    while True:
-        page = sp.current_user_saved_tracks(limit=limit, offset=offset)
-        items = page.get("items", [])
-        if not items:
+    for page in _iter_saved_pages(sp, prefetch_workers=1, metrics=metrics):
+        rows = []
+        for row in bulk_tracks_from_page(page):
+            added_at = normalize_added_at(row.added_at) or ""
+            if added_at < watermark or (added_at == watermark and row.platform_track_id in watermark_ids):
+                reached_known = True
+                break
+            rows.append(row)
+
+        with metrics.timer("db_write"), cache.transaction(conn):
+            track_uids = bulk_upsert_tracks(
+                conn,
+                rows,
+                platform="spotify",
+                match_confidence=1.0,
+                match_method="spotify_id",
+                cache=cache,
+                stats=writes,
+            )
+        head.extend(zip(track_uids, (r.added_at for r in rows)))
+
+        if reached_known:
             break
 
-        with conn:  # commit each page
-            for item in items:
-                added_at = item.get("added_at")  # ISO8601 UTC Z :contentReference[oaicite:6]{index=6}
-                t = item.get("track") or {}
-                if not t:
-                    continue
-
-                # Some tracks can be unavailable; skip if needed
-                spotify_track_id = t.get("id")
-                if not spotify_track_id:
-                    continue
-
-                track_uid = upsert_track(
-                    conn,
-                    TrackInput(
-                        title=t.get("name") or "UMKNOWN TITLE",
-                        album=(t.get("album") or {}).get("name"),
-                        duration_ms=t.get("duration_ms"),
-                        isrc=((t.get("external_ids") or {}).get("isrc")),
-                        explicit=t.get("explicit"),
-                        media_type="song",
-                        source_url=_spotify_url(t),
-                        canonical_platform="spotify",
-                    ),
-                )
-
-                upsert_platform_track(
-                    conn,
-                    platform="spotify",
-                    platform_track_id=spotify_track_id,
-                    track_uid=track_uid,
-                    song_url=_spotify_url(t),
-                    raw_json=t,
-                    match_confidence=1.0,
-                    match_method="spotify_id",
-                )
-
-                # Artists (ordered)
-                artists = t.get("artists") or []
-                clear_artists_for_track(conn, track_uid)
-
-                for idx, a in enumerate(artists):
-                    artist_uid = get_or_create_artist(conn, ArtistInput(name=a.get("name") or ""))
-                    attach_artist_to_track(
-                        conn,
-                        track_uid=track_uid,
-                        artist_uid=artist_uid,
-                        artist_order=idx,
-                        role="primary" if idx == 0 else "artist",
-                    )
-                    if a.get("id"):
-                        upsert_platform_artist(
-                            conn,
-                            platform="spotify",
-                            platform_artist_id=a["id"],
-                            artist_uid=artist_uid,
-                            raw_json=a,
-                        )
-
-                # Add to "Liked Songs"
-                add_track_to_collection(
-                    conn,
-                    collection_uid=liked_uid,
-                    track_uid=track_uid,
-                    position=position,
-                    added_at=added_at,
-                )
-                position += 1
-
-        offset += limit
+    with metrics.timer("db_write"), conn:
+        return prepend_tracks_to_collection(conn, collection_uid=liked_uid, items=head)
+
+
+def _ingest_all(
+    conn: sqlite3.Connection,
+    sp,
+    *,
+    liked_uid: str,
+    cache: IdentityCache,
+    prefetch_workers: int,
+    writes: BulkWriteStats,
+    metrics: RunMetrics,
+    start: int = 0,
+) -> CollectionReconcileResult:
+    # Items are staged in sync_job_items with each page, so a resumed walk
+    # (start > 0) has the pages before `start` without fetching them again.
+    items: list[tuple[str, Optional[str]]] = load_job_items(conn, JOB_NAME) if start else []
+
+    offset = start
+    for page in _iter_saved_pages(sp, prefetch_workers=prefetch_workers, metrics=metrics, start=start):
+        rows = bulk_tracks_from_page(page)
+        offset += SAVED_TRACKS_PAGE_LIMIT
+        with metrics.timer("db_write"), cache.transaction(conn):  # commit each page
+            track_uids = bulk_upsert_tracks(
+                conn,
+                rows,
+                platform="spotify",
+                match_confidence=1.0,
+                match_method="spotify_id",
+                cache=cache,
+                stats=writes,
+            )
+            page_items = list(zip(track_uids, (r.added_at for r in rows)))
+            stage_job_items(conn, JOB_NAME, page_items, start_seq=len(items))
+            save_job_cursor(conn, JOB_NAME, {"item_offset": offset, **_page_boundary(page)})
+        items.extend(page_items)
+
+    # Renumbers positions 0..n-1 and drops anything unliked since the last full walk.
+    with metrics.timer("db_write"), conn:
+        return reconcile_collection_items(conn, collection_uid=liked_uid, items=items)
+
+
+def ingest_saved_tracks(
+    conn: sqlite3.Connection,
+    *,
+    client: Optional[spotipy.Spotify] = None,
+    metrics: Optional[RunMetrics] = None,
+    cache: Optional[IdentityCache] = None,
+    prefetch_workers: int = DEFAULT_PREFETCH_WORKERS,
+    incremental: bool = False,
+    full_reconcile_after_days: Optional[int] = None,
+    resume: bool = False,
+) -> SavedTracksSyncStats:
+    """
+    Ingest Spotify saved tracks into the canonical "Liked Songs" collection.
+
+    Full mode walks the whole list, renumbers positions 0..n-1 and removes items
+    that are no longer saved. With incremental=True only the new head is fetched:
+    paging stops at the first item at or below the stored added_at watermark, and
+    the new items are placed ahead of the existing ones without touching them.
+    Incremental runs fall back to a full reconcile when nothing is stored yet or
+    the last one is older than full_reconcile_after_days.
+
+    Full walks checkpoint their offset in sync_jobs with each page; with
+    resume=True an interrupted full walk continues from there (whatever the mode),
+    unless the list's size or the item at the checkpoint has changed since, in
+    which case the walk starts over.
+
+    `client` defaults to an authenticated spotipy client. API calls, retries,
+    DB write time and rows written are recorded into `metrics` when given.
+    """
+    metrics = metrics if metrics is not None else RunMetrics("ingest_saved_tracks")
+    sp = MeteredClient(client if client is not None else get_spotify_client(), metrics, api="spotify")
+    cache = cache if cache is not None else get_identity_cache(conn)
+
+    # Canonical "Liked Songs" collection
+    with conn:
+        liked_uid = get_or_create_collection(
+            conn,
+            CollectionInput(
+                name="Liked Songs",
+                collection_type="liked",
+                description="Imported from Spotify saved tracks",
+            ),
+        )
+        checkpoint = start_job(conn, JOB_NAME, resume=resume)
+    resume_offset = checkpoint.get("item_offset", 0)
+    if resume_offset and not _resume_still_valid(sp, checkpoint, metrics=metrics):
+        # Tracks were saved or removed since the checkpoint: walk the list again.
+        resume_offset = 0
+        with conn:
+            clear_job_items(conn, JOB_NAME)
+
+    state = _load_sync_state(conn)
+    watermark, watermark_ids = _load_watermark(conn, liked_uid)
+
+    stats = SavedTracksSyncStats()
+    try:
+        if (
+            incremental
+            and not resume_offset
+            and watermark is not None
+            and not _full_reconcile_due(state, full_reconcile_after_days)
+        ):
+            stats.written = _ingest_new_head(
+                conn,
+                sp,
+                liked_uid=liked_uid,
+                watermark=watermark,
+                watermark_ids=watermark_ids,
+                cache=cache,
+                writes=stats.writes,
+                metrics=metrics,
+            )
+        else:
+            stats.full_reconcile = True
+            delta = _ingest_all(
+                conn,
+                sp,
+                liked_uid=liked_uid,
+                cache=cache,
+                prefetch_workers=prefetch_workers,
+                writes=stats.writes,
+                metrics=metrics,
+                start=resume_offset,
+            )
+            stats.written = delta.inserted + delta.moved
+            stats.removed = delta.deleted
+            state["last_full_sync_at"] = _utc_now().isoformat().replace("+00:00", "Z")
+
+        state["kind"] = "saved_tracks"
+        with metrics.timer("db_write"), conn:
+            upsert_platform_collection(
+                conn,
+                platform="spotify",
+                platform_collection_id=SAVED_TRACKS_COLLECTION_ID,
+                collection_uid=liked_uid,
+                playlist_url=None,
+                raw_json=state,
+            )
+            complete_job(conn, JOB_NAME)
+    finally:
+        # Failed runs report what they wrote too.
+        stats.writes.record(metrics)
+        metrics.incr("collection_items", stats.written, change="written")
+        metrics.incr("collection_items", stats.removed, change="removed")
+    return stats
 
 
 def main() -> None:
     from music_library_ledger.db.connection import get_connection
+    from music_library_ledger.db.schema import apply_schema
 
-    conn = get_connection()
-    ingest_saved_tracks(conn)
-    print("Done: ingested Spotify saved tracks.")
+    parser = argparse.ArgumentParser(description="Ingest Spotify saved tracks into SQLite.")
+    parser.add_argument("--incremental", action="store_true", help="Only fetch tracks saved since the last run.")
+    parser.add_argument(
+        "--full-reconcile-days",
+        type=int,
+        help="With --incremental, do a full reconcile (catches unlikes) if the last one is older than this.",
+    )
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted full sync from its checkpoint.")
+    parser.add_argument(
+        "--prefetch-workers",
+        type=int,
+        default=DEFAULT_PREFETCH_WORKERS,
+        help="Concurrent Spotify page requests for full syncs.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=("durable", "bulk"),
+        default="durable",
+        help="SQLite connection profile ('bulk' for large first-time imports).",
+    )
+    add_metrics_dir_argument(parser)
+    args = parser.parse_args()
+
+    conn = get_connection(args.profile)
+    try:
+        apply_schema(conn)
+        with run_report("ingest_saved_tracks", args.metrics_dir) as metrics:
+            stats = ingest_saved_tracks(
+                conn,
+                metrics=metrics,
+                prefetch_workers=args.prefetch_workers,
+                incremental=args.incremental,
+                full_reconcile_after_days=args.full_reconcile_days,
+                resume=args.resume,
+            )
+    finally:
+        conn.close()
+    mode = "full" if stats.full_reconcile else "incremental"
+    print(
+        f"Done: ingested Spotify saved tracks ({mode}: written={stats.written} removed={stats.removed}; "
+        f"tracks written={stats.writes.tracks_written} skipped={stats.writes.tracks_skipped})."
+    )
 
 
 if __name__ == "__main__":
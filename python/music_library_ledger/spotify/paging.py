@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import Callable, Iterator, Optional
+
+from music_library_ledger.concurrency import ordered_map
+from music_library_ledger.retry import DEFAULT_RETRY_POLICY, RetryPolicy, call_with_retry
+
+# Maximum page sizes accepted by the Spotify Web API.
+SAVED_TRACKS_PAGE_LIMIT = 50
+PLAYLISTS_PAGE_LIMIT = 50
+PLAYLIST_ITEMS_PAGE_LIMIT = 100
+
+DEFAULT_PREFETCH_WORKERS = 4
+
+PageFetcher = Callable[[int, int], dict]  # (limit, offset) -> paging object
+
+
+def iter_pages(
+    fetch: PageFetcher,
+    *,
+    limit: int,
+    start: int = 0,
+    max_workers: int = DEFAULT_PREFETCH_WORKERS,
+    retry: RetryPolicy = DEFAULT_RETRY_POLICY,
+    on_retry: Optional[Callable[[BaseException], None]] = None,
+) -> Iterator[dict]:
+    """
+    Yield every page of a Spotify paging object from offset `start`, in offset order.
+
+    The first page is fetched inline to learn `total`; the remaining offsets are
+    prefetched on a small thread pool so HTTP latency overlaps with whatever the
+    caller does with each page (typically the SQLite writes). Stopping iteration
+    early cancels the prefetches that have not started yet.
+
+    Rate-limited (429) and 5xx page requests are retried under `retry`, calling
+    `on_retry` (if given) for each retried error.
+
+    Items added to the list while paging can be missed; the next run picks them up.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be > 0")
+    if start < 0:
+        raise ValueError("start must be >= 0")
+
+    def fetch_page(offset: int) -> dict:
+        return call_with_retry(lambda: fetch(limit, offset), policy=retry, on_retry=on_retry)
+
+    first = fetch_page(start)
+    yield first
+
+    total = first.get("total")
+    if not isinstance(total, int):
+        # No total (shouldn't happen for these endpoints): follow `next` serially.
+        page, offset = first, start
+        while page.get("next"):
+            offset += limit
+            page = fetch_page(offset)
+            yield page
+        return
+
+    if max_workers <= 1:
+        for offset in range(start + limit, total, limit):
+            yield fetch_page(offset)
+        return
+
+    for fut in ordered_map(
+        fetch_page,
+        range(start + limit, total, limit),
+        max_workers=max_workers,
+        thread_name_prefix="spotify-prefetch",
+    ):
+        yield fut.result()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from music_library_ledger.db.bulk import BulkArtist, BulkTrack
+from music_library_ledger.db.collections import CollectionInput
+from music_library_ledger.db.tracks import TrackInput
+
+
+def spotify_url(obj: dict) -> Optional[str]:
+    ext = obj.get("external_urls") or {}
+    return ext.get("spotify")
+
+
+def as_dict(x: Any) -> Optional[dict]:
+    return x if isinstance(x, dict) else None
+
+
+def bulk_track_from_item(item: dict) -> Optional[BulkTrack]:
+    """
+    Map a saved-track / playlist-item object to a BulkTrack.
+    Returns None for items we can't store (episodes, local or unavailable tracks without an id).
+    """
+    t = item.get("track") or {}
+    if not isinstance(t, dict) or not t:
+        return None
+
+    spotify_track_id = t.get("id")
+    if not spotify_track_id:
+        return None
+
+    artists = [
+        BulkArtist(
+            name=a.get("name") or "",
+            platform_artist_id=a.get("id"),
+            raw_json=a,
+        )
+        for a in (t.get("artists") or [])
+        if isinstance(a, dict)
+    ]
+
+    return BulkTrack(
+        track=TrackInput(
+            title=t.get("name") or "UNKNOWN TITLE",
+            album=(t.get("album") or {}).get("name"),
+            duration_ms=t.get("duration_ms"),
+            isrc=((t.get("external_ids") or {}).get("isrc")),
+            explicit=t.get("explicit"),
+            media_type="song",
+            source_url=spotify_url(t),
+            canonical_platform="spotify",
+        ),
+        platform_track_id=spotify_track_id,
+        artists=artists,
+        song_url=spotify_url(t),
+        raw_json=t,
+        added_at=item.get("added_at"),
+    )
+
+
+def bulk_tracks_from_page(page: dict) -> list[BulkTrack]:
+    rows = []
+    for item in page.get("items", []) or []:
+        if not isinstance(item, dict):
+            continue
+        row = bulk_track_from_item(item)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def collection_input_from_playlist(pl: dict) -> CollectionInput:
+    """The canonical collection for a simplified playlist object."""
+    name = (pl.get("name") or "").strip() or f"Unnamed Playlist ({pl.get('id')})"
+    return CollectionInput(
+        name=name,
+        collection_type="playlist",
+        description=pl.get("description"),
+    )
@@ -10,6 +10,7 @@ CREATE TABLE IF NOT EXISTS tracks (
   media_type         TEXT NOT NULL DEFAULT 'song',      -- 'song' or 'video'
   source_url         TEXT,                              -- e.g., youtube link (optional)
   canonical_platform TEXT,                              -- 'spotify','ytm','youtube','local' (optional)
+  content_hash       TEXT,                              -- digest of the fields above; unchanged re-ingests skip the write
 
   created_at         TEXT NOT NULL DEFAULT (datetime('now')),
   updated_at         TEXT NOT NULL DEFAULT (datetime('now'))
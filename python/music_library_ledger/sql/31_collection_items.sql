@@ -2,7 +2,7 @@ CREATE TABLE IF NOT EXISTS collection_items (
   collection_uid  TEXT NOT NULL,
   track_uid       TEXT NOT NULL,
   position        INTEGER,
-  added_at        TEXT NOT NULL DEFAULT (datetime('now')),
+  added_at        TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now')),
   source          TEXT,
 
   PRIMARY KEY (collection_uid, track_uid),
@@ -6,6 +6,8 @@ CREATE TABLE IF NOT EXISTS platform_tracks (
   match_confidence   REAL,
   match_method       TEXT,
   raw_json           TEXT,
+  raw_payload        BLOB,
+  content_hash       TEXT,
   created_at         TEXT NOT NULL DEFAULT (datetime('now')),
   last_verified_at   TEXT,
   song_url           TEXT,
@@ -4,6 +4,8 @@ CREATE TABLE IF NOT EXISTS platform_artists (
   artist_uid         TEXT NOT NULL,
 
   raw_json           TEXT,
+  raw_payload        BLOB,
+  content_hash       TEXT,
   created_at         TEXT NOT NULL DEFAULT (datetime('now')),
 
   PRIMARY KEY (platform, platform_artist_id),
@@ -0,0 +1,14 @@
+-- Failed attempts to match a ledger track on a platform (e.g. no YT Music result
+-- above --min-score). Used to back off retries; the row is removed once matched.
+CREATE TABLE IF NOT EXISTS platform_match_attempts (
+  track_uid      TEXT NOT NULL,
+  platform       TEXT NOT NULL,
+
+  attempts       INTEGER NOT NULL DEFAULT 0,
+  best_score     REAL,
+  last_tried_at  TEXT NOT NULL DEFAULT (datetime('now')),
+  next_retry_at  TEXT NOT NULL DEFAULT (datetime('now')),
+
+  PRIMARY KEY (track_uid, platform),
+  FOREIGN KEY (track_uid) REFERENCES tracks(track_uid) ON DELETE CASCADE
+);
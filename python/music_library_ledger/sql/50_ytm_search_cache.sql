@@ -0,0 +1,13 @@
+-- Cached ytm.search responses (see ytmusic/search_cache.py). Safe to truncate.
+CREATE TABLE IF NOT EXISTS ytm_search_cache (
+  query_key      TEXT NOT NULL,                 -- normalized query text
+  search_filter  TEXT NOT NULL,                 -- 'songs', 'videos', ...
+  result_limit   INTEGER NOT NULL,
+  response_json  TEXT NOT NULL,
+  created_at     TEXT NOT NULL DEFAULT (datetime('now')),
+
+  PRIMARY KEY (query_key, search_filter, result_limit)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ytm_search_cache_created_at
+  ON ytm_search_cache(created_at);
@@ -0,0 +1,174 @@
+-- Full-text search over tracks (title, credited artists, album) and artists
+-- (see db/search.py). Kept in sync by the triggers below; db/schema.apply_schema
+-- fills them on a database that predates them, and
+-- `python -m music_library_ledger.db.search --rebuild` rebuilds them from scratch.
+--
+-- tracks and artists have TEXT primary keys, and VACUUM may renumber their
+-- implicit rowids, so each FTS row is keyed by a docid from a small map table.
+--
+-- SQLite before 3.44 can't order group_concat (a subquery's ORDER BY doesn't
+-- count), so the triggers join a track's credits one artist_order at a time;
+-- rebuild_search_index sorts them by artist_order too, so both agree.
+
+CREATE TABLE IF NOT EXISTS track_search_docs (
+  docid      INTEGER PRIMARY KEY,
+  track_uid  TEXT NOT NULL UNIQUE
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS track_search USING fts5(
+  title,
+  artists,                                      -- credited names, char(31)-separated, by artist_order
+  album,
+  tokenize = 'unicode61 remove_diacritics 2',
+  prefix = '2 3'
+);
+
+CREATE TABLE IF NOT EXISTS artist_search_docs (
+  docid       INTEGER PRIMARY KEY,
+  artist_uid  TEXT NOT NULL UNIQUE
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS artist_search USING fts5(
+  name,
+  tokenize = 'unicode61 remove_diacritics 2',
+  prefix = '2 3'
+);
+
+-- tracks
+CREATE TRIGGER IF NOT EXISTS trg_tracks_search_insert AFTER INSERT ON tracks BEGIN
+  INSERT INTO track_search_docs (track_uid) VALUES (NEW.track_uid);
+  INSERT INTO track_search (rowid, title, artists, album)
+  VALUES (
+    (SELECT docid FROM track_search_docs WHERE track_uid = NEW.track_uid),
+    NEW.title,
+    (WITH RECURSIVE credits(artist_order, names) AS (
+      SELECT ta.artist_order, a.name
+      FROM track_artists ta
+      JOIN artists a ON a.artist_uid = ta.artist_uid
+      WHERE ta.track_uid = NEW.track_uid
+        AND ta.artist_order = (SELECT min(artist_order) FROM track_artists WHERE track_uid = NEW.track_uid)
+      UNION ALL
+      SELECT ta.artist_order, c.names || char(31) || a.name
+      FROM credits c
+      JOIN track_artists ta ON ta.track_uid = NEW.track_uid
+        AND ta.artist_order = (SELECT min(artist_order) FROM track_artists
+                               WHERE track_uid = NEW.track_uid AND artist_order > c.artist_order)
+      JOIN artists a ON a.artist_uid = ta.artist_uid)
+    SELECT names FROM credits ORDER BY artist_order DESC LIMIT 1),
+    NEW.album
+  );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tracks_search_update AFTER UPDATE OF title, album ON tracks
+WHEN OLD.title IS NOT NEW.title OR OLD.album IS NOT NEW.album BEGIN
+  UPDATE track_search
+  SET title = NEW.title,
+      album = NEW.album
+  WHERE rowid = (SELECT docid FROM track_search_docs WHERE track_uid = NEW.track_uid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tracks_search_delete AFTER DELETE ON tracks BEGIN
+  DELETE FROM track_search
+  WHERE rowid = (SELECT docid FROM track_search_docs WHERE track_uid = OLD.track_uid);
+  DELETE FROM track_search_docs WHERE track_uid = OLD.track_uid;
+END;
+
+-- track_artists: refresh the credited names of the affected track
+CREATE TRIGGER IF NOT EXISTS trg_track_artists_search_insert AFTER INSERT ON track_artists BEGIN
+  UPDATE track_search
+  SET artists = (WITH RECURSIVE credits(artist_order, names) AS (
+                  SELECT ta.artist_order, a.name
+                  FROM track_artists ta
+                  JOIN artists a ON a.artist_uid = ta.artist_uid
+                  WHERE ta.track_uid = NEW.track_uid
+                    AND ta.artist_order = (SELECT min(artist_order) FROM track_artists WHERE track_uid = NEW.track_uid)
+                  UNION ALL
+                  SELECT ta.artist_order, c.names || char(31) || a.name
+                  FROM credits c
+                  JOIN track_artists ta ON ta.track_uid = NEW.track_uid
+                    AND ta.artist_order = (SELECT min(artist_order) FROM track_artists
+                                           WHERE track_uid = NEW.track_uid AND artist_order > c.artist_order)
+                  JOIN artists a ON a.artist_uid = ta.artist_uid)
+                SELECT names FROM credits ORDER BY artist_order DESC LIMIT 1)
+  WHERE rowid = (SELECT docid FROM track_search_docs WHERE track_uid = NEW.track_uid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_track_artists_search_update AFTER UPDATE ON track_artists BEGIN
+  UPDATE track_search
+  SET artists = (WITH RECURSIVE credits(artist_order, names) AS (
+                  SELECT ta.artist_order, a.name
+                  FROM track_artists ta
+                  JOIN artists a ON a.artist_uid = ta.artist_uid
+                  WHERE ta.track_uid = NEW.track_uid
+                    AND ta.artist_order = (SELECT min(artist_order) FROM track_artists WHERE track_uid = NEW.track_uid)
+                  UNION ALL
+                  SELECT ta.artist_order, c.names || char(31) || a.name
+                  FROM credits c
+                  JOIN track_artists ta ON ta.track_uid = NEW.track_uid
+                    AND ta.artist_order = (SELECT min(artist_order) FROM track_artists
+                                           WHERE track_uid = NEW.track_uid AND artist_order > c.artist_order)
+                  JOIN artists a ON a.artist_uid = ta.artist_uid)
+                SELECT names FROM credits ORDER BY artist_order DESC LIMIT 1)
+  WHERE rowid = (SELECT docid FROM track_search_docs WHERE track_uid = NEW.track_uid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_track_artists_search_delete AFTER DELETE ON track_artists BEGIN
+  UPDATE track_search
+  SET artists = (WITH RECURSIVE credits(artist_order, names) AS (
+                  SELECT ta.artist_order, a.name
+                  FROM track_artists ta
+                  JOIN artists a ON a.artist_uid = ta.artist_uid
+                  WHERE ta.track_uid = OLD.track_uid
+                    AND ta.artist_order = (SELECT min(artist_order) FROM track_artists WHERE track_uid = OLD.track_uid)
+                  UNION ALL
+                  SELECT ta.artist_order, c.names || char(31) || a.name
+                  FROM credits c
+                  JOIN track_artists ta ON ta.track_uid = OLD.track_uid
+                    AND ta.artist_order = (SELECT min(artist_order) FROM track_artists
+                                           WHERE track_uid = OLD.track_uid AND artist_order > c.artist_order)
+                  JOIN artists a ON a.artist_uid = ta.artist_uid)
+                SELECT names FROM credits ORDER BY artist_order DESC LIMIT 1)
+  WHERE rowid = (SELECT docid FROM track_search_docs WHERE track_uid = OLD.track_uid);
+END;
+
+-- artists
+CREATE TRIGGER IF NOT EXISTS trg_artists_search_insert AFTER INSERT ON artists BEGIN
+  INSERT INTO artist_search_docs (artist_uid) VALUES (NEW.artist_uid);
+  INSERT INTO artist_search (rowid, name)
+  VALUES ((SELECT docid FROM artist_search_docs WHERE artist_uid = NEW.artist_uid), NEW.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_artists_search_update AFTER UPDATE OF name ON artists
+WHEN OLD.name IS NOT NEW.name BEGIN
+  UPDATE artist_search
+  SET name = NEW.name
+  WHERE rowid = (SELECT docid FROM artist_search_docs WHERE artist_uid = NEW.artist_uid);
+
+  UPDATE track_search
+  SET artists = (WITH RECURSIVE credits(artist_order, names) AS (
+                  SELECT ta.artist_order, a.name
+                  FROM track_artists ta
+                  JOIN artists a ON a.artist_uid = ta.artist_uid
+                  WHERE ta.track_uid = (SELECT track_uid FROM track_search_docs WHERE docid = track_search.rowid)
+                    AND ta.artist_order = (SELECT min(artist_order) FROM track_artists WHERE track_uid = (SELECT track_uid FROM track_search_docs WHERE docid = track_search.rowid))
+                  UNION ALL
+                  SELECT ta.artist_order, c.names || char(31) || a.name
+                  FROM credits c
+                  JOIN track_artists ta ON ta.track_uid = (SELECT track_uid FROM track_search_docs WHERE docid = track_search.rowid)
+                    AND ta.artist_order = (SELECT min(artist_order) FROM track_artists
+                                           WHERE track_uid = (SELECT track_uid FROM track_search_docs WHERE docid = track_search.rowid) AND artist_order > c.artist_order)
+                  JOIN artists a ON a.artist_uid = ta.artist_uid)
+                SELECT names FROM credits ORDER BY artist_order DESC LIMIT 1)
+  WHERE rowid IN (
+    SELECT d.docid
+    FROM track_artists ta
+    JOIN track_search_docs d ON d.track_uid = ta.track_uid
+    WHERE ta.artist_uid = NEW.artist_uid
+  );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_artists_search_delete AFTER DELETE ON artists BEGIN
+  DELETE FROM artist_search
+  WHERE rowid = (SELECT docid FROM artist_search_docs WHERE artist_uid = OLD.artist_uid);
+  DELETE FROM artist_search_docs WHERE artist_uid = OLD.artist_uid;
+END;
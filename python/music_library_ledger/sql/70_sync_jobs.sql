@@ -0,0 +1,24 @@
+-- Progress of long-running sync jobs (see db/jobs.py), so an interrupted run can
+-- pick up where it stopped with --resume. One row per job; cursors are written
+-- in the same transaction as the data they cover.
+CREATE TABLE IF NOT EXISTS sync_jobs (
+  job_name     TEXT PRIMARY KEY,              -- 'ingest_playlists', 'export_tracks', ...
+  status       TEXT NOT NULL,                 -- 'running' | 'completed'
+  cursor_json  TEXT NOT NULL DEFAULT '{}',    -- job-specific position
+  started_at   TEXT NOT NULL DEFAULT (datetime('now')),
+  updated_at   TEXT NOT NULL DEFAULT (datetime('now')),
+  finished_at  TEXT
+);
+
+-- Items fetched so far for the list a job is in the middle of (a playlist, the
+-- saved tracks), so a resumed run can reconcile the whole list without fetching
+-- the pages it already has again.
+CREATE TABLE IF NOT EXISTS sync_job_items (
+  job_name     TEXT NOT NULL,
+  seq          INTEGER NOT NULL,
+  track_uid    TEXT NOT NULL,
+  added_at     TEXT,
+
+  PRIMARY KEY (job_name, seq),
+  FOREIGN KEY (job_name) REFERENCES sync_jobs(job_name) ON DELETE CASCADE
+);
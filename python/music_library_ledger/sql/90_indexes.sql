@@ -2,6 +2,7 @@
 CREATE INDEX IF NOT EXISTS idx_tracks_isrc ON tracks(isrc);
 CREATE INDEX IF NOT EXISTS idx_tracks_title ON tracks(title);
 CREATE INDEX IF NOT EXISTS idx_tracks_media_type ON tracks(media_type);
+CREATE INDEX IF NOT EXISTS idx_tracks_created ON tracks(created_at, track_uid);
 CREATE UNIQUE INDEX IF NOT EXISTS uq_tracks_isrc ON tracks(isrc) WHERE isrc IS NOT NULL;
 
 -- artists
@@ -15,6 +16,8 @@ CREATE INDEX IF NOT EXISTS idx_track_artists_artist
 
 -- collections
 CREATE INDEX IF NOT EXISTS idx_collections_type ON collections(collection_type);
+CREATE INDEX IF NOT EXISTS idx_collections_type_updated
+  ON collections(collection_type, updated_at, collection_uid);
 
 -- collection_items
 CREATE INDEX IF NOT EXISTS idx_collection_items_collection_pos
@@ -27,3 +30,5 @@ CREATE INDEX IF NOT EXISTS idx_platform_artists_artist_uid
   ON platform_artists(artist_uid);
 CREATE INDEX IF NOT EXISTS idx_platform_collections_collection_uid
   ON platform_collections(collection_uid);
+CREATE INDEX IF NOT EXISTS idx_platform_match_attempts_retry
+  ON platform_match_attempts(platform, next_retry_at);
@@ -2,10 +2,16 @@ import json
 import os
 from pathlib import Path
 
+import requests
 from ytmusicapi import YTMusic
 
+from music_library_ledger.client_pool import get_client_registry
 
-def get_ytmusic_client() -> YTMusic:
+# What YTMusic applies to the sessions it builds itself.
+REQUEST_TIMEOUT_S = 30
+
+
+def _build_ytmusic_client(session: requests.Session) -> YTMusic:
     headers_path = os.environ["YTMUSIC_HEADERS_PATH"]
     path = Path(headers_path).expanduser()
     if not path.exists():
@@ -16,6 +22,11 @@ def get_ytmusic_client() -> YTMusic:
     try:
         with path.open("r", encoding="utf-8") as handle:
             headers = json.load(handle)
-        return YTMusic(headers)
+        return YTMusic(headers, requests_session=session)
     except json.JSONDecodeError:
-        return YTMusic(str(path))
+        return YTMusic(str(path), requests_session=session)
+
+
+def get_ytmusic_client() -> YTMusic:
+    """The process-wide YT Music client; the headers file is parsed once, on first use."""
+    return get_client_registry().get("ytm", _build_ytmusic_client, timeout=REQUEST_TIMEOUT_S)
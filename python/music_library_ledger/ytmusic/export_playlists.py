@@ -2,21 +2,61 @@ from __future__ import annotations
 
 import argparse
 import logging
+import sqlite3
 from dataclasses import dataclass
-from typing import Iterable, Optional
-
-from music_library_ledger.db.connection import get_connection
-from music_library_ledger.db.platform import upsert_platform_collection
+from itertools import islice, tee
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+from music_library_ledger.concurrency import ordered_map
+from music_library_ledger.db.collections import get_collections_platform_tracks, iter_collections
+from music_library_ledger.db.connection import DEFAULT_PROFILE, get_connection
+from music_library_ledger.db.jobs import complete_job, load_job_cursor, save_job_cursor, start_job
+from music_library_ledger.db.payloads import payload_from_row
+from music_library_ledger.db.platform import set_platform_collection_verified, upsert_platform_collection
+from music_library_ledger.db.schema import apply_schema
+from music_library_ledger.metrics import MeteredClient, RunMetrics, add_metrics_dir_argument, run_report
+from music_library_ledger.retry import DEFAULT_RETRY_POLICY, RATE_LIMIT_RETRY_POLICY, RetryPolicy, call_with_retry
 from music_library_ledger.ytmusic.client import get_ytmusic_client
+from music_library_ledger.ytmusic.playlist_delta import (
+    PlaylistDelta,
+    RemoteItem,
+    plan_playlist_delta,
+    playlist_after,
+    remote_items_from_playlist,
+)
+from music_library_ledger.ytmusic.rate_limit import RateLimiter
+from ytmusicapi import YTMusic
 
 LOGGER = logging.getLogger(__name__)
 
+JOB_NAME = "export_playlists"
+
+R = TypeVar("R")
+
+# How long the playlist contents stored by an export are trusted before they
+# are read from YT Music again.
+DEFAULT_VERIFY_AFTER_HOURS = 24.0
+
+# Collections whose tracks and stored playlists are read from SQLite together.
+PREFETCH_COLLECTIONS = 100
+
 
 @dataclass(frozen=True)
-class PlaylistTrack:
-    track_uid: str
-    title: str
-    platform_track_id: Optional[str]
+class _ExportJob:
+    collection_uid: str
+    name: str
+    description: Optional[str]
+    desired: list[str]                       # video ids in playlist order; empty when there's nothing to export
+    playlist_id: Optional[str]               # playlist to update, or None to create one
+    remote: Optional[list[RemoteItem]]       # its stored contents if they can be trusted, else None to read them
+    checkpoint: dict[str, Any]               # the job cursor once this collection is done
+
+
+@dataclass(frozen=True)
+class _ExportResult:
+    outcome: Optional[str]                   # created / updated / unchanged; None when nothing was sent
+    playlist_id: Optional[str] = None
+    snapshot: Optional[list[RemoteItem]] = None   # contents to store as verified
 
 
 def _chunked(values: list[str], size: int) -> Iterable[list[str]]:
@@ -24,136 +64,431 @@ def _chunked(values: list[str], size: int) -> Iterable[list[str]]:
         yield values[idx : idx + size]
 
 
-def _get_collection_tracks(conn, collection_uid: str) -> list[PlaylistTrack]:
-    rows = conn.execute(
-        """
-        SELECT t.track_uid, t.title, pt.platform_track_id
-        FROM collection_items ci
-        JOIN tracks t ON t.track_uid = ci.track_uid
-        LEFT JOIN platform_tracks pt
-            ON pt.track_uid = t.track_uid AND pt.platform = 'ytm'
-        WHERE ci.collection_uid = ?
-        ORDER BY ci.position ASC;
-        """,
-        (collection_uid,),
-    ).fetchall()
-
-    return [
-        PlaylistTrack(
-            track_uid=row["track_uid"],
-            title=row["title"],
-            platform_track_id=row["platform_track_id"],
+def _snapshot_payload(name: str, description: Optional[str], items: list[RemoteItem]) -> dict[str, Any]:
+    return {
+        "name": name,
+        "description": description,
+        "source": "ledger_export",
+        "items": [[item.video_id, item.set_video_id] for item in items],
+    }
+
+
+def _cached_items(row: sqlite3.Row) -> Optional[list[RemoteItem]]:
+    """The entries stored by the last export, if they were verified recently enough to trust."""
+    if not row["verified_recently"]:
+        return None
+    try:
+        payload = payload_from_row(row).value
+        items = payload.get("items") if isinstance(payload, dict) else None
+        cached = [RemoteItem(video_id, set_video_id) for video_id, set_video_id in items]
+    except (TypeError, ValueError):
+        return None
+    # Entries whose setVideoId never came back can't be removed or moved.
+    if any(item.set_video_id is None for item in cached):
+        return None
+    return cached
+
+
+def _call(
+    fn: Callable[[], R],
+    *,
+    limiter: RateLimiter,
+    on_retry: Callable[[BaseException], None],
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+) -> R:
+    # Retries wait for the limiter too, so a 429 doesn't jump the queue.
+    def attempt() -> R:
+        limiter.acquire()
+        return fn()
+
+    return call_with_retry(attempt, policy=policy, on_retry=on_retry)
+
+
+def _apply_delta(
+    ytm: YTMusic,
+    playlist_id: str,
+    delta: PlaylistDelta,
+    remote: list[RemoteItem],
+    *,
+    chunk_size: int,
+    limiter: RateLimiter,
+    on_retry: Callable[[BaseException], None],
+    metrics: RunMetrics,
+) -> list[RemoteItem]:
+    """Remove, add, then move; returns the added entries as YT Music reported them."""
+
+    # Edits are only retried on rate limits: a failed one may still have been applied.
+    def edit(fn: Callable[[], Any]) -> Any:
+        return _call(fn, limiter=limiter, on_retry=on_retry, policy=RATE_LIMIT_RETRY_POLICY)
+
+    for idx in range(0, len(delta.remove), chunk_size):
+        chunk = delta.remove[idx : idx + chunk_size]
+        edit(
+            lambda: ytm.remove_playlist_items(
+                playlist_id,
+                [{"videoId": item.video_id, "setVideoId": item.set_video_id} for item in chunk],
+            )
+        )
+        metrics.incr("playlist_items_removed", len(chunk))
+
+    added: list[RemoteItem] = []
+    for chunk in _chunked(delta.add, chunk_size):
+        response = edit(lambda: ytm.add_playlist_items(playlist_id, chunk))
+        results = response.get("playlistEditResults") if isinstance(response, dict) else None
+        added.extend(
+            RemoteItem(r["videoId"], r.get("setVideoId")) for r in results or [] if r and r.get("videoId")
+        )
+        metrics.incr("playlist_items_added", len(chunk))
+
+    if delta.moves:
+        set_ids = {item.video_id: item.set_video_id for item in reversed(remote + added)}
+        if any(set_ids.get(v) is None or (b is not None and set_ids.get(b) is None) for v, b in delta.moves):
+            # Some adds came back without their setVideoId: read them from the playlist.
+            fetched = _call(lambda: ytm.get_playlist(playlist_id, limit=None), limiter=limiter, on_retry=on_retry)
+            set_ids = {item.video_id: item.set_video_id for item in reversed(remote_items_from_playlist(fetched))}
+        for video_id, before in delta.moves:
+            move = set_ids[video_id] if before is None else (set_ids[video_id], set_ids[before])
+            edit(lambda: ytm.edit_playlist(playlist_id, moveItem=move))
+        metrics.incr("playlist_items_moved", len(delta.moves))
+    return added
+
+
+def _prepare_jobs(
+    conn: sqlite3.Connection,
+    collections: list[tuple[sqlite3.Row, dict[str, Any]]],
+    *,
+    force_new: bool,
+    verify_after_hours: float,
+    dry_run: bool,
+    metrics: RunMetrics,
+) -> list[_ExportJob]:
+    """
+    Read the tracks and existing playlists of a batch of collections in one
+    query each and turn them into jobs for the export workers. Each collection
+    comes with the job cursor to save once it is done.
+    """
+    uids = [c["collection_uid"] for c, _ in collections]
+    tracks = get_collections_platform_tracks(conn, uids, platform="ytm")
+
+    existing: dict[str, sqlite3.Row] = {}
+    if not force_new:
+        placeholders = ", ".join("?" for _ in uids)
+        rows = conn.execute(
+            f"""
+            SELECT *,
+                last_verified_at >= datetime('now', ?) AS verified_recently
+            FROM platform_collections
+            WHERE platform = 'ytm' AND collection_uid IN ({placeholders});
+            """,
+            (f"-{verify_after_hours} hours", *uids),
         )
-        for row in rows
-    ]
+        for row in rows:
+            existing.setdefault(row["collection_uid"], row)
+
+    jobs: list[_ExportJob] = []
+    stale: list[str] = []
+    for collection, checkpoint in collections:
+        collection_uid = collection["collection_uid"]
+        name = collection["name"]
+        items = tracks[collection_uid]
+        mapped_ids = [video_id for _, video_id in items if video_id]
+        # Two ledger tracks can map to the same video; the playlist holds it once.
+        desired = list(dict.fromkeys(mapped_ids))
+        missing = len(items) - len(mapped_ids)
+
+        if not items:
+            LOGGER.warning("No tracks for collection_uid=%s name=%s", collection_uid, name)
+        else:
+            metrics.incr("playlist_tracks", len(mapped_ids), mapping="mapped")
+            metrics.incr("playlist_tracks", missing, mapping="missing")
+            if missing:
+                LOGGER.warning(
+                    "Missing YT Music mappings for %s tracks in collection_uid=%s name=%s",
+                    missing,
+                    collection_uid,
+                    name,
+                )
+            if not mapped_ids:
+                LOGGER.warning("No mapped YT Music tracks for collection_uid=%s name=%s", collection_uid, name)
+
+        row = existing.get(collection_uid) if desired else None
+        remote = _cached_items(row) if row is not None and verify_after_hours > 0 else None
+        # Playlists that may be edited stop trusting their stored contents before
+        # any worker touches them, so an interrupted export re-reads them next time.
+        if row is not None and (remote is None or not plan_playlist_delta(remote, desired).empty):
+            stale.append(row["platform_collection_id"])
+        jobs.append(
+            _ExportJob(
+                collection_uid=collection_uid,
+                name=name,
+                description=collection["description"],
+                desired=desired,
+                playlist_id=row["platform_collection_id"] if row is not None else None,
+                remote=remote,
+                checkpoint=checkpoint,
+            )
+        )
+
+    if stale and not dry_run:
+        with metrics.timer("db_write"), conn:
+            for playlist_id in stale:
+                set_platform_collection_verified(
+                    conn,
+                    platform="ytm",
+                    platform_collection_id=playlist_id,
+                    verified=False,
+                )
+    return jobs
+
+
+def _export_collection(
+    ytm: YTMusic,
+    job: _ExportJob,
+    *,
+    chunk_size: int,
+    dry_run: bool,
+    limiter: RateLimiter,
+    on_retry: Callable[[BaseException], None],
+    metrics: RunMetrics,
+) -> _ExportResult:
+    """One collection's YT Music calls; runs on a worker thread and never touches SQLite."""
+    name = job.name
+    desired = job.desired
+    if not desired:
+        return _ExportResult(None)
+
+    if job.playlist_id is None:
+        if dry_run:
+            LOGGER.info("DRY RUN create playlist=%s tracks=%s", name, len(desired))
+            return _ExportResult(None)
+
+        # Only rate limits are retried: a failed create may still have made the
+        # playlist, and retrying would make a second one.
+        playlist_id = _call(
+            lambda: ytm.create_playlist(
+                name,
+                job.description or "",
+                privacy_status="PRIVATE",
+                video_ids=desired,
+            ),
+            limiter=limiter,
+            on_retry=on_retry,
+            policy=RATE_LIMIT_RETRY_POLICY,
+        )
+        metrics.incr("playlist_items_added", len(desired))
+        # create_playlist doesn't report setVideoIds: the next export reads them.
+        return _ExportResult("created", playlist_id, [RemoteItem(v, None) for v in desired])
+
+    playlist_id = job.playlist_id
+    remote = job.remote
+    fetched = remote is None
+    if fetched:
+        response = _call(lambda: ytm.get_playlist(playlist_id, limit=None), limiter=limiter, on_retry=on_retry)
+        remote = remote_items_from_playlist(response)
+    metrics.incr("playlist_contents", source="fetched" if fetched else "cached")
+
+    delta = plan_playlist_delta(remote, desired, batch_size=chunk_size)
+    if dry_run:
+        LOGGER.info(
+            "DRY RUN playlist=%s tracks=%s remove=%s add=%s move=%s",
+            name,
+            len(desired),
+            len(delta.remove),
+            len(delta.add),
+            len(delta.moves),
+        )
+        return _ExportResult(None)
+
+    if delta.empty:
+        return _ExportResult("unchanged", playlist_id, remote if fetched else None)
+
+    added = _apply_delta(
+        ytm,
+        playlist_id,
+        delta,
+        remote,
+        chunk_size=chunk_size,
+        limiter=limiter,
+        on_retry=on_retry,
+        metrics=metrics,
+    )
+    return _ExportResult("updated", playlist_id, playlist_after(remote, delta, desired, added))
 
 
 def export_playlists_to_ytmusic(
     *,
+    client: Optional[YTMusic] = None,
+    metrics: Optional[RunMetrics] = None,
     limit: int = 100,
     collection_type: str = "playlist",
     chunk_size: int = 50,
     dry_run: bool = False,
     force_new: bool = False,
+    connection_profile: str = DEFAULT_PROFILE,
+    resume: bool = False,
+    verify_after_hours: float = DEFAULT_VERIFY_AFTER_HOURS,
+    concurrency: int = 4,
+    requests_per_second: Optional[float] = 5.0,
 ) -> None:
+    """
+    Mirror each collection's mapped tracks into a YT Music playlist. A failure in
+    one collection is logged and the others carry on.
+
+    New playlists are created with their tracks in one call. Existing ones are
+    diffed against their current contents and only the removals, adds and moves
+    needed are sent. The contents are read from YT Music, or from the copy the
+    last export stored in platform_collections if it was verified within
+    `verify_after_hours`. That copy is invalidated before any edit, so an
+    interrupted export re-reads the playlist next time.
+
+    Collections are exported `concurrency` at a time, with every worker sharing
+    one `requests_per_second` budget (5 by default; None disables it). Tracks and stored playlists are read for
+    a batch of collections at once, and results are written back in collection
+    order on this thread, which is the only one using SQLite.
+
+    Collections are exported most recently updated first. The last one finished
+    is checkpointed in sync_jobs; resume=True continues an interrupted (or
+    `limit`-capped) run after it, and first exports the collections edited since
+    that run started, which the edit moved ahead of the checkpoint.
+    """
     if limit <= 0:
         raise ValueError("limit must be > 0")
     if chunk_size <= 0:
         raise ValueError("chunk_size must be > 0")
-
-    conn = get_connection()
-    ytm = get_ytmusic_client()
-
-    collections = conn.execute(
-        """
-        SELECT *
-        FROM collections
-        WHERE collection_type = ?
-        ORDER BY updated_at DESC
-        LIMIT ?;
-        """,
-        (collection_type.strip(), limit),
-    ).fetchall()
-
-    LOGGER.info("Found %s collections of type=%s", len(collections), collection_type)
-
-    for collection in collections:
-        collection_uid = collection["collection_uid"]
-        name = collection["name"]
-        description = collection["description"]
-
-        try:
-            tracks = _get_collection_tracks(conn, collection_uid)
-            if not tracks:
-                LOGGER.warning("No tracks for collection_uid=%s name=%s", collection_uid, name)
-                continue
-
-            mapped_ids = [t.platform_track_id for t in tracks if t.platform_track_id]
-            missing = [t for t in tracks if not t.platform_track_id]
-            if missing:
-                LOGGER.warning(
-                    "Missing YT Music mappings for %s tracks in collection_uid=%s name=%s",
-                    len(missing),
-                    collection_uid,
-                    name,
+    if concurrency <= 0:
+        raise ValueError("concurrency must be > 0")
+
+    conn = get_connection(connection_profile)
+    try:
+        apply_schema(conn)
+        metrics = metrics if metrics is not None else RunMetrics("export_playlists")
+        ytm = MeteredClient(client if client is not None else get_ytmusic_client(), metrics, api="ytm")
+        on_retry = metrics.retry_hook("ytm")
+        limiter = RateLimiter(requests_per_second)
+
+        LOGGER.info("Exporting up to %s collections of type=%s", limit, collection_type)
+
+        # Dry runs may start from the checkpoint but never move it.
+        if dry_run:
+            checkpoint = (load_job_cursor(conn, JOB_NAME) or {}) if resume else {}
+        else:
+            with conn:
+                checkpoint = start_job(conn, JOB_NAME, resume=resume)
+
+        # (updated_at, collection_uid) of the last collection finished, and when
+        # the walk it belongs to started. Collections edited since then moved
+        # ahead of it (an edit bumps updated_at), so a resumed run exports those
+        # first; until they are all done, the cursor keeps pointing before them.
+        done = checkpoint.get("after")
+        done = tuple(done) if isinstance(done, list) and len(done) == 2 else None
+        since = checkpoint.get("since") if done is not None else None
+        started = conn.execute("SELECT datetime('now');").fetchone()[0]
+
+        def selected() -> Iterator[tuple[sqlite3.Row, dict[str, Any]]]:
+            edited: set[str] = set()
+            if since is not None:
+                for row in iter_collections(conn, collection_type=collection_type, updated_since=since):
+                    edited.add(row["collection_uid"])
+                    yield row, {"after": list(done), "since": since}
+            for row in iter_collections(conn, collection_type=collection_type, after=done):
+                if row["collection_uid"] not in edited:
+                    yield row, {"after": [row["updated_at"], row["collection_uid"]], "since": started}
+
+        # Streamed by keyset: results are written to platform_collections on this connection.
+        collections = islice(selected(), limit)
+
+        def prepared() -> Iterator[_ExportJob]:
+            while True:
+                batch = list(islice(collections, PREFETCH_COLLECTIONS))
+                if not batch:
+                    return
+                yield from _prepare_jobs(
+                    conn,
+                    batch,
+                    force_new=force_new,
+                    verify_after_hours=verify_after_hours,
+                    dry_run=dry_run,
+                    metrics=metrics,
                 )
 
-            if not mapped_ids:
-                LOGGER.warning("No mapped YT Music tracks for collection_uid=%s name=%s", collection_uid, name)
-                continue
-
-            existing = conn.execute(
-                """
-                SELECT *
-                FROM platform_collections
-                WHERE platform = 'ytm' AND collection_uid = ?;
-                """,
-                (collection_uid,),
-            ).fetchone()
-
-            if dry_run:
-                LOGGER.info(
-                    "DRY RUN playlist=%s tracks=%s existing=%s",
-                    name,
-                    len(mapped_ids),
-                    bool(existing),
-                )
-                continue
+        # Results finished by a worker but not yet written, by collection_uid. If the
+        # run dies, these are still stored so a resume doesn't create their
+        # playlists a second time.
+        unwritten: dict[str, tuple[_ExportJob, _ExportResult]] = {}
+
+        def export(job: _ExportJob) -> _ExportResult:
+            result = _export_collection(
+                ytm,
+                job,
+                chunk_size=chunk_size,
+                dry_run=dry_run,
+                limiter=limiter,
+                on_retry=on_retry,
+                metrics=metrics,
+            )
+            if result.snapshot is not None:
+                unwritten[job.collection_uid] = (job, result)
+            return result
+
+        def store_snapshot(job: _ExportJob, result: _ExportResult) -> None:
+            unwritten.pop(job.collection_uid, None)
+            upsert_platform_collection(
+                conn,
+                platform="ytm",
+                platform_collection_id=result.playlist_id,
+                collection_uid=job.collection_uid,
+                playlist_url=f"https://music.youtube.com/playlist?list={result.playlist_id}",
+                raw_json=_snapshot_payload(job.name, job.description, result.snapshot),
+            )
+            set_platform_collection_verified(conn, platform="ytm", platform_collection_id=result.playlist_id)
 
-            if existing and not force_new:
-                playlist_id = existing["platform_collection_id"]
-            else:
-                playlist_id = ytm.create_playlist(
-                    name,
-                    description or "",
-                    privacy_status="PRIVATE",
-                )
+        # API calls run on the worker pool; results come back in collection order,
+        # so the checkpoint only ever covers collections that are finished.
+        jobs, export_jobs = tee(prepared())
+        results = ordered_map(export, export_jobs, max_workers=concurrency, thread_name_prefix="ytm-export")
 
-                with conn:
-                    upsert_platform_collection(
-                        conn,
-                        platform="ytm",
-                        platform_collection_id=playlist_id,
-                        collection_uid=collection_uid,
-                        playlist_url=f"https://music.youtube.com/playlist?list={playlist_id}",
-                        raw_json={
-                            "name": name,
-                            "description": description,
-                            "source": "ledger_export",
-                        },
+        seen = 0
+        try:
+            for job, fut in zip(jobs, results):
+                seen += 1
+                try:
+                    result = fut.result()
+                except Exception:
+                    LOGGER.exception("Failed exporting collection_uid=%s name=%s", job.collection_uid, job.name)
+                    metrics.incr("playlists", outcome="failed")
+                    result = _ExportResult(None)
+
+                if dry_run:
+                    continue
+
+                with metrics.timer("db_write"), conn:
+                    if result.snapshot is not None:
+                        store_snapshot(job, result)
+                    save_job_cursor(conn, JOB_NAME, job.checkpoint)
+
+                if result.outcome is not None:
+                    metrics.incr("playlists", outcome=result.outcome)
+                    LOGGER.info(
+                        "Exported playlist name=%s tracks=%s playlist_id=%s",
+                        job.name,
+                        len(job.desired),
+                        result.playlist_id,
                     )
+        except BaseException:
+            # Cancel the exports not started, wait for the running ones, and keep
+            # what they did; the checkpoint stays where it is.
+            results.close()
+            if unwritten:
+                with conn:
+                    for job, result in list(unwritten.values()):
+                        store_snapshot(job, result)
+            raise
 
-            for chunk in _chunked(mapped_ids, chunk_size):
-                ytm.add_playlist_items(playlist_id, chunk)
-
-            LOGGER.info(
-                "Exported playlist name=%s tracks=%s playlist_id=%s",
-                name,
-                len(mapped_ids),
-                playlist_id,
-            )
-        except Exception:
-            LOGGER.exception("Failed exporting collection_uid=%s name=%s", collection_uid, name)
+        if seen < limit and not dry_run:
+            with conn:
+                complete_job(conn, JOB_NAME)
+    finally:
+        conn.close()
 
 
 def _configure_logging(verbose: bool, log_path: Optional[str]) -> None:
@@ -175,21 +510,53 @@ def main() -> None:
     parser.add_argument("--limit", type=int, default=100, help="Max playlists to export per run.")
     parser.add_argument("--collection-type", default="playlist", help="Collection type to export.")
     parser.add_argument("--chunk-size", type=int, default=50, help="Batch size for YT Music API calls.")
+    parser.add_argument(
+        "--verify-after-hours",
+        type=float,
+        default=DEFAULT_VERIFY_AFTER_HOURS,
+        help="Re-read a playlist from YT Music when its stored contents are older than this (0 always re-reads).",
+    )
     parser.add_argument("--dry-run", action="store_true", help="Plan only, do not create playlists.")
     parser.add_argument("--force-new", action="store_true", help="Always create a new YT Music playlist.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Collections exported at the same time.")
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=5.0,
+        help="Max YT Music requests per second across all workers (default: 5; 0 disables).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted (or --limit-capped) run from its checkpoint.",
+    )
     parser.add_argument("--verbose", action="store_true", help="Enable debug logging.")
     parser.add_argument("--log-path", help="Optional file path for logs.")
+    parser.add_argument(
+        "--profile",
+        choices=("durable", "bulk"),
+        default=DEFAULT_PROFILE,
+        help="SQLite connection profile.",
+    )
+    add_metrics_dir_argument(parser)
     args = parser.parse_args()
 
     _configure_logging(args.verbose, args.log_path)
 
-    export_playlists_to_ytmusic(
-        limit=args.limit,
-        collection_type=args.collection_type,
-        chunk_size=args.chunk_size,
-        dry_run=args.dry_run,
-        force_new=args.force_new,
-    )
+    with run_report("export_playlists", args.metrics_dir) as metrics:
+        export_playlists_to_ytmusic(
+            metrics=metrics,
+            limit=args.limit,
+            collection_type=args.collection_type,
+            chunk_size=args.chunk_size,
+            dry_run=args.dry_run,
+            force_new=args.force_new,
+            connection_profile=args.profile,
+            resume=args.resume,
+            verify_after_hours=args.verify_after_hours,
+            concurrency=args.concurrency,
+            requests_per_second=args.rate_limit or None,
+        )
 
 
 if __name__ == "__main__":
@@ -2,23 +2,49 @@ from __future__ import annotations
 
 import argparse
 import logging
+import os
+from itertools import tee
 from pathlib import Path
-import re
 from dataclasses import dataclass
-from difflib import SequenceMatcher
-from typing import Any, Iterable, Optional
+from typing import Any, Callable, Iterable, Optional
 
 from ytmusicapi.models.content.enums import LikeStatus
 
-from music_library_ledger.db.artists import get_artists_for_track
-from music_library_ledger.db.connection import get_connection
-from music_library_ledger.db.platform import upsert_platform_track
-from music_library_ledger.db.tracks import list_tracks_missing_platform_mapping
+from music_library_ledger.concurrency import ordered_map
+from music_library_ledger.db.connection import DEFAULT_PROFILE, get_connection
+from music_library_ledger.db.identity_cache import get_identity_cache
+from music_library_ledger.db.jobs import complete_job, load_job_cursor, save_job_cursor, start_job
+from music_library_ledger.db.platform import (
+    clear_match_failures,
+    has_match_failure,
+    record_match_failure,
+    upsert_platform_track,
+)
+from music_library_ledger.db.schema import apply_schema
+from music_library_ledger.db.tracks import (
+    MissingMappingPosition,
+    TrackWithArtists,
+    iter_tracks_with_artists_missing_platform_mapping,
+)
+from music_library_ledger.metrics import MeteredClient, RunMetrics, add_metrics_dir_argument, run_report
+from music_library_ledger.retry import call_with_retry
 from music_library_ledger.ytmusic.client import get_ytmusic_client
+from music_library_ledger.ytmusic.matching import (
+    LEGACY_PROFILE,
+    PROFILES,
+    Matcher,
+    ScoredCandidate,
+    ScoringProfile,
+    prepare_track,
+)
+from music_library_ledger.ytmusic.rate_limit import RateLimiter
+from music_library_ledger.ytmusic.search_cache import SearchCache, SearchCacheConfig, open_search_cache
 from ytmusicapi import YTMusic
 
 LOGGER = logging.getLogger(__name__)
 
+JOB_NAME = "export_tracks"
+
 
 @dataclass(frozen=True)
 class TrackInfo:
@@ -29,206 +55,341 @@ class TrackInfo:
     artists: list[str]
 
 
-@dataclass(frozen=True)
-class MatchCandidate:
-    video_id: str
-    title: str
-    artists: list[str]
-    duration_ms: Optional[int]
-    raw: dict[str, Any]
-    score: float
+def _best_candidate(
+    matcher: Matcher,
+    track: TrackInfo,
+    candidates: Iterable[dict[str, Any]],
+) -> Optional[ScoredCandidate]:
+    return matcher.best(prepare_track(track.title, track.artists, track.duration_ms), candidates)
 
 
-def _normalize_text(value: str) -> str:
-    value = value.lower()
-    value = re.sub(r"[^a-z0-9]+", " ", value)
-    return " ".join(value.split())
+def _pick_best_match(
+    matcher: Matcher,
+    track: TrackInfo,
+    candidates: Iterable[dict[str, Any]],
+    *,
+    min_score: float,
+) -> Optional[ScoredCandidate]:
+    best = _best_candidate(matcher, track, candidates)
+    if best and best.score >= min_score:
+        return best
+    return None
 
 
-def _ratio(a: str, b: str) -> float:
-    if not a or not b:
-        return 0.0
-    return SequenceMatcher(None, _normalize_text(a), _normalize_text(b)).ratio()
+def _track_info(track: TrackWithArtists) -> TrackInfo:
+    title = (track.title or "").strip() or "UNKNOWN TITLE"
+    return TrackInfo(
+        track_uid=track.track_uid,
+        title=title,
+        album=track.album,
+        duration_ms=track.duration_ms,
+        artists=list(track.artists),
+    )
 
 
-def _duration_str_to_ms(value: Optional[str]) -> Optional[int]:
-    if not value:
-        return None
-    parts = value.split(":")
-    if not parts or any(not p.isdigit() for p in parts):
-        return None
-    total_seconds = 0
-    for part in parts:
-        total_seconds = total_seconds * 60 + int(part)
-    return total_seconds * 1000
+@dataclass(frozen=True)
+class _SearchJob:
+    track: TrackInfo
+    query: str
+    cached: dict[str, list[dict[str, Any]]]  # filter -> cached response
+    position: MissingMappingPosition
 
 
-def _duration_score(expected_ms: Optional[int], candidate_ms: Optional[int]) -> float:
-    if expected_ms is None or candidate_ms is None:
-        return 0.0
-    delta = abs(expected_ms - candidate_ms)
-    if delta <= 2500:
-        return 1.0
-    if delta <= 5000:
-        return 0.5
-    if delta <= 10000:
-        return 0.2
-    return 0.0
+def _checkpoint(position: MissingMappingPosition) -> dict[str, Any]:
+    return {
+        "backoff_pass": position.backoff_pass,
+        "created_at": position.created_at,
+        "track_uid": position.track_uid,
+    }
 
 
-def _best_artist_ratio(track_artists: list[str], candidate_artists: list[str]) -> float:
-    if not track_artists or not candidate_artists:
-        return 0.0
-    return max(_ratio(track_artist, cand_artist) for track_artist in track_artists for cand_artist in candidate_artists)
+def _resume_position(checkpoint: dict[str, Any]) -> Optional[MissingMappingPosition]:
+    if not checkpoint.get("track_uid"):
+        return None
+    return MissingMappingPosition(
+        backoff_pass=checkpoint.get("backoff_pass"),
+        created_at=checkpoint.get("created_at") or "",
+        track_uid=checkpoint["track_uid"],
+    )
 
 
-def _pick_best_match(
-    track: TrackInfo,
-    candidates: Iterable[dict[str, Any]],
+def _cached_responses(
+    search_cache: Optional[SearchCache],
+    query: str,
     *,
-    min_score: float,
-) -> Optional[MatchCandidate]:
-    best: Optional[MatchCandidate] = None
-
-    for cand in candidates:
-        video_id = cand.get("videoId")
-        if not video_id:
-            continue
-
-        title = cand.get("title") or ""
-        artists = [a.get("name") for a in (cand.get("artists") or []) if isinstance(a, dict) and a.get("name")]
-        duration_ms = _duration_str_to_ms(cand.get("duration"))
-
-        title_ratio = _ratio(track.title, title)
-        artist_ratio = _best_artist_ratio(track.artists, artists)
-        duration_ratio = _duration_score(track.duration_ms, duration_ms)
-
-        score = 0.65 * title_ratio + 0.25 * artist_ratio + 0.10 * duration_ratio
-        if title_ratio < 0.6:
-            continue
-
-        candidate = MatchCandidate(
-            video_id=video_id,
-            title=title,
-            artists=artists,
-            duration_ms=duration_ms,
-            raw=cand,
-            score=score,
-        )
+    limit: int,
+) -> dict[str, list[dict[str, Any]]]:
+    # Mirrors _search_responses: videos are only consulted when songs came back empty.
+    if search_cache is None:
+        return {}
+    songs = search_cache.get(query, "songs", limit)
+    if songs is None:
+        return {}
+    if songs:
+        return {"songs": songs}
+    videos = search_cache.get(query, "videos", limit)
+    if videos is None:
+        return {"songs": songs}
+    return {"songs": songs, "videos": videos}
+
+
+def _search_responses(
+    ytm: YTMusic,
+    query: str,
+    *,
+    limit: int,
+    limiter: Optional[RateLimiter] = None,
+    cached: Optional[dict[str, list[dict[str, Any]]]] = None,
+    on_retry: Optional[Callable[[BaseException], None]] = None,
+) -> dict[str, list[dict[str, Any]]]:
+    def search(search_filter: str) -> list[dict[str, Any]]:
+        # Retries wait for the limiter too, so a 429 doesn't jump the queue.
+        def attempt() -> list[dict[str, Any]]:
+            if limiter is not None:
+                limiter.acquire()
+            return ytm.search(query, filter=search_filter, limit=limit) or []
 
-        if best is None or candidate.score > best.score:
-            best = candidate
+        return call_with_retry(attempt, on_retry=on_retry)
 
-    if best and best.score >= min_score:
-        return best
-    return None
+    responses = dict(cached or {})
+    if "songs" not in responses:
+        responses["songs"] = search("songs")
+    if not responses["songs"] and "videos" not in responses:
+        responses["videos"] = search("videos")
+    return responses
 
 
-def _track_from_row(conn, row) -> TrackInfo:
-    artists = [artist["name"] for artist in get_artists_for_track(conn, row["track_uid"])]
-    title = (row["title"] or "").strip() or "UNKNOWN TITLE"
-    return TrackInfo(
-        track_uid=row["track_uid"],
-        title=title,
-        album=row["album"],
-        duration_ms=row["duration_ms"],
-        artists=artists,
-    )
+def _candidates_from_responses(responses: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    return responses.get("songs") or responses.get("videos") or []
 
 
-def _search_candidates(ytm: YTMusic, query: str, *, limit: int) -> list[dict[str, Any]]:
-    results = ytm.search(query, filter="songs", limit=limit) or []
-    if results:
-        return results
-    return ytm.search(query, filter="videos", limit=limit) or []
+def _search_query(track: TrackInfo) -> str:
+    artist_hint = track.artists[0] if track.artists else ""
+    return f"{track.title} {artist_hint}".strip()
 
 
 def export_tracks_to_ytmusic(
     *,
+    client: Optional[YTMusic] = None,
+    metrics: Optional[RunMetrics] = None,
     limit: int = 5000,
     media_type: Optional[str] = "song",
     search_limit: int = 5,
     min_score: float = 0.65,
     dry_run: bool = False,
+    concurrency: int = 4,
+    requests_per_second: Optional[float] = 5.0,
+    search_cache_config: Optional[SearchCacheConfig] = SearchCacheConfig(),
+    retry_base_hours: float = 24.0,
+    retry_max_hours: float = 24.0 * 30,
+    ignore_backoff: bool = False,
+    match_profile: ScoringProfile = LEGACY_PROFILE,
+    connection_profile: str = DEFAULT_PROFILE,
+    resume: bool = False,
 ) -> None:
+    """
+    Search YT Music for tracks without a ytm mapping, like the best match and
+    record the mapping (or the failed attempt, for backoff).
+
+    Search responses are cached per query (search_cache_config); a track with a
+    failed attempt on record searches again rather than reading the cache.
+
+    The position of the last track written is checkpointed in sync_jobs with
+    each write; resume=True continues an interrupted (or `limit`-capped) run
+    after it. Tracks whose search or like failed before that point are left for
+    the next full run.
+    """
     if limit <= 0:
         raise ValueError("limit must be > 0")
     if search_limit <= 0:
         raise ValueError("search_limit must be > 0")
+    if concurrency <= 0:
+        raise ValueError("concurrency must be > 0")
+
+    conn = get_connection(connection_profile)
+    try:
+        apply_schema(conn)
+        metrics = metrics if metrics is not None else RunMetrics("export_tracks")
+        ytm = MeteredClient(client if client is not None else get_ytmusic_client(), metrics, api="ytm")
+        on_retry = metrics.retry_hook("ytm")
+        cache = get_identity_cache(conn)
+        matcher = Matcher(match_profile)
+
+        # Dry runs may start from the checkpoint but never move it.
+        if dry_run:
+            checkpoint = (load_job_cursor(conn, JOB_NAME) or {}) if resume else {}
+        else:
+            with conn:
+                checkpoint = start_job(conn, JOB_NAME, resume=resume)
+
+        # Tracks and their artists in one query per page, not one artist lookup per
+        # track; pages are read by keyset, so writing mappings below is safe.
+        tracks = iter_tracks_with_artists_missing_platform_mapping(
+            conn,
+            platform="ytm",
+            media_type=media_type,
+            limit=limit,
+            respect_backoff=not ignore_backoff,
+            after=_resume_position(checkpoint),
+        )
 
-    conn = get_connection()
-    ytm = get_ytmusic_client()
-
-    tracks = list_tracks_missing_platform_mapping(
-        conn,
-        platform="ytm",
-        media_type=media_type,
-        limit=limit,
-    )
-
-    LOGGER.info("Found %s tracks missing YT Music mapping", len(tracks))
-
-    for row in tracks:
-        track = _track_from_row(conn, row)
-        artist_hint = track.artists[0] if track.artists else ""
-        query = f"{track.title} {artist_hint}".strip()
+        limiter = RateLimiter(requests_per_second)
+        search_cache = open_search_cache(conn, search_cache_config) if search_cache_config else None
+
+        def _retried(row: TrackWithArtists) -> bool:
+            # The backoff walk knows which pass a track came from; without it, look.
+            if row.backoff_pass is not None:
+                return row.backoff_pass == "due"
+            return has_match_failure(conn, platform="ytm", track_uid=row.track_uid)
+
+        def _job(row: TrackWithArtists) -> _SearchJob:
+            track = _track_info(row)
+            query = _search_query(track)
+            # A retry after a failed match searches again rather than replaying
+            # the cached miss; its fresh responses then replace the cached ones.
+            cached = {} if _retried(row) else _cached_responses(search_cache, query, limit=search_limit)
+            return _SearchJob(track=track, query=query, cached=cached, position=row.position())
+
+        # Searches run on a worker pool; results come back in input order and
+        # matching, cache writes and DB writes stay on this (the only) SQLite thread.
+        # tee only buffers the jobs in flight in ordered_map's window.
+        jobs, search_jobs = tee(_job(row) for row in tracks)
+        searches = ordered_map(
+            lambda job: _search_responses(
+                ytm,
+                job.query,
+                limit=search_limit,
+                limiter=limiter,
+                cached=job.cached,
+                on_retry=on_retry,
+            ),
+            search_jobs,
+            max_workers=concurrency,
+            thread_name_prefix="ytm-search",
+        )
 
-        try:
-            candidates = _search_candidates(ytm, query, limit=search_limit)
-        except Exception:
-            LOGGER.exception("Search failed for track_uid=%s title=%s", track.track_uid, track.title)
-            continue
+        processed = 0
+        for job, fut in zip(jobs, searches):
+            processed += 1
+            metrics.incr("tracks_processed")
+            try:
+                responses = fut.result()
+            except Exception:
+                LOGGER.exception("Search failed for track_uid=%s title=%s", job.track.track_uid, job.track.title)
+                metrics.incr("tracks_failed", stage="search")
+                continue
+
+            track = job.track
+            candidates = _candidates_from_responses(responses)
+
+            with metrics.timer("match"):
+                best = _best_candidate(matcher, track, candidates)
+            match = best if best and best.score >= min_score else None
+            metrics.incr("tracks_matched" if match else "tracks_unmatched")
+
+            if search_cache is not None:
+                for search_filter, results in responses.items():
+                    if search_filter not in job.cached:
+                        search_cache.put(job.query, search_filter, search_limit, results)
+            if not match:
+                LOGGER.warning(
+                    "No YT Music match for track_uid=%s title=%s artists=%s",
+                    track.track_uid,
+                    track.title,
+                    ", ".join(track.artists) or "UNKNOWN",
+                )
+                if not dry_run:
+                    with metrics.timer("db_write"), conn:
+                        attempts = record_match_failure(
+                            conn,
+                            platform="ytm",
+                            track_uid=track.track_uid,
+                            best_score=best.score if best else None,
+                            base_delay_hours=retry_base_hours,
+                            max_delay_hours=retry_max_hours,
+                        )
+                        save_job_cursor(conn, JOB_NAME, _checkpoint(job.position))
+                    LOGGER.debug("Recorded failed match attempt=%s track_uid=%s", attempts, track.track_uid)
+                continue
+
+            if dry_run:
+                LOGGER.info(
+                    "DRY RUN match track_uid=%s -> %s (%s) score=%.2f",
+                    track.track_uid,
+                    match.title,
+                    ", ".join(match.artists) or "UNKNOWN",
+                    match.score,
+                )
+                continue
+
+            def like() -> None:
+                limiter.acquire()
+                ytm.rate_song(match.video_id, rating=LikeStatus.LIKE)
+
+            try:
+                # A video already mapped (to another ledger track) was liked when
+                # that mapping was made.
+                if cache.get_track_by_platform_id("ytm", match.video_id) is None:
+                    call_with_retry(like, on_retry=on_retry)
+                else:
+                    metrics.incr("likes_skipped")
+            except Exception:
+                LOGGER.exception(
+                    "Failed to add to YT Music library track_uid=%s title=%s video_id=%s",
+                    track.track_uid,
+                    track.title,
+                    match.video_id,
+                )
+                metrics.incr("tracks_failed", stage="like")
+                continue
+
+            with metrics.timer("db_write"), cache.transaction(conn):
+                written = upsert_platform_track(
+                    conn,
+                    platform="ytm",
+                    platform_track_id=match.video_id,
+                    track_uid=track.track_uid,
+                    song_url=f"https://music.youtube.com/watch?v={match.video_id}",
+                    raw_json=match.raw,
+                    match_confidence=match.score,
+                    match_method="ytmusic_search",
+                )
+                clear_match_failures(conn, platform="ytm", track_uid=track.track_uid)
+                cache.put_track_platform_id("ytm", match.video_id, track.track_uid)
+                save_job_cursor(conn, JOB_NAME, _checkpoint(job.position))
+            metrics.incr("rows_written" if written else "rows_skipped", table="platform_tracks")
 
-        match = _pick_best_match(track, candidates, min_score=min_score)
-        if not match:
-            LOGGER.warning(
-                "No YT Music match for track_uid=%s title=%s artists=%s",
-                track.track_uid,
-                track.title,
-                ", ".join(track.artists) or "UNKNOWN",
-            )
-            continue
-
-        if dry_run:
             LOGGER.info(
-                "DRY RUN match track_uid=%s -> %s (%s) score=%.2f",
+                "Added track_uid=%s -> %s (%s) score=%.2f",
                 track.track_uid,
                 match.title,
                 ", ".join(match.artists) or "UNKNOWN",
                 match.score,
             )
-            continue
 
-        try:
-            ytm.rate_song(match.video_id, rating=LikeStatus.LIKE)
-        except Exception:
-            LOGGER.exception(
-                "Failed to add to YT Music library track_uid=%s title=%s video_id=%s",
-                track.track_uid,
-                track.title,
-                match.video_id,
-            )
-            continue
-
-        with conn:
-            upsert_platform_track(
-                conn,
-                platform="ytm",
-                platform_track_id=match.video_id,
-                track_uid=track.track_uid,
-                song_url=f"https://music.youtube.com/watch?v={match.video_id}",
-                raw_json=match.raw,
-                match_confidence=match.score,
-                match_method="ytmusic_search",
-            )
+        LOGGER.info("Processed %s tracks missing YT Music mapping", processed)
+        if processed < limit and not dry_run:
+            with conn:
+                complete_job(conn, JOB_NAME)
 
-        LOGGER.info(
-            "Added track_uid=%s -> %s (%s) score=%.2f",
-            track.track_uid,
-            match.title,
-            ", ".join(match.artists) or "UNKNOWN",
-            match.score,
-        )
+        matched, unmatched = metrics.counter("tracks_matched"), metrics.counter("tracks_unmatched")
+        if matched + unmatched:
+            metrics.set_gauge("match_rate", round(matched / (matched + unmatched), 4))
+
+        if search_cache is not None:
+            stats = search_cache.stats
+            for outcome in ("hits", "misses", "expired", "stores", "evictions"):
+                metrics.incr("search_cache", getattr(stats, outcome), outcome=outcome)
+            LOGGER.info(
+                "Search cache hits=%s misses=%s expired=%s stores=%s evictions=%s",
+                stats.hits,
+                stats.misses,
+                stats.expired,
+                stats.stores,
+                stats.evictions,
+            )
+    finally:
+        conn.close()
 
 
 def _configure_logging(verbose: bool, log_path: Optional[str]) -> None:
@@ -253,20 +414,81 @@ def main() -> None:
     parser.add_argument("--search-limit", type=int, default=5, help="Candidates per search call.")
     parser.add_argument("--min-score", type=float, default=0.65, help="Minimum match score.")
     parser.add_argument("--dry-run", action="store_true", help="Match only, do not add to YT Music.")
+    parser.add_argument(
+        "--match-profile",
+        choices=sorted(PROFILES),
+        default="legacy",
+        help=(
+            "Scoring profile: 'legacy' (SequenceMatcher, original scores) or 'fast' (character bigrams; "
+            "cheaper, but scores differ, so check --min-score with the matching bench first)."
+        ),
+    )
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent YT Music search requests.")
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=5.0,
+        help="Max YT Music requests per second across all workers (default: 5; 0 disables).",
+    )
+    parser.add_argument(
+        "--search-cache",
+        choices=("sqlite", "redis", "none"),
+        default="sqlite",
+        help="Where to cache YT Music search responses.",
+    )
+    parser.add_argument("--search-cache-ttl-hours", type=float, default=168, help="Search cache entry lifetime.")
+    parser.add_argument("--search-cache-max-entries", type=int, default=200_000, help="Search cache size bound.")
+    parser.add_argument(
+        "--retry-base-hours",
+        type=float,
+        default=24.0,
+        help="Backoff before retrying an unmatched track; doubles on each failed attempt.",
+    )
+    parser.add_argument("--retry-max-days", type=float, default=30.0, help="Upper bound for the retry backoff.")
+    parser.add_argument("--ignore-backoff", action="store_true", help="Retry unmatched tracks regardless of backoff.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue after the last track written by an interrupted (or --limit-capped) run.",
+    )
+    parser.add_argument("--redis-url", default=os.environ.get("REDIS_URL"), help="Redis URL for --search-cache redis.")
     parser.add_argument("--verbose", action="store_true", help="Enable debug logging.")
     parser.add_argument("--log-path", help="Optional file path for logs.")
+    parser.add_argument(
+        "--profile",
+        choices=("durable", "bulk"),
+        default=DEFAULT_PROFILE,
+        help="SQLite connection profile.",
+    )
+    add_metrics_dir_argument(parser)
     args = parser.parse_args()
 
     media_type = args.media_type.strip() if args.media_type else None
     _configure_logging(args.verbose, args.log_path)
 
-    export_tracks_to_ytmusic(
-        limit=args.limit,
-        media_type=media_type,
-        search_limit=args.search_limit,
-        min_score=args.min_score,
-        dry_run=args.dry_run,
-    )
+    with run_report("export_tracks", args.metrics_dir) as metrics:
+        export_tracks_to_ytmusic(
+            metrics=metrics,
+            limit=args.limit,
+            media_type=media_type,
+            search_limit=args.search_limit,
+            min_score=args.min_score,
+            dry_run=args.dry_run,
+            concurrency=args.concurrency,
+            requests_per_second=args.rate_limit or None,
+            search_cache_config=SearchCacheConfig(
+                backend=args.search_cache,
+                ttl_seconds=int(args.search_cache_ttl_hours * 3600),
+                max_entries=args.search_cache_max_entries,
+                redis_url=args.redis_url,
+            ),
+            retry_base_hours=args.retry_base_hours,
+            retry_max_hours=args.retry_max_days * 24,
+            ignore_backoff=args.ignore_backoff,
+            match_profile=PROFILES[args.match_profile],
+            connection_profile=args.profile,
+            resume=args.resume,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Optional
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(value: str) -> str:
+    return " ".join(_NON_ALNUM_RE.sub(" ", value.lower()).split())
+
+
+@dataclass(frozen=True)
+class PreparedText:
+    """A string normalized and tokenized once, so scoring it against many candidates is cheap."""
+
+    text: str
+    tokens: frozenset[str]
+    bigrams: frozenset[str]
+
+
+@lru_cache(maxsize=65536)
+def prepare_text(value: str) -> PreparedText:
+    # Cached: the same artist names and titles come back across many search results.
+    text = normalize_text(value)
+    padded = f" {text} "
+    return PreparedText(
+        text=text,
+        tokens=frozenset(text.split()),
+        bigrams=frozenset(padded[i : i + 2] for i in range(len(padded) - 1)) if text else frozenset(),
+    )
+
+
+def difflib_similarity(a: PreparedText, b: PreparedText) -> float:
+    """The original SequenceMatcher ratio, minus the per-call regex normalization."""
+    if not a.text or not b.text:
+        return 0.0
+    return SequenceMatcher(None, a.text, b.text, autojunk=True).ratio()
+
+
+def bigram_similarity(a: PreparedText, b: PreparedText) -> float:
+    """
+    Dice coefficient over padded character bigrams, with an exact token-set match
+    (same words, any order) scoring 1.0. Set intersections run in C, so this is
+    several times cheaper than SequenceMatcher for title-length strings. Bigrams
+    rather than trigrams: a one-letter typo in a short title costs far less.
+    """
+    if not a.bigrams or not b.bigrams:
+        return 0.0
+    if a.text == b.text or a.tokens == b.tokens:
+        return 1.0
+    return 2.0 * len(a.bigrams & b.bigrams) / (len(a.bigrams) + len(b.bigrams))
+
+
+SimilarityKernel = Callable[[PreparedText, PreparedText], float]
+
+KERNELS: dict[str, SimilarityKernel] = {
+    "difflib": difflib_similarity,
+    "bigram": bigram_similarity,
+}
+
+
+@dataclass(frozen=True)
+class ScoringProfile:
+    kernel: str = "difflib"
+    title_weight: float = 0.65
+    artist_weight: float = 0.25
+    duration_weight: float = 0.10
+    min_title_ratio: float = 0.6
+
+
+# Same weights and kernel as the original _pick_best_match, so the same scores
+# (except that strings which normalize to nothing now score 0 rather than 1).
+# The default: min_score thresholds were tuned against these scores.
+LEGACY_PROFILE = ScoringProfile(kernel="difflib")
+# Opt-in. Much cheaper, but picks a different best match (or crosses min_score
+# differently) for a few percent of tracks.
+FAST_PROFILE = ScoringProfile(kernel="bigram")
+
+PROFILES: dict[str, ScoringProfile] = {
+    "legacy": LEGACY_PROFILE,
+    "fast": FAST_PROFILE,
+}
+
+
+def duration_str_to_ms(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    parts = value.split(":")
+    if not parts or any(not p.isdigit() for p in parts):
+        return None
+    total_seconds = 0
+    for part in parts:
+        total_seconds = total_seconds * 60 + int(part)
+    return total_seconds * 1000
+
+
+def duration_score(expected_ms: Optional[int], candidate_ms: Optional[int]) -> float:
+    if expected_ms is None or candidate_ms is None:
+        return 0.0
+    delta = abs(expected_ms - candidate_ms)
+    if delta <= 2500:
+        return 1.0
+    if delta <= 5000:
+        return 0.5
+    if delta <= 10000:
+        return 0.2
+    return 0.0
+
+
+@dataclass(frozen=True)
+class PreparedTrack:
+    title: PreparedText
+    artists: tuple[PreparedText, ...]
+    duration_ms: Optional[int]
+
+
+def prepare_track(title: str, artists: Iterable[str], duration_ms: Optional[int]) -> PreparedTrack:
+    return PreparedTrack(
+        title=prepare_text(title),
+        artists=tuple(prepare_text(a) for a in artists),
+        duration_ms=duration_ms,
+    )
+
+
+@dataclass(frozen=True)
+class ScoredCandidate:
+    video_id: str
+    title: str
+    artists: list[str]
+    duration_ms: Optional[int]
+    raw: dict[str, Any]
+    score: float
+    title_ratio: float
+
+
+class Matcher:
+    """
+    Scores ytm.search results against a library track under a ScoringProfile.
+
+    The track is prepared once per call and each candidate string once per process
+    (prepare_text is memoized); artist scoring short-circuits on an exact match.
+    """
+
+    def __init__(self, profile: ScoringProfile = LEGACY_PROFILE) -> None:
+        if profile.kernel not in KERNELS:
+            raise ValueError(f"Unknown similarity kernel: {profile.kernel}")
+        self.profile = profile
+        self._similarity = KERNELS[profile.kernel]
+
+    def best_artist_ratio(self, track_artists: tuple[PreparedText, ...], candidate_artists: list[str]) -> float:
+        if not track_artists or not candidate_artists:
+            return 0.0
+        similarity = self._similarity
+        best = 0.0
+        for name in candidate_artists:
+            cand = prepare_text(name)
+            for track_artist in track_artists:
+                if track_artist.text == cand.text and cand.text:
+                    return 1.0
+                ratio = similarity(track_artist, cand)
+                if ratio > best:
+                    best = ratio
+        return best
+
+    def score_candidates(
+        self,
+        track: PreparedTrack,
+        candidates: Iterable[dict[str, Any]],
+    ) -> list[ScoredCandidate]:
+        """Every candidate with a videoId that clears min_title_ratio, in input order."""
+        profile = self.profile
+        similarity = self._similarity
+        scored: list[ScoredCandidate] = []
+
+        for cand in candidates:
+            video_id = cand.get("videoId")
+            if not video_id:
+                continue
+
+            title = cand.get("title") or ""
+            title_ratio = similarity(track.title, prepare_text(title))
+            if title_ratio < profile.min_title_ratio:
+                continue
+
+            artists = [a.get("name") for a in (cand.get("artists") or []) if isinstance(a, dict) and a.get("name")]
+            duration_ms = duration_str_to_ms(cand.get("duration"))
+            score = (
+                profile.title_weight * title_ratio
+                + profile.artist_weight * self.best_artist_ratio(track.artists, artists)
+                + profile.duration_weight * duration_score(track.duration_ms, duration_ms)
+            )
+            scored.append(
+                ScoredCandidate(
+                    video_id=video_id,
+                    title=title,
+                    artists=artists,
+                    duration_ms=duration_ms,
+                    raw=cand,
+                    score=score,
+                    title_ratio=title_ratio,
+                )
+            )
+
+        return scored
+
+    def best(self, track: PreparedTrack, candidates: Iterable[dict[str, Any]]) -> Optional[ScoredCandidate]:
+        best: Optional[ScoredCandidate] = None
+        for candidate in self.score_candidates(track, candidates):
+            # First of equal scores wins, as in the original loop.
+            if best is None or candidate.score > best.score:
+                best = candidate
+        return best
@@ -0,0 +1,136 @@
+"""
+Plan the edits that turn a YT Music playlist into the ledger's version of it.
+
+    delta = plan_playlist_delta(remote_items, desired_video_ids)
+
+YT Music addresses playlist entries by setVideoId (one per entry, so the same
+video can appear twice), adds only at the end, and moves one entry per
+edit_playlist call. The plan therefore removes entries the ledger doesn't
+have, appends the missing videos, and moves only the entries outside the
+longest run that is already in the right order.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class RemoteItem:
+    video_id: str
+    set_video_id: Optional[str]              # None until read back from YT Music
+
+
+@dataclass
+class PlaylistDelta:
+    remove: list[RemoteItem] = field(default_factory=list)
+    add: list[str] = field(default_factory=list)                  # video ids, appended in this order
+    # (video id to move, video id it goes before or None for the end), in order.
+    # Video ids rather than setVideoIds: added entries only get theirs from YT Music.
+    moves: list[tuple[str, Optional[str]]] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.remove or self.add or self.moves)
+
+
+def remote_items_from_playlist(playlist: dict[str, Any]) -> list[RemoteItem]:
+    """The entries of a get_playlist response, in order."""
+    return [
+        RemoteItem(t["videoId"], t.get("setVideoId"))
+        for t in playlist.get("tracks") or []
+        if t.get("videoId")
+    ]
+
+
+def _longest_increasing_run(values: Sequence[int]) -> set[int]:
+    """Indexes (into `values`) of one longest strictly increasing subsequence."""
+    tails: list[int] = []                    # values[i] ending the best run of each length
+    tail_idx: list[int] = []
+    prev = [-1] * len(values)
+    for i, v in enumerate(values):
+        k = bisect_left(tails, v)
+        if k == len(tails):
+            tails.append(v)
+            tail_idx.append(i)
+        else:
+            tails[k] = v
+            tail_idx[k] = i
+        prev[i] = tail_idx[k - 1] if k else -1
+
+    keep: set[int] = set()
+    i = tail_idx[-1] if tail_idx else -1
+    while i >= 0:
+        keep.add(i)
+        i = prev[i]
+    return keep
+
+
+def _calls(delta: PlaylistDelta, batch_size: int) -> int:
+    return -(-len(delta.remove) // batch_size) - (-len(delta.add) // batch_size) + len(delta.moves)
+
+
+def plan_playlist_delta(
+    remote: Iterable[RemoteItem],
+    desired: Sequence[str],
+    *,
+    batch_size: Optional[int] = None,
+) -> PlaylistDelta:
+    """
+    Edits that make `remote` hold exactly `desired` (distinct video ids), in order.
+    Moves refer to the order after the removals and adds have been applied.
+
+    With `batch_size` (entries per remove/add call), a heavily reordered playlist
+    is emptied and refilled instead when that takes fewer calls than the moves.
+    """
+    remote = list(remote)
+    delta = PlaylistDelta()
+    wanted = {video_id: idx for idx, video_id in enumerate(desired)}
+
+    # Keep the first entry of each wanted video; extra copies and unwanted videos go.
+    kept: list[str] = []
+    seen: set[str] = set()
+    for item in remote:
+        if item.video_id in wanted and item.video_id not in seen:
+            seen.add(item.video_id)
+            kept.append(item.video_id)
+        else:
+            delta.remove.append(item)
+    delta.add = [video_id for video_id in desired if video_id not in seen]
+
+    # After the adds the playlist reads kept + add; everything outside the
+    # longest run already in desired order is moved, last first, in front of
+    # its successor, which by then sits where it belongs.
+    current = kept + delta.add
+    in_place = {current[i] for i in _longest_increasing_run([wanted[v] for v in current])}
+    for idx in range(len(desired) - 1, -1, -1):
+        video_id = desired[idx]
+        if video_id not in in_place:
+            delta.moves.append((video_id, desired[idx + 1] if idx + 1 < len(desired) else None))
+
+    if batch_size is not None and delta.moves:
+        rebuild = PlaylistDelta(remove=remote, add=list(desired))
+        if _calls(rebuild, batch_size) < _calls(delta, batch_size):
+            return rebuild
+    return delta
+
+
+def playlist_after(
+    remote: Iterable[RemoteItem],
+    delta: PlaylistDelta,
+    desired: Sequence[str],
+    added: Iterable[RemoteItem],
+) -> list[RemoteItem]:
+    """
+    The entries of the playlist once `delta` (planned from `remote` towards
+    `desired`) has been applied, given the entries YT Music reported for the adds.
+    """
+    removed = set(delta.remove)
+    entries: dict[str, RemoteItem] = {}
+    for item in remote:
+        if item not in removed:
+            entries.setdefault(item.video_id, item)
+    for item in added:
+        entries.setdefault(item.video_id, item)
+    return [entries.get(video_id, RemoteItem(video_id, None)) for video_id in desired]
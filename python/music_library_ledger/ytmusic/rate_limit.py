@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every worker that talks to the same API.
+
+    `rate` tokens are added per second up to `burst`; acquire() blocks until a
+    token is available. A rate of None disables limiting.
+    """
+
+    def __init__(self, rate: Optional[float], *, burst: Optional[int] = None) -> None:
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate or 1))
+        if self.burst <= 0:
+            raise ValueError("burst must be > 0")
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate is None:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Optional
+
+SearchResults = list[dict[str, Any]]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+@dataclass
+class SearchCacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+
+@dataclass(frozen=True)
+class SearchCacheConfig:
+    backend: str = "sqlite"                  # 'sqlite', 'redis' or 'none'
+    ttl_seconds: int = 7 * 24 * 3600
+    max_entries: int = 200_000
+    redis_url: Optional[str] = None
+
+
+class SearchCache(ABC):
+    """ytm.search responses keyed by (normalized query, filter, limit)."""
+
+    def __init__(self) -> None:
+        self.stats = SearchCacheStats()
+
+    @abstractmethod
+    def get(self, query: str, search_filter: str, limit: int) -> Optional[SearchResults]:
+        """The cached results, or None on a miss or an expired entry."""
+
+    @abstractmethod
+    def put(self, query: str, search_filter: str, limit: int, results: SearchResults) -> None:
+        """Store `results`, replacing any entry for the same key."""
+
+
+class SQLiteSearchCache(SearchCache):
+    """
+    Side table in the ledger database (music_library_ledger/sql/50_ytm_search_cache.sql).
+
+    Use it from the thread that owns `conn`. Entries older than ttl_seconds are
+    ignored and replaced; once more than max_entries are stored the oldest are evicted.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, *, ttl_seconds: int, max_entries: int) -> None:
+        super().__init__()
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be > 0")
+        if max_entries <= 0:
+            raise ValueError("max_entries must be > 0")
+        self.conn = conn
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._size = conn.execute("SELECT COUNT(*) FROM ytm_search_cache;").fetchone()[0]
+
+    def get(self, query: str, search_filter: str, limit: int) -> Optional[SearchResults]:
+        row = self.conn.execute(
+            """
+            SELECT response_json,
+                   created_at >= datetime('now', ?) AS fresh
+            FROM ytm_search_cache
+            WHERE query_key = ? AND search_filter = ? AND result_limit = ?;
+            """,
+            (f"-{self.ttl_seconds} seconds", normalize_query(query), search_filter, limit),
+        ).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        if not row[1]:
+            self.stats.expired += 1
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(row[0])
+
+    def put(self, query: str, search_filter: str, limit: int, results: SearchResults) -> None:
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO ytm_search_cache (
+                    query_key,
+                    search_filter,
+                    result_limit,
+                    response_json,
+                    created_at
+                )
+                VALUES (?, ?, ?, ?, datetime('now'))
+                ON CONFLICT(query_key, search_filter, result_limit) DO UPDATE SET
+                    response_json = excluded.response_json,
+                    created_at = excluded.created_at;
+                """,
+                (
+                    normalize_query(query),
+                    search_filter,
+                    limit,
+                    json.dumps(results, ensure_ascii=False, separators=(",", ":")),
+                ),
+            )
+            self.stats.stores += 1
+
+            # Upper bound (refreshes count too); recount before evicting.
+            self._size += 1
+            if self._size <= self.max_entries:
+                return
+            self._size = self.conn.execute("SELECT COUNT(*) FROM ytm_search_cache;").fetchone()[0]
+            if self._size <= self.max_entries:
+                return
+
+            # Evict down to 95% so we don't pay for a DELETE on every put.
+            overflow = self._size - int(self.max_entries * 0.95)
+            deleted = self.conn.execute(
+                """
+                DELETE FROM ytm_search_cache
+                WHERE rowid IN (
+                    SELECT rowid
+                    FROM ytm_search_cache
+                    ORDER BY created_at ASC
+                    LIMIT ?
+                );
+                """,
+                (overflow,),
+            ).rowcount
+            self.stats.evictions += deleted
+            self._size -= deleted
+
+
+class RedisSearchCache(SearchCache):
+    """
+    Same cache in Redis: each entry is a key with a TTL, and a sorted set of keys
+    by insertion time bounds the number of entries. Safe to share across threads.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        ttl_seconds: int,
+        max_entries: int,
+        prefix: str = "mll:ytm_search:",
+    ) -> None:
+        super().__init__()
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("The redis search cache backend requires the 'redis' package") from exc
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._index_key = f"{prefix}index"
+
+    def _key(self, query: str, search_filter: str, limit: int) -> str:
+        raw = f"{search_filter}\x1f{limit}\x1f{normalize_query(query)}"
+        return self.prefix + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, query: str, search_filter: str, limit: int) -> Optional[SearchResults]:
+        payload = self.client.get(self._key(query, search_filter, limit))
+        if payload is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(payload)
+
+    def put(self, query: str, search_filter: str, limit: int, results: SearchResults) -> None:
+        key = self._key(query, search_filter, limit)
+        payload = json.dumps(results, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.set(key, payload, ex=self.ttl_seconds)
+        pipe.zadd(self._index_key, {key: now})
+        pipe.zremrangebyscore(self._index_key, 0, now - self.ttl_seconds)
+        pipe.zcard(self._index_key)
+        size = pipe.execute()[-1]
+        self.stats.stores += 1
+
+        if size > self.max_entries:
+            overflow = size - self.max_entries
+            stale = self.client.zrange(self._index_key, 0, overflow - 1)
+            if stale:
+                pipe = self.client.pipeline()
+                pipe.delete(*stale)
+                pipe.zrem(self._index_key, *stale)
+                pipe.execute()
+                self.stats.evictions += len(stale)
+
+
+def open_search_cache(conn: sqlite3.Connection, config: SearchCacheConfig) -> Optional[SearchCache]:
+    backend = config.backend.strip().lower()
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return SQLiteSearchCache(conn, ttl_seconds=config.ttl_seconds, max_entries=config.max_entries)
+    if backend == "redis":
+        return RedisSearchCache(
+            config.redis_url or "redis://localhost:6379/0",
+            ttl_seconds=config.ttl_seconds,
+            max_entries=config.max_entries,
+        )
+    raise ValueError(f"Unknown search cache backend: {config.backend}")
@@ -1,10 +1,14 @@
-.read sql/00_pragmas.sql
-.read sql/10_tracks.sql
-.read sql/20_artists.sql
-.read sql/21_track_artists.sql
-.read sql/30_collections.sql
-.read sql/31_collection_items.sql
-.read sql/40_platform_tracks.sql
-.read sql/41_platform_artists.sql
-.read sql/42_platform_collections.sql
-.read sql/90_indexes.sql
+.read python/music_library_ledger/sql/00_pragmas.sql
+.read python/music_library_ledger/sql/10_tracks.sql
+.read python/music_library_ledger/sql/20_artists.sql
+.read python/music_library_ledger/sql/21_track_artists.sql
+.read python/music_library_ledger/sql/30_collections.sql
+.read python/music_library_ledger/sql/31_collection_items.sql
+.read python/music_library_ledger/sql/40_platform_tracks.sql
+.read python/music_library_ledger/sql/41_platform_artists.sql
+.read python/music_library_ledger/sql/42_platform_collections.sql
+.read python/music_library_ledger/sql/43_platform_match_attempts.sql
+.read python/music_library_ledger/sql/50_ytm_search_cache.sql
+.read python/music_library_ledger/sql/60_search.sql
+.read python/music_library_ledger/sql/70_sync_jobs.sql
+.read python/music_library_ledger/sql/90_indexes.sql